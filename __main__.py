@@ -1,163 +1,719 @@
 """Oracle Cloud Infrastructure Pulumi deployment for Linux server."""
 
+from pathlib import Path
+
 import pulumi
 import pulumi_oci as oci
 
+from autoscaling import (
+    create_autoscaling,
+    create_instance_configuration,
+    create_instance_pool,
+    parse_autoscaling,
+)
+from boot_timing import cloud_init_part as boot_timing_part
+from cloud_init import merge_parts, render, tuning_part, user_data
+from fleet import NodeSpec, plan_fleet
+from golden_image import (
+    bake,
+    builder_part,
+    find_image,
+    payload_hash,
+    provisioning_part,
+)
+from image_cache import ImageCache
+from invokes import InvokeLayer
+from launch_options import (
+    check_image,
+    instance_launch_options,
+    resolve_launch_options,
+    validate_launch_options,
+)
+from load_balancer import (
+    add_backends,
+    create_load_balancer,
+    ingress_rules,
+    parse_load_balancer,
+    pool_load_balancers,
+    service_endpoint,
+)
+from cidr import parse_tiers
+from network import VCN_CIDR, create_network, plan_subnets, stack_network
+from nsg import compile_groups, create_security_groups
+from placement import (
+    STACK_TAG,
+    candidates,
+    existing_placements,
+    schedule,
+    sdk_capacity_probe,
+    stack_tag,
+)
+from reservations import (
+    check_existing,
+    create_reservations,
+    parse_reservations,
+    preflight,
+)
+from sizing import resolve_size, validate_size
+from tracing import Tracer, after_evaluation, phase
+from vnic import primary_vnic
+from volumes import (
+    cloud_init_part as volumes_part,
+    create_volumes,
+    needs_block_volume_plugin,
+    parse_volume_sets,
+    resolve_boot_volume,
+)
+
 # Get configuration
 config = pulumi.Config()
 
 # OCI Configuration - these should be set via pulumi config or environment variables
 compartment_id = config.require("compartment_id")
-availability_domain = config.require("availability_domain")
 ssh_public_key = config.require("ssh_public_key")
 
 # Optional configurations with defaults
 subnet_id = config.get("subnet_id")
 vcn_id = config.get("vcn_id")
 image_id = config.get("image_id")
+shape = config.get("shape") or "VM.Standard.A1.Flex"
 
-# If VCN and Subnet are not provided, create them
-if not vcn_id:
-    # Create Virtual Cloud Network (VCN)
-    vcn = oci.core.Vcn(
-        "ronzz-vcn",
-        compartment_id=compartment_id,
-        cidr_blocks=["10.0.0.0/16"],
-        display_name="ronzz-vcn",
-        dns_label="ronzz",
+# Placement: {"shapes": [...], "availability_domains": [...], "fault_domains": [...]}
+# in preference order; without it availability_domain is required
+placement_config = config.get_object("placement")
+if placement_config and placement_config.get("availability_domains"):
+    availability_domain = config.get("availability_domain")
+else:
+    availability_domain = config.require("availability_domain")
+
+# Flex sizing: a named preset (default "standard": 4 OCPUs, 24 GB) with
+# optional explicit overrides, validated locally for every candidate shape
+instance_size = resolve_size(
+    preset=config.get("instance_size"),
+    ocpus=config.get_float("ocpus"),
+    memory_in_gbs=config.get_float("memory_in_gbs"),
+    baseline=config.get("baseline_ocpu_utilization"),
+)
+# Launch options profile (default, low-latency, secure) with optional
+# network_type, boot_volume_type and in_transit_encryption overrides
+launch_options = resolve_launch_options(config.get_object("launch_options"))
+for candidate_shape in (placement_config or {}).get("shapes") or [shape]:
+    validate_size(candidate_shape, instance_size)
+    validate_launch_options(candidate_shape, launch_options)
+
+# Image lookup cache (seconds; set image_cache_refresh=true to bypass once)
+image_cache_ttl = config.get_int("image_cache_ttl") or 86400
+image_cache_refresh = config.get_bool("image_cache_refresh") or False
+image_cache_path = config.get("image_cache_path") or str(
+    Path(__file__).resolve().parent / ".pulumi-cache" / "images.json"
+)
+
+# Fleet mode: {"count": N, "name_prefix": ..., "spread": {...}, "nodes": {...}}
+fleet_config = config.get_object("fleet")
+
+# Autoscaled instance pool: {"min", "max", "initial", "metric",
+# "scale_out_threshold", "scale_in_threshold", "scale_out_step",
+# "scale_in_step", "cooldown_in_seconds"}; replaces the fixed instances
+autoscaling_config = config.get_object("autoscaling")
+autoscaling = parse_autoscaling(autoscaling_config) if autoscaling_config else None
+if autoscaling and fleet_config:
+    raise ValueError("Set either fleet or autoscaling, not both")
+
+# Capacity reservation: {"reservations": [{"availability_domain",
+# "fault_domain", "count" or "ocpus"}]} to reserve slots for instances of the
+# configured size, or {"id": ...} to launch into an existing reservation
+capacity_reservation_config = config.get_object("capacity_reservation")
+capacity_reservations = (
+    parse_reservations(capacity_reservation_config, availability_domain, instance_size)
+    if capacity_reservation_config
+    else []
+)
+if capacity_reservations and capacity_reservation_config.get("id"):
+    raise ValueError("Set either capacity_reservation.id or reservations, not both")
+
+# Provisioning payload: {"packages": [...], "package_upgrade": bool,
+# "runcmd": [...]}; applied at every first boot unless baked into a golden
+# image with golden_image=true
+provisioning_config = config.get_object("provisioning")
+golden_image = config.get_bool("golden_image") or False
+golden_image_build_timeout = config.get_int("golden_image_build_timeout") or 1800
+if golden_image and not provisioning_config:
+    raise ValueError("golden_image needs a provisioning payload to bake")
+
+# Cloud-init tuning profile rendered into user_data (throughput, low-latency,
+# memory-heavy)
+tuning_profile = config.get("tuning_profile")
+
+# Data volume sets: [{"name", "count", "size_in_gbs", "performance" or
+# "vpus_per_gb", "layout", "filesystem", "mount", "attachment_type"}]
+volume_sets = parse_volume_sets(config.get_object("volumes") or [])
+
+# Boot volume size and performance: a preset (default, balanced, higher,
+# ultra) and/or explicit values
+boot_volume = resolve_boot_volume(
+    preset=config.get("boot_volume_preset"),
+    size_in_gbs=config.get_int("boot_volume_size_in_gbs"),
+    vpus_per_gb=config.get_int("boot_volume_vpus_per_gb"),
+)
+
+# Record instance creation to cloud-init completion (optionally POSTed to
+# boot_timing_url); read back with `python boot_timing.py`
+boot_timing = config.get_bool("boot_timing") or False
+boot_timing_url = config.get("boot_timing_url")
+
+# Opt-in Chrome trace of resource registrations, invokes and program phases
+trace_file = config.get("trace_file")
+tracer = Tracer(trace_file) if trace_file else None
+if tracer:
+    tracer.install()
+
+# Shared invoke layer: coalescing, memoization, concurrency cap and retries
+invokes = InvokeLayer(
+    concurrency=config.get_int("invoke_concurrency") or 8,
+    max_retries=config.get_int("invoke_max_retries") or 5,
+    report_path=config.get("invoke_stats_path"),
+    tracer=tracer,
+)
+
+# Layer-4 network load balancer: {"listeners": [{"name", "port",
+# "backend_port", "protocol"}], "health_check": {...}, "policy", "is_private",
+# "is_preserve_source", "source_cidr", "subnet_id"}
+load_balancer_config = config.get_object("load_balancer")
+load_balancer = (
+    parse_load_balancer(load_balancer_config) if load_balancer_config else None
+)
+
+# Generated network layout: "public" (one public subnet) or "split" (public
+# ingress subnet plus a private worker subnet behind service and NAT gateways)
+network_topology = config.get("network_topology") or "public"
+
+# Subnet tiers carved out of vcn_cidr by cidr.allocate: [{"name", "hosts" or
+# "prefix_length", "public", "availability_domains", "ipv6", "instances"}];
+# subnet_cidrs pins {subnet name: CIDR}. Without tiers the two default
+# subnets are the second and third /24 of vcn_cidr
+vcn_cidr = config.get("vcn_cidr") or VCN_CIDR
+subnet_tiers = parse_tiers(config.get_object("subnet_tiers") or [])
+subnet_cidr_pins = config.get_object("subnet_cidrs") or {}
+
+# Network security groups: {role: [{"direction", "protocol", "port" or
+# "ports", "source" or "destination" (CIDR or "nsg:<role>"), "icmp_type",
+# "icmp_code", "stateless", "description"}]}; instance_security_groups lists
+# the roles attached to the instance VNICs (default: all). A generated
+# network then leaves SSH to the groups instead of its security list
+security_groups_config = config.get_object("security_groups")
+instance_security_groups = config.get_object("instance_security_groups")
+security_groups = (
+    compile_groups(security_groups_config, instance_security_groups)
+    if security_groups_config
+    else None
+)
+
+# Network deployed separately by the network-stack project, as a fully
+# qualified "org/ronzz-linux-network/stack" name; replaces vcn_id/subnet_id
+network_stack = config.get("network_stack")
+if network_stack and (vcn_id or subnet_id):
+    raise ValueError("Set either network_stack or vcn_id/subnet_id, not both")
+if (subnet_tiers or config.get("vcn_cidr")) and (network_stack or vcn_id):
+    raise ValueError(
+        "vcn_cidr and subnet_tiers only apply to a network this stack creates; "
+        "with network_stack, set them in the network stack"
     )
-    vcn_id = vcn.id
 
-    # Create Internet Gateway
-    internet_gateway = oci.core.InternetGateway(
-        "ronzz-igw",
-        compartment_id=compartment_id,
-        vcn_id=vcn_id,
-        enabled=True,
-        display_name="ronzz-internet-gateway",
+# Attempts when waiting for the primary VNIC attachment (exponential backoff)
+vnic_poll_attempts = config.get_int("vnic_poll_attempts") or 8
+
+# Probe capacity for every placement candidate concurrently and keep the ones
+# that can fit, most preferred first, before any instance is registered.
+# Instances that already exist keep their placement: moving them to another
+# AD or fault domain would replace them
+placements = None
+pinned_placements = {}
+if placement_config:
+    if autoscaling:
+        node_names = []
+    elif fleet_config:
+        node_names = [node.name for node in plan_fleet(fleet_config, None)]
+    else:
+        node_names = ["ronzz-linux-server"]
+    with phase(tracer, "existing placements"):
+        pinned_placements = existing_placements(invokes, compartment_id, node_names)
+    shapes = placement_config.get("shapes") or [shape]
+    if pinned_placements:
+        # Every node shares one shape; keep the one already running
+        shapes = [pinned_placements[min(pinned_placements)].shape]
+    candidate_list = candidates(
+        shapes,
+        placement_config.get("availability_domains") or [availability_domain],
+        placement_config.get("fault_domains"),
     )
+    if node_names and set(node_names) <= set(pinned_placements):
+        # Nothing new to launch, so nothing to probe
+        viable_candidates = [pinned_placements[name] for name in sorted(node_names)]
+    else:
+        capacity_probe = sdk_capacity_probe(
+            compartment_id,
+            ocpus=instance_size.ocpus,
+            memory_in_gbs=instance_size.memory_in_gbs,
+            region=pulumi.Config("oci").get("region"),
+        )
+        if capacity_probe is None:
+            pulumi.log.warn(
+                "The oci Python SDK is not installed or not configured; skipping "
+                "capacity probes and using the configured placement order"
+            )
+            viable_candidates = candidate_list
+        else:
+            with phase(tracer, "capacity probes"):
+                viable_candidates = schedule(
+                    candidate_list,
+                    capacity_probe,
+                    timeout=placement_config.get("probe_timeout", 30),
+                )
+    shape = viable_candidates[0].shape
+    placements = [
+        (candidate.availability_domain, candidate.fault_domain)
+        for candidate in viable_candidates
+        if candidate.shape == shape
+    ]
+    availability_domain = placements[0][0]
 
-    # Create Route Table
-    route_table = oci.core.RouteTable(
-        "ronzz-route-table",
+
+def fetch_latest_image(
+    compartment_id, operating_system, operating_system_version, shape
+):
+    images = invokes.invoke(
+        oci.core.get_images,
         compartment_id=compartment_id,
-        vcn_id=vcn_id,
-        display_name="ronzz-route-table",
-        route_rules=[
-            oci.core.RouteTableRouteRuleArgs(
-                network_entity_id=internet_gateway.id,
-                destination="0.0.0.0/0",
-                destination_type="CIDR_BLOCK",
+        operating_system=operating_system,
+        operating_system_version=operating_system_version,
+        shape=shape,
+        sort_by="TIMECREATED",
+        sort_order="DESC",
+    )
+    return images.images[0].id if images.images else None
+
+
+# If image_id is not provided, get the latest Ubuntu Linux image
+if not image_id:
+    # Get the latest Ubuntu Linux 24.04 image for ARM (cached on disk)
+    image_cache = ImageCache(
+        image_cache_path,
+        ttl=image_cache_ttl,
+        fetch=fetch_latest_image,
+        refresh=image_cache_refresh,
+        region=pulumi.Config("oci").get("region"),
+    )
+    with phase(tracer, "image lookup"):
+        image_id = image_cache.get(
+            compartment_id,
+            operating_system="Canonical Ubuntu",
+            operating_system_version="24.04",
+            shape=shape,
+        )
+    if not image_id:
+        # Fallback: let user specify or use a known image OCID
+        raise Exception(
+            f"No Ubuntu Linux 24.04 image found for {shape} shape. "
+            "Please provide image_id via config."
+        )
+
+# Render cloud-init once; every node boots with the same user_data
+cloud_init_parts = []
+if provisioning_config and not golden_image:
+    cloud_init_parts.append(provisioning_part(provisioning_config))
+if tuning_profile:
+    cloud_init_parts.append(tuning_part(tuning_profile))
+if volume_sets:
+    cloud_init_parts.append(volumes_part(volume_sets))
+if boot_timing:
+    cloud_init_parts.append(boot_timing_part(boot_timing_url))
+
+instance_metadata = {"ssh_authorized_keys": ssh_public_key}
+if cloud_init_parts:
+    cloud_init_text, cloud_init_hash = render(merge_parts(*cloud_init_parts))
+    instance_metadata["user_data"] = user_data(cloud_init_text)
+    pulumi.export("user_data_hash", cloud_init_hash)
+
+# One node by default; the fleet block expands into N nodes sharing the
+# image resolved above. An autoscaled pool launches its own.
+if autoscaling:
+    nodes = []
+    pool_placements = placements or [(availability_domain, None)]
+    if capacity_reservation_config:
+        # A pool launches into at most one reservation; keep its AD
+        pool_placements = [
+            placement
+            for placement in pool_placements
+            if placement[0] == pool_placements[0][0]
+        ]
+elif fleet_config:
+    nodes = plan_fleet(
+        fleet_config,
+        availability_domain,
+        placements=placements,
+        pinned={
+            name: (candidate.availability_domain, candidate.fault_domain)
+            for name, candidate in pinned_placements.items()
+        },
+    )
+else:
+    pinned = pinned_placements.get("ronzz-linux-server")
+    nodes = [
+        NodeSpec(
+            name="ronzz-linux-server",
+            availability_domain=(
+                pinned.availability_domain if pinned else availability_domain
+            ),
+            fault_domain=(
+                pinned.fault_domain
+                if pinned
+                else placements[0][1] if placements else None
+            ),
+            vnic_name="ronzz-primary-vnic",
+        )
+    ]
+
+# Every image must support the profile's network type; a golden image keeps
+# its base image's launch mode
+node_image_ids = {image_id, *(node.image_id for node in nodes)} - {None}
+with phase(tracer, "launch options check"):
+    for node_image_id in sorted(node_image_ids):
+        check_image(invokes, node_image_id, launch_options)
+
+# Compare the requested instances with the reserved slots before any
+# resource is registered
+capacity_reservation_ids = {}
+if capacity_reservation_config:
+    if autoscaling:
+        # The pool can grow to max instances in the first placement's AD
+        requested = [(pool_placements[0][0], None)] * autoscaling.max
+    else:
+        requested = [(node.availability_domain, node.fault_domain) for node in nodes]
+    if capacity_reservation_config.get("id"):
+        reserved_availability_domain = check_existing(
+            invokes, capacity_reservation_config["id"], requested
+        )
+        capacity_reservation_ids[reserved_availability_domain] = (
+            capacity_reservation_config["id"]
+        )
+    else:
+        preflight(capacity_reservations, requested)
+
+# Use the network stack's outputs, or create the VCN and subnets when no
+# existing ones are provided
+assign_public_ip = True
+load_balancer_subnet_id = (load_balancer_config or {}).get("subnet_id") or subnet_id
+network = None
+if network_stack:
+    network = stack_network(network_stack)
+elif not vcn_id:
+    listener_rules, backend_rules = (
+        ingress_rules(load_balancer, vcn_cidr) if load_balancer else ([], [])
+    )
+    subnet_plan = None
+    if subnet_tiers:
+        with phase(tracer, "subnet allocation"):
+            subnet_plan = plan_subnets(
+                invokes, compartment_id, vcn_cidr, subnet_tiers, subnet_cidr_pins
             )
-        ],
+        pulumi.export(
+            "subnet_cidrs", {plan.name: plan.cidr_block for plan in subnet_plan}
+        )
+    network = create_network(
+        compartment_id,
+        network_topology,
+        invokes,
+        ingress_rules=listener_rules,
+        backend_rules=backend_rules,
+        vcn_cidr=vcn_cidr,
+        subnet_plan=subnet_plan,
+        ssh_ingress=security_groups is None,
+    )
+elif load_balancer:
+    pulumi.log.warn(
+        "Using an existing VCN; open the load balancer listener, backend and "
+        "health check ports in its security lists"
+    )
+if network is not None:
+    vcn_id = network.vcn_id
+    subnet_id = network.subnet_id
+    load_balancer_subnet_id = network.public_subnet_id
+    assign_public_ip = network.assign_public_ip
+
+
+# One NSG per role and one resource per rule, attached to every instance VNIC
+nsg_ids = None
+if security_groups is not None:
+    network_security_groups = create_security_groups(
+        compartment_id, vcn_id, security_groups
+    )
+    nsg_ids = [
+        network_security_groups[role].id
+        for role in (instance_security_groups or sorted(security_groups))
+    ]
+    pulumi.export(
+        "network_security_group_ids",
+        {role: group.id for role, group in network_security_groups.items()},
     )
 
-    # Create Security List
-    security_list = oci.core.SecurityList(
-        "ronzz-security-list",
+
+def node_subnet_id(node_availability_domain):
+    """Subnet for instances in an AD; AD-specific tiers have one per AD."""
+    if network is None:
+        return subnet_id
+    return network.instance_subnet_id(node_availability_domain)
+
+
+# Reserve capacity for every AD with reserved slots
+if capacity_reservations:
+    capacity_reservation_ids = {
+        reserved_availability_domain: reservation.id
+        for reserved_availability_domain, reservation in create_reservations(
+            "ronzz-capacity-reservation",
+            compartment_id,
+            shape,
+            instance_size,
+            capacity_reservations,
+        ).items()
+    }
+
+# Reuse the golden image baked from this payload and base image, or bake it
+# once; instances then boot with the payload already applied
+if golden_image:
+    payload_text, _ = render(
+        merge_parts(provisioning_part(provisioning_config), builder_part())
+    )
+    golden_image_hash = payload_hash(payload_text, image_id)
+    with phase(tracer, "golden image lookup"):
+        golden_image_id = find_image(invokes, compartment_id, golden_image_hash)
+    if golden_image_id is None:
+        golden_image_id = bake(
+            invokes,
+            golden_image_hash,
+            compartment_id,
+            availability_domain,
+            shape,
+            oci.core.InstanceShapeConfigArgs(
+                ocpus=instance_size.ocpus,
+                memory_in_gbs=instance_size.memory_in_gbs,
+                baseline_ocpu_utilization=instance_size.baseline_ocpu_utilization,
+            ),
+            node_subnet_id(availability_domain),
+            assign_public_ip,
+            image_id,
+            {
+                "ssh_authorized_keys": ssh_public_key,
+                "user_data": user_data(payload_text),
+            },
+            timeout=golden_image_build_timeout,
+            launch_options=launch_options,
+        ).id
+    image_id = golden_image_id
+    pulumi.export("golden_image_id", golden_image_id)
+    pulumi.export("golden_image_hash", golden_image_hash)
+
+
+def create_instance(node):
+    # Create Compute Instance (VM.Standard.A1.Flex, 4 OCPUs and 24GB by default)
+    return oci.core.Instance(
+        node.name,
+        availability_domain=node.availability_domain,
+        fault_domain=node.fault_domain,
         compartment_id=compartment_id,
-        vcn_id=vcn_id,
-        display_name="ronzz-security-list",
-        egress_security_rules=[
-            oci.core.SecurityListEgressSecurityRuleArgs(
-                destination="0.0.0.0/0",
-                protocol="all",
-                description="Allow all outbound traffic",
-            )
-        ],
-        ingress_security_rules=[
-            oci.core.SecurityListIngressSecurityRuleArgs(
-                protocol="6",  # TCP
-                source="0.0.0.0/0",
-                description="Allow SSH",
-                tcp_options=oci.core.SecurityListIngressSecurityRuleTcpOptionsArgs(
-                    min=22, max=22
-                ),
+        capacity_reservation_id=capacity_reservation_ids.get(
+            node.availability_domain
+        ),
+        shape=shape,
+        shape_config=oci.core.InstanceShapeConfigArgs(
+            ocpus=instance_size.ocpus,
+            memory_in_gbs=instance_size.memory_in_gbs,
+            baseline_ocpu_utilization=instance_size.baseline_ocpu_utilization,
+        ),
+        display_name=node.name,
+        # Lets the next run find this stack's instances (placement)
+        freeform_tags={STACK_TAG: stack_tag()},
+        create_vnic_details=oci.core.InstanceCreateVnicDetailsArgs(
+            subnet_id=node_subnet_id(node.availability_domain),
+            assign_public_ip=assign_public_ip,
+            nsg_ids=nsg_ids,
+            display_name=node.vnic_name,
+        ),
+        source_details=oci.core.InstanceSourceDetailsArgs(
+            source_type="image",
+            source_id=node.image_id or image_id,
+            boot_volume_size_in_gbs=(
+                str(boot_volume.size_in_gbs) if boot_volume.size_in_gbs else None
             ),
-            oci.core.SecurityListIngressSecurityRuleArgs(
-                protocol="1", source="0.0.0.0/0", description="Allow ICMP"  # ICMP
+            boot_volume_vpus_per_gb=(
+                str(boot_volume.vpus_per_gb) if boot_volume.vpus_per_gb else None
             ),
-        ],
+        ),
+        # Per-node fleet.nodes.<name>.metadata wins over the stack-wide keys
+        metadata={
+            **instance_metadata,
+            **node.metadata,
+        },
+        agent_config=(
+            oci.core.InstanceAgentConfigArgs(
+                plugins_configs=[
+                    oci.core.InstanceAgentConfigPluginsConfigArgs(
+                        name="Block Volume Management", desired_state="ENABLED"
+                    )
+                ]
+            )
+            if needs_block_volume_plugin(volume_sets)
+            else None
+        ),
+        launch_options=instance_launch_options(launch_options),
+        is_pv_encryption_in_transit_enabled=launch_options.in_transit_encryption,
+        # A scheduled placement is kept for the life of the instance, even
+        # when a later probe prefers another one
+        opts=(
+            pulumi.ResourceOptions(
+                ignore_changes=["availability_domain", "fault_domain"]
+            )
+            if placement_config
+            else None
+        ),
     )
 
-    # Create Subnet
-    subnet = oci.core.Subnet(
-        "ronzz-subnet",
-        compartment_id=compartment_id,
-        vcn_id=vcn_id,
-        cidr_block="10.0.1.0/24",
-        display_name="ronzz-subnet",
-        dns_label="ronzzsubnet",
-        route_table_id=route_table.id,
-        security_list_ids=[security_list.id],
+
+# The load balancer and its backend sets exist before any backend joins them
+if load_balancer:
+    network_load_balancer, backend_sets = create_load_balancer(
+        "ronzz-nlb", compartment_id, load_balancer_subnet_id, load_balancer
     )
-    subnet_id = subnet.id
 
-# If image_id is not provided, get the latest Ubuntu Linux image
-if not image_id:
-    # Get the latest Ubuntu Linux 24.04 image for ARM
-    images = oci.core.get_images(
-        compartment_id=compartment_id,
-        operating_system="Canonical Ubuntu",
-        operating_system_version="24.04",
-        shape="VM.Standard.A1",
-        sort_by="TIMECREATED",
-        sort_order="DESC",
+# Register every instance before awaiting anything so the engine can create
+# them in parallel
+instances = {node.name: create_instance(node) for node in nodes}
+
+# Data volumes live in the instance's AD and are striped by cloud-init
+for node in nodes:
+    create_volumes(
+        node.name,
+        node.availability_domain,
+        compartment_id,
+        instances[node.name],
+        volume_sets,
     )
-    if images.images:
-        image_id = images.images[0].id
-    else:
-        # Fallback: let user specify or use a known image OCID
-        raise Exception(
-            "No Ubuntu Linux 24.04 image found for VM.Standard.A1 shape. Please provide image_id via config."
-        )
 
-# Create Compute Instance (VM.Standard.A1 with 24GB RAM and 4 OCPUs)
-instance = oci.core.Instance(
-    "ronzz-linux-server",
-    availability_domain=availability_domain,
-    compartment_id=compartment_id,
-    shape="VM.Standard.A1",
-    display_name="ronzz-linux-server",
-    create_vnic_details=oci.core.InstanceCreateVnicDetailsArgs(
-        subnet_id=subnet_id, assign_public_ip=True, display_name="ronzz-primary-vnic"
-    ),
-    source_details=oci.core.InstanceSourceDetailsArgs(
-        source_type="image", source_id=image_id
-    ),
-    metadata={
-        "ssh_authorized_keys": ssh_public_key,
-    },
-    instance_type="VM",
-    is_pv_encryption_in_transit_enabled=True,
-)
+if load_balancer:
+    add_backends(
+        "ronzz-nlb", network_load_balancer, backend_sets, load_balancer, instances
+    )
 
+# Get the public IP from each primary VNIC once it is attached
+primary_vnic_outputs = {
+    name: primary_vnic(
+        invokes, compartment_id, instance, attempts=vnic_poll_attempts
+    )
+    for name, instance in instances.items()
+}
 
-# Get the public IP from the VNIC
-def get_vnic_details(instance_id):
-    vnic_attachments = oci.core.get_vnic_attachments(
-        compartment_id=compartment_id, instance_id=instance_id
+if autoscaling:
+    # OCI launches the pool's instances from this configuration and resizes
+    # the pool under load
+    instance_configuration = create_instance_configuration(
+        "ronzz-instance-configuration",
+        compartment_id,
+        shape,
+        instance_size,
+        node_subnet_id(pool_placements[0][0]),
+        assign_public_ip,
+        image_id,
+        boot_volume,
+        instance_metadata,
+        ["Block Volume Management"] if needs_block_volume_plugin(volume_sets) else [],
+        volume_sets,
+        capacity_reservation_id=capacity_reservation_ids.get(pool_placements[0][0]),
+        launch_options=launch_options,
+        nsg_ids=nsg_ids,
+    )
+    instance_pool = create_instance_pool(
+        "ronzz-instance-pool",
+        compartment_id,
+        instance_configuration,
+        pool_placements,
+        node_subnet_id,
+        autoscaling,
+        load_balancers=(
+            pool_load_balancers(network_load_balancer, backend_sets, load_balancer)
+            if load_balancer
+            else None
+        ),
+    )
+    autoscaling_configuration = create_autoscaling(
+        "ronzz-autoscaling", compartment_id, instance_pool, autoscaling
     )
-    if vnic_attachments.vnic_attachments:
-        vnic_id = vnic_attachments.vnic_attachments[0].vnic_id
-        primary_vnic = oci.core.get_vnic(vnic_id=vnic_id)
-        return primary_vnic
-    return None
 
+    pulumi.export("instance_configuration_id", instance_configuration.id)
+    pulumi.export("instance_pool_id", instance_pool.id)
+    pulumi.export("instance_pool_size", instance_pool.size)
+    pulumi.export("autoscaling_configuration_id", autoscaling_configuration.id)
+elif fleet_config:
+    # Export a compact map keyed by node name
+    pulumi.export(
+        "nodes",
+        {
+            name: {
+                "id": instance.id,
+                "time_created": instance.time_created,
+                "public_ip": primary_vnic_outputs[name].apply(
+                    lambda vnic: vnic.public_ip_address if vnic else "N/A"
+                ),
+                "private_ip": primary_vnic_outputs[name].apply(
+                    lambda vnic: vnic.private_ip_address if vnic else "N/A"
+                ),
+            }
+            for name, instance in instances.items()
+        },
+    )
+else:
+    instance = instances["ronzz-linux-server"]
+    primary_vnic_output = primary_vnic_outputs["ronzz-linux-server"]
 
-# Use apply to handle the async operations
-primary_vnic_output = instance.id.apply(get_vnic_details)
+    # Export the instance details
+    pulumi.export("instance_id", instance.id)
+    pulumi.export("instance_name", instance.display_name)
+    pulumi.export("instance_shape", instance.shape)
+    pulumi.export(
+        "public_ip",
+        primary_vnic_output.apply(
+            lambda vnic: vnic.public_ip_address if vnic else "N/A"
+        ),
+    )
+    pulumi.export(
+        "private_ip",
+        primary_vnic_output.apply(
+            lambda vnic: vnic.private_ip_address if vnic else "N/A"
+        ),
+    )
+    pulumi.export("instance_state", instance.state)
+    pulumi.export("instance_time_created", instance.time_created)
 
-# Export the instance details
-pulumi.export("instance_id", instance.id)
-pulumi.export("instance_name", instance.display_name)
-pulumi.export("instance_shape", instance.shape)
-pulumi.export(
-    "public_ip",
-    primary_vnic_output.apply(lambda vnic: vnic.public_ip_address if vnic else "N/A"),
-)
-pulumi.export(
-    "private_ip",
-    primary_vnic_output.apply(lambda vnic: vnic.private_ip_address if vnic else "N/A"),
-)
-pulumi.export("instance_state", instance.state)
+if load_balancer:
+    pulumi.export("service_endpoint", service_endpoint(network_load_balancer))
+    pulumi.export(
+        "service_ports", [listener.port for listener in load_balancer.listeners]
+    )
+
+pulumi.export("boot_volume_size_in_gbs", boot_volume.size_in_gbs)
+pulumi.export("boot_volume_vpus_per_gb", boot_volume.vpus_per_gb)
+pulumi.export("launch_options_profile", launch_options.profile)
+
+if tracer:
+    tracer.end_program()
+
+
+def write_reports():
+    if tracer:
+        tracer.write()
+    if invokes.report_path:
+        invokes.write_report()
+
+
+# Once this evaluation settles rather than at exit: a warm runner evaluates
+# the program many times in one process
+if tracer or invokes.report_path:
+    after_evaluation(write_reports)
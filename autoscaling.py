@@ -0,0 +1,295 @@
+"""Instance pool launched from an instance configuration and autoscaled by OCI.
+
+With an ``autoscaling`` config object the program registers the launch
+parameters it would otherwise give each ``oci.core.Instance`` as an
+``InstanceConfiguration``, launches them through an ``InstancePool`` and
+attaches a threshold ``AutoScalingConfiguration``. OCI then resizes the pool
+under load without a Pulumi run; the pool's ``size`` is ignored on later
+updates so ``pulumi up`` does not undo a scaling action.
+"""
+
+from typing import NamedTuple
+
+import pulumi
+import pulumi_oci as oci
+
+from launch_options import instance_launch_options
+
+METRICS = ("CPU_UTILIZATION", "MEMORY_UTILIZATION")
+
+# OCI rejects autoscaling cooldowns shorter than five minutes
+MIN_COOLDOWN_SECONDS = 300
+
+
+class AutoScaling(NamedTuple):
+    min: int
+    max: int
+    initial: int
+    metric: str
+    scale_out_threshold: int
+    scale_in_threshold: int
+    scale_out_step: int
+    scale_in_step: int
+    cooldown_in_seconds: int
+
+
+def parse_autoscaling(settings):
+    """Validate the ``autoscaling`` config object and fill in defaults."""
+    minimum = int(settings.get("min", 1))
+    maximum = int(settings.get("max", max(minimum, 2)))
+    initial = int(settings.get("initial", minimum))
+    if not 0 <= minimum <= initial <= maximum or maximum < 1:
+        raise ValueError(
+            "autoscaling needs 0 <= min <= initial <= max and max >= 1, "
+            f"got min={minimum}, initial={initial}, max={maximum}"
+        )
+
+    metric = settings.get("metric", "CPU_UTILIZATION")
+    if metric not in METRICS:
+        raise ValueError(
+            f"Unknown autoscaling.metric {metric!r}; "
+            f"expected one of: {', '.join(METRICS)}"
+        )
+
+    scale_out_threshold = int(settings.get("scale_out_threshold", 80))
+    scale_in_threshold = int(settings.get("scale_in_threshold", 20))
+    if not 0 < scale_in_threshold < scale_out_threshold < 100:
+        raise ValueError(
+            "autoscaling needs 0 < scale_in_threshold < scale_out_threshold < 100"
+        )
+
+    scale_out_step = int(settings.get("scale_out_step", 1))
+    scale_in_step = int(settings.get("scale_in_step", 1))
+    if scale_out_step < 1 or scale_in_step < 1:
+        raise ValueError("autoscaling scale_out_step and scale_in_step must be >= 1")
+
+    cooldown = int(settings.get("cooldown_in_seconds", MIN_COOLDOWN_SECONDS))
+    if cooldown < MIN_COOLDOWN_SECONDS:
+        raise ValueError(
+            f"autoscaling.cooldown_in_seconds must be at least {MIN_COOLDOWN_SECONDS}"
+        )
+
+    return AutoScaling(
+        minimum,
+        maximum,
+        initial,
+        metric,
+        scale_out_threshold,
+        scale_in_threshold,
+        scale_out_step,
+        scale_in_step,
+        cooldown,
+    )
+
+
+def placement_configurations(placements, subnet_for):
+    """Group ``(availability_domain, fault_domain)`` pairs per AD for the pool.
+
+    ``subnet_for(availability_domain)`` returns the primary subnet for an AD.
+    """
+    fault_domains = {}
+    for availability_domain, fault_domain in placements:
+        domains = fault_domains.setdefault(availability_domain, [])
+        if fault_domain and fault_domain not in domains:
+            domains.append(fault_domain)
+    return [
+        oci.core.InstancePoolPlacementConfigurationArgs(
+            availability_domain=availability_domain,
+            primary_subnet_id=subnet_for(availability_domain),
+            fault_domains=domains or None,
+        )
+        for availability_domain, domains in fault_domains.items()
+    ]
+
+
+def create_instance_configuration(
+    name,
+    compartment_id,
+    shape,
+    size,
+    subnet_id,
+    assign_public_ip,
+    image_id,
+    boot_volume,
+    metadata,
+    plugins,
+    volume_sets,
+    capacity_reservation_id=None,
+    launch_options=None,
+    nsg_ids=None,
+):
+    """Register the instance launch parameters as an ``InstanceConfiguration``.
+
+    Data volume sets become block volumes created and attached with every
+    pool instance, on the same device paths the volumes cloud-init part
+    expects.
+    """
+    core = oci.core
+    launch_details = core.InstanceConfigurationInstanceDetailsLaunchDetailsArgs
+    shape_config = core.InstanceConfigurationInstanceDetailsLaunchDetailsShapeConfigArgs
+    vnic_details = (
+        core.InstanceConfigurationInstanceDetailsLaunchDetailsCreateVnicDetailsArgs
+    )
+    source_details = (
+        core.InstanceConfigurationInstanceDetailsLaunchDetailsSourceDetailsArgs
+    )
+    agent_config = core.InstanceConfigurationInstanceDetailsLaunchDetailsAgentConfigArgs
+    launch_options_args = (
+        core.InstanceConfigurationInstanceDetailsLaunchDetailsLaunchOptionsArgs
+    )
+    block_volume = core.InstanceConfigurationInstanceDetailsBlockVolumeArgs
+    volume_details = (
+        core.InstanceConfigurationInstanceDetailsBlockVolumeCreateDetailsArgs
+    )
+    attach_details = (
+        core.InstanceConfigurationInstanceDetailsBlockVolumeAttachDetailsArgs
+    )
+    boot_size = str(boot_volume.size_in_gbs) if boot_volume.size_in_gbs else None
+    boot_vpus = str(boot_volume.vpus_per_gb) if boot_volume.vpus_per_gb else None
+    return core.InstanceConfiguration(
+        name,
+        compartment_id=compartment_id,
+        display_name=name,
+        instance_details=core.InstanceConfigurationInstanceDetailsArgs(
+            instance_type="compute",
+            launch_details=launch_details(
+                compartment_id=compartment_id,
+                capacity_reservation_id=capacity_reservation_id,
+                shape=shape,
+                shape_config=shape_config(
+                    ocpus=size.ocpus,
+                    memory_in_gbs=size.memory_in_gbs,
+                    baseline_ocpu_utilization=size.baseline_ocpu_utilization,
+                ),
+                create_vnic_details=vnic_details(
+                    subnet_id=subnet_id,
+                    assign_public_ip=assign_public_ip,
+                    nsg_ids=nsg_ids,
+                ),
+                source_details=source_details(
+                    source_type="image",
+                    image_id=image_id,
+                    boot_volume_size_in_gbs=boot_size,
+                    boot_volume_vpus_per_gb=boot_vpus,
+                ),
+                metadata=metadata,
+                agent_config=(
+                    agent_config(
+                        plugins_configs=[
+                            {"name": plugin, "desired_state": "ENABLED"}
+                            for plugin in plugins
+                        ]
+                    )
+                    if plugins
+                    else None
+                ),
+                launch_options=(
+                    instance_launch_options(launch_options, launch_options_args)
+                    if launch_options
+                    else None
+                ),
+                is_pv_encryption_in_transit_enabled=(
+                    launch_options.in_transit_encryption if launch_options else True
+                ),
+            ),
+            block_volumes=[
+                block_volume(
+                    create_details=volume_details(
+                        compartment_id=compartment_id,
+                        display_name=f"{volume_set.name}-{index}",
+                        size_in_gbs=str(volume_set.size_in_gbs),
+                        vpus_per_gb=str(volume_set.vpus_per_gb),
+                    ),
+                    attach_details=attach_details(
+                        type=volume_set.attachment_type,
+                        device=device,
+                        display_name=f"{volume_set.name}-{index}-attachment",
+                    ),
+                )
+                for volume_set in volume_sets
+                for index, device in enumerate(volume_set.devices)
+            ]
+            or None,
+        ),
+    )
+
+
+def create_instance_pool(
+    name,
+    compartment_id,
+    instance_configuration,
+    placements,
+    subnet_for,
+    settings,
+    load_balancers=None,
+):
+    """Launch ``settings.initial`` instances from ``instance_configuration``.
+
+    ``subnet_for(availability_domain)`` picks each placement's subnet.
+
+    Instances are registered with the backend sets in ``load_balancers`` as
+    the pool scales.
+    """
+    return oci.core.InstancePool(
+        name,
+        compartment_id=compartment_id,
+        display_name=name,
+        instance_configuration_id=instance_configuration.id,
+        size=settings.initial,
+        placement_configurations=placement_configurations(placements, subnet_for),
+        load_balancers=load_balancers,
+        # The autoscaler owns the pool size once it exists
+        opts=pulumi.ResourceOptions(ignore_changes=["size"]),
+    )
+
+
+def create_autoscaling(name, compartment_id, instance_pool, settings):
+    """Attach a threshold scaling policy on ``settings.metric`` to the pool."""
+    resources = oci.autoscaling.AutoScalingConfigurationAutoScalingResourcesArgs
+    rule = oci.autoscaling.AutoScalingConfigurationPolicyRuleArgs
+    action = oci.autoscaling.AutoScalingConfigurationPolicyRuleActionArgs
+    metric = oci.autoscaling.AutoScalingConfigurationPolicyRuleMetricArgs
+    threshold = oci.autoscaling.AutoScalingConfigurationPolicyRuleMetricThresholdArgs
+    return oci.autoscaling.AutoScalingConfiguration(
+        name,
+        compartment_id=compartment_id,
+        display_name=name,
+        is_enabled=True,
+        cool_down_in_seconds=settings.cooldown_in_seconds,
+        auto_scaling_resources=resources(id=instance_pool.id, type="instancePool"),
+        policies=[
+            oci.autoscaling.AutoScalingConfigurationPolicyArgs(
+                policy_type="threshold",
+                display_name=f"{name}-policy",
+                capacity=oci.autoscaling.AutoScalingConfigurationPolicyCapacityArgs(
+                    initial=settings.initial, min=settings.min, max=settings.max
+                ),
+                rules=[
+                    rule(
+                        display_name="scale-out",
+                        action=action(
+                            type="CHANGE_COUNT_BY", value=settings.scale_out_step
+                        ),
+                        metric=metric(
+                            metric_type=settings.metric,
+                            threshold=threshold(
+                                operator="GT", value=settings.scale_out_threshold
+                            ),
+                        ),
+                    ),
+                    rule(
+                        display_name="scale-in",
+                        action=action(
+                            type="CHANGE_COUNT_BY", value=-settings.scale_in_step
+                        ),
+                        metric=metric(
+                            metric_type=settings.metric,
+                            threshold=threshold(
+                                operator="LT", value=settings.scale_in_threshold
+                            ),
+                        ),
+                    ),
+                ],
+            )
+        ],
+    )
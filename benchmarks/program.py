@@ -0,0 +1,369 @@
+"""Offline benchmark of program evaluation using Pulumi mocks.
+
+Runs ``__main__.py`` against the simulated OCI in ``mocks.py`` with
+injected invoke and registration latencies, so no cloud account or network
+is needed. Each scenario runs in a fresh interpreter and reports wall time,
+resources registered, invokes issued, throttled calls and peak RSS. The
+timed run never has ``tracemalloc`` active (it slows evaluation several
+times over); ``--trace-memory`` adds a separate traced run per scenario for
+the peak Python heap. Results are written as JSON; pass ``--compare`` with
+a previous file to see regressions.
+
+Latencies are milliseconds or a distribution (``uniform:LOW:HIGH``,
+``lognormal:MEDIAN:SIGMA``). Faults from the command line apply to every
+scenario on top of the scenario's own:
+
+    python benchmarks/program.py --out bench-results.json
+    python benchmarks/program.py --scenario fleet-500 --invoke-latency-ms 50
+    python benchmarks/program.py --invoke-latency-ms lognormal:40:0.6 \
+        --throttle-rate 0.1
+    python benchmarks/program.py --scenario fleet-10 --vnic-attach-polls 2
+    python benchmarks/program.py --scenario fleet-50 --trace-memory
+    python benchmarks/program.py --compare bench-results.json --out new.json
+"""
+
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# The program's modules (inline_program, mocks) live in the project root
+sys.path.insert(0, str(ROOT))
+STACK = "bench"
+
+BASE_CONFIG = {
+    "compartment_id": "ocid1.compartment.oc1..bench",
+    "availability_domain": "BENCH-AD-1",
+    "ssh_public_key": "ssh-ed25519 AAAAC3NzaC1lZDI1NTE5AAAAIBench bench@example",
+}
+
+_SPREAD = {
+    "availability_domains": ["BENCH-AD-1", "BENCH-AD-2", "BENCH-AD-3"],
+    "fault_domains": ["FAULT-DOMAIN-1", "FAULT-DOMAIN-2", "FAULT-DOMAIN-3"],
+}
+
+SCENARIOS = {
+    "single": {},
+    "existing-vcn": {
+        "vcn_id": "ocid1.vcn.oc1..bench",
+        "subnet_id": "ocid1.subnet.oc1..bench",
+    },
+    "split-network": {"network_topology": "split"},
+    "network-stack": {"network_stack": "organization/ronzz-linux-network/bench"},
+    "subnet-tiers": {
+        "network_topology": "split",
+        "subnet_tiers": [
+            {"name": "edge", "hosts": 60},
+            {
+                "name": "app",
+                "hosts": 1000,
+                "public": False,
+                "instances": True,
+                "availability_domains": _SPREAD["availability_domains"],
+            },
+            {"name": "data", "prefix_length": 26, "public": False},
+        ],
+    },
+    "low-latency": {
+        "shape": "VM.Standard.E5.Flex",
+        "launch_options": {"profile": "low-latency"},
+    },
+    "autoscaling": {"autoscaling": {"min": 2, "max": 10}},
+    "golden-image-bake": {
+        "provisioning": {"packages": ["nginx"]},
+        "golden_image": "true",
+    },
+    "fleet-10-reserved": {
+        "fleet": {"count": 10, "spread": _SPREAD},
+        "capacity_reservation": {
+            "reservations": [
+                {"availability_domain": "BENCH-AD-1", "count": 4},
+                {"availability_domain": "BENCH-AD-2", "count": 3},
+                {"availability_domain": "BENCH-AD-3", "count": 3},
+            ]
+        },
+    },
+    "security-groups": {
+        "security_groups": {
+            "ssh": [{"port": 22, "source": "0.0.0.0/0"}],
+            "web": [
+                {"port": 443, "source": "0.0.0.0/0"},
+                {"port": 80, "source": "0.0.0.0/0"},
+                {"ports": "8000-8080", "source": "nsg:web"},
+            ],
+        },
+    },
+    "fleet-10-nlb": {
+        "fleet": {"count": 10, "spread": _SPREAD},
+        "load_balancer": {"listeners": [{"port": 443}]},
+    },
+    "placement-fallback": {"placement": _SPREAD},
+    "fleet-10": {"fleet": {"count": 10, "spread": _SPREAD}},
+    "fleet-50": {"fleet": {"count": 50, "spread": _SPREAD}},
+    "fleet-200": {"fleet": {"count": 200, "spread": _SPREAD}},
+    "fleet-500": {"fleet": {"count": 500, "spread": _SPREAD}},
+}
+
+# Faults a scenario always runs with (see mocks.Faults)
+SCENARIO_FAULTS = {
+    "placement-fallback": {
+        "out_of_capacity": [
+            {"availability_domain": "BENCH-AD-1"},
+            {"availability_domain": "BENCH-AD-2", "fault_domain": "FAULT-DOMAIN-1"},
+        ]
+    },
+}
+
+
+def run_one(
+    scenario,
+    invoke_latency,
+    resource_latency,
+    faults,
+    preview,
+    seed=0,
+    trace_memory=False,
+):
+    """Evaluate the program once in this interpreter and return metrics.
+
+    With ``trace_memory`` the evaluation runs under ``tracemalloc`` and the
+    peak traced memory is reported; its timings are not representative.
+    """
+    import tracemalloc
+
+    from inline_program import run_mocked
+    from mocks import OciMocks, install_capacity_probe
+
+    mocks = OciMocks(
+        invoke_latency,
+        resource_latency,
+        faults={**SCENARIO_FAULTS.get(scenario, {}), **faults},
+        seed=seed,
+    )
+    install_capacity_probe(mocks)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        config = {
+            **BASE_CONFIG,
+            "image_cache_path": str(Path(cache_dir) / "images.json"),
+            **SCENARIOS[scenario],
+        }
+        if trace_memory:
+            tracemalloc.start()
+        wall_time = run_mocked(config, mocks, stack=STACK, preview=preview)
+        if trace_memory:
+            _, peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+    result = {
+        "scenario": scenario,
+        "wall_time_s": round(wall_time, 4),
+        "resources_registered": sum(mocks.resources.values()),
+        "resources_by_type": dict(sorted(mocks.resources.items())),
+        "invokes_issued": sum(mocks.invokes.values()),
+        "invokes_by_token": dict(sorted(mocks.invokes.items())),
+        "invokes_throttled": sum(mocks.throttled.values()),
+        "max_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2
+        ),
+        "first_registration_at": mocks.first_registration_at,
+    }
+    if trace_memory:
+        result["peak_traced_memory_mb"] = round(peak_memory / 2**20, 2)
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _compare(previous, results):
+    before = {entry["scenario"]: entry for entry in previous.get("results", [])}
+    for entry in results:
+        old = before.get(entry["scenario"])
+        if not old:
+            continue
+        for metric in (
+            "wall_time_s",
+            "invokes_issued",
+            "max_rss_mb",
+            "peak_traced_memory_mb",
+        ):
+            if old.get(metric) and metric in entry:
+                change = (entry[metric] - old[metric]) / old[metric] * 100
+                print(
+                    f"{entry['scenario']:>14} {metric:<22} "
+                    f"{old[metric]:>10} -> {entry[metric]:<10} ({change:+.1f}%)"
+                )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="Scenario to run (repeatable; default: all)",
+    )
+    parser.add_argument("--invoke-latency-ms", default="20")
+    parser.add_argument("--resource-latency-ms", default="5")
+    parser.add_argument(
+        "--throttle-rate",
+        type=float,
+        default=0.0,
+        help="Probability that an invoke answers 429",
+    )
+    parser.add_argument(
+        "--rate-limit", type=float, help="Invokes per second before answering 429"
+    )
+    parser.add_argument(
+        "--vnic-attach-polls",
+        type=int,
+        default=0,
+        help="Polls that see the primary VNIC still ATTACHING",
+    )
+    parser.add_argument(
+        "--out-of-capacity",
+        action="append",
+        default=[],
+        metavar="AD[/FD]",
+        help="Fail launches in this placement (repeatable)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--preview", action="store_true", help="Evaluate as a preview (dry run)"
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Also measure peak Python memory in a separate tracemalloc run",
+    )
+    parser.add_argument("--out", default="bench-results.json")
+    parser.add_argument("--compare", help="Previous results file to diff against")
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    from mocks import Latency
+
+    for spec in (args.invoke_latency_ms, args.resource_latency_ms):
+        try:
+            Latency.parse(spec)
+        except ValueError as error:
+            parser.error(str(error))
+    faults = {
+        "throttle_rate": args.throttle_rate,
+        "rate_limit": args.rate_limit,
+        "vnic_attach_polls": args.vnic_attach_polls,
+    }
+    if args.out_of_capacity:
+        faults["out_of_capacity"] = [
+            dict(zip(("availability_domain", "fault_domain"), value.split("/", 1)))
+            for value in args.out_of_capacity
+        ]
+
+    if args.run_one:
+        result = run_one(
+            args.run_one,
+            args.invoke_latency_ms,
+            args.resource_latency_ms,
+            faults,
+            args.preview,
+            seed=args.seed,
+            trace_memory=args.trace_memory,
+        )
+        print(json.dumps(result))
+        return
+
+    def run_scenario(scenario, trace_memory=False):
+        # A fresh interpreter per scenario keeps runtime settings, module
+        # caches and memory measurements independent
+        command = [
+            sys.executable,
+            __file__,
+            "--run-one",
+            scenario,
+            "--invoke-latency-ms",
+            str(args.invoke_latency_ms),
+            "--resource-latency-ms",
+            str(args.resource_latency_ms),
+            "--throttle-rate",
+            str(args.throttle_rate),
+            "--vnic-attach-polls",
+            str(args.vnic_attach_polls),
+            "--seed",
+            str(args.seed),
+        ]
+        if args.rate_limit:
+            command += ["--rate-limit", str(args.rate_limit)]
+        for value in args.out_of_capacity:
+            command += ["--out-of-capacity", value]
+        if args.preview:
+            command.append("--preview")
+        if trace_memory:
+            command.append("--trace-memory")
+        completed = subprocess.run(
+            command, cwd=ROOT, capture_output=True, text=True, check=False
+        )
+        if completed.returncode != 0:
+            sys.stderr.write(completed.stderr)
+            raise SystemExit(f"Scenario {scenario} failed")
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+    results = []
+    for scenario in args.scenario or list(SCENARIOS):
+        result = run_scenario(scenario)
+        if args.trace_memory:
+            result["peak_traced_memory_mb"] = run_scenario(scenario, True)[
+                "peak_traced_memory_mb"
+            ]
+        results.append(result)
+        print(
+            f"{scenario:>14}: {result['wall_time_s']:8.3f}s "
+            f"{result['resources_registered']:5d} resources "
+            f"{result['invokes_issued']:5d} invokes "
+            f"{result['invokes_throttled']:4d} throttled "
+            f"{result['max_rss_mb']:8.2f} MB max RSS"
+            + (
+                f" {result['peak_traced_memory_mb']:8.2f} MB traced peak"
+                if args.trace_memory
+                else ""
+            )
+        )
+
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "settings": {
+            "invoke_latency_ms": args.invoke_latency_ms,
+            "resource_latency_ms": args.resource_latency_ms,
+            "faults": faults,
+            "seed": args.seed,
+            "preview": args.preview,
+            "trace_memory": args.trace_memory,
+        },
+        "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+    if args.compare:
+        with open(args.compare) as f:
+            _compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Startup benchmark: import-time profile and time to first registration.
+
+Spawns the offline program benchmark under ``python -X importtime`` and
+reports how long the interpreter took from launch until the first resource
+was registered with the (mocked) engine, together with an import-time
+breakdown by top-level package and the most expensive modules. The run is
+never traced by ``tracemalloc`` (not even through ``PYTHONTRACEMALLOC``),
+which would multiply both figures several times over.
+
+    python benchmarks/startup.py --out startup-results.json
+    python benchmarks/startup.py --runs 5 --scenario fleet-50
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PROGRAM_BENCHMARK = ROOT / "benchmarks" / "program.py"
+
+# "import time: self [us] | cumulative | imported package"
+_IMPORTTIME = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)$")
+
+
+def parse_importtime(stderr):
+    """Return ``(module, self_us, cumulative_us)`` tuples."""
+    entries = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match:
+            self_us, cumulative_us, module = match.groups()
+            entries.append((module, int(self_us), int(cumulative_us)))
+    return entries
+
+
+def summarize_imports(entries, top=20):
+    by_package = defaultdict(int)
+    for module, self_us, _ in entries:
+        by_package[module.split(".")[0]] += self_us
+    packages = sorted(by_package.items(), key=lambda item: -item[1])[:top]
+    modules = sorted(entries, key=lambda entry: -entry[2])[:top]
+    return {
+        "total_import_s": round(sum(entry[1] for entry in entries) / 1e6, 4),
+        "by_package_s": {package: round(us / 1e6, 4) for package, us in packages},
+        "top_modules_cumulative_s": [
+            {"module": module, "cumulative_s": round(cumulative_us / 1e6, 4)}
+            for module, _, cumulative_us in modules
+        ],
+    }
+
+
+def measure(scenario):
+    command = [
+        sys.executable,
+        "-X",
+        "importtime",
+        str(PROGRAM_BENCHMARK),
+        "--run-one",
+        scenario,
+        "--invoke-latency-ms",
+        "0",
+        "--resource-latency-ms",
+        "0",
+    ]
+    env = {
+        name: value for name, value in os.environ.items() if name != "PYTHONTRACEMALLOC"
+    }
+    launched_at = time.time()
+    completed = subprocess.run(
+        command, cwd=ROOT, env=env, capture_output=True, text=True, check=False
+    )
+    if completed.returncode != 0:
+        sys.stderr.write(completed.stderr[-4000:])
+        raise SystemExit(f"Startup run for {scenario} failed")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    return {
+        "time_to_first_registration_s": round(
+            result["first_registration_at"] - launched_at, 4
+        ),
+        "wall_time_s": result["wall_time_s"],
+        **summarize_imports(parse_importtime(completed.stderr)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", default="single")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--out", default="startup-results.json")
+    args = parser.parse_args()
+
+    runs = [measure(args.scenario) for _ in range(args.runs)]
+    first_registration = [run["time_to_first_registration_s"] for run in runs]
+    report = {
+        "scenario": args.scenario,
+        "runs": args.runs,
+        "time_to_first_registration_s": {
+            "median": round(statistics.median(first_registration), 4),
+            "min": min(first_registration),
+            "max": max(first_registration),
+        },
+        # The import profile of the fastest run is the least noisy one
+        "import_profile": min(runs, key=lambda run: run["total_import_s"]),
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+    profile = report["import_profile"]
+    print(
+        f"time to first registration: "
+        f"{report['time_to_first_registration_s']['median']:.3f}s "
+        f"(median of {args.runs})"
+    )
+    print(f"total import time: {profile['total_import_s']:.3f}s")
+    for package, seconds in profile["by_package_s"].items():
+        print(f"  {package:<30} {seconds:8.4f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Boot-time measurement: from instance creation to cloud-init completion.
+
+With ``boot_timing`` enabled, cloud-init installs a oneshot unit ordered
+after ``cloud-final.service`` that writes ``/var/lib/ronzz/boot-timing.json``
+(and optionally POSTs it to ``boot_timing_url``). Running this module
+compares that timestamp with the instance's ``time_created`` stack output:
+
+    python boot_timing.py --stack dev --user ubuntu
+"""
+
+import argparse
+import json
+import re
+import shlex
+import subprocess
+import sys
+from datetime import datetime
+
+TIMING_FILE = "/var/lib/ronzz/boot-timing.json"
+
+_TIMING_SCRIPT = """#!/bin/sh
+# Records when cloud-init finished so boot time can be measured per tier
+set -eu
+mkdir -p /var/lib/ronzz
+instance_id=$(curl -fsS -m 5 -H "Authorization: Bearer Oracle" \\
+    http://169.254.169.254/opc/v2/instance/id || echo unknown)
+btime=$(awk '/^btime/ {{print $2}}' /proc/stat)
+uptime=$(cut -d' ' -f1 /proc/uptime)
+printf '{{"instance_id": "%s", "boot_at": %s, '\\
+'"cloud_init_done_at": %s, "uptime_at_done_s": %s}}\\n' \\
+    "$instance_id" "$btime" "$(date +%s)" "$uptime" > {timing_file}
+{report}exit 0
+"""
+
+_TIMING_SERVICE = """[Unit]
+Description=Record ronzz boot timing
+After=cloud-final.service
+ConditionPathExists=!{timing_file}
+
+[Service]
+Type=oneshot
+ExecStart=/usr/local/sbin/ronzz-boot-timing.sh
+
+[Install]
+WantedBy=multi-user.target
+"""
+
+
+def cloud_init_part(report_url=None):
+    """Return the cloud-config part recording cloud-init completion time."""
+    report = ""
+    if report_url:
+        report = (
+            "curl -fsS -m 10 -H 'Content-Type: application/json' "
+            f"--data @{TIMING_FILE} {shlex.quote(report_url)} || true\n"
+        )
+    return {
+        "write_files": [
+            {
+                "path": "/usr/local/sbin/ronzz-boot-timing.sh",
+                "permissions": "0755",
+                "content": _TIMING_SCRIPT.format(
+                    timing_file=TIMING_FILE, report=report
+                ),
+            },
+            {
+                "path": "/etc/systemd/system/ronzz-boot-timing.service",
+                "permissions": "0644",
+                "content": _TIMING_SERVICE.format(timing_file=TIMING_FILE),
+            },
+        ],
+        "runcmd": [
+            ["systemctl", "daemon-reload"],
+            ["systemctl", "enable", "ronzz-boot-timing.service"],
+            # Queued behind cloud-final.service, so this does not block it
+            ["systemctl", "start", "--no-block", "ronzz-boot-timing.service"],
+        ],
+    }
+
+
+# The provider reports times as e.g. "2024-05-01 12:34:56.7 +0000 UTC"
+_PROVIDER_TIME = re.compile(
+    r"^(\d{4}-\d\d-\d\d)[ T](\d\d:\d\d:\d\d)(?:\.(\d+))? ?([+-]\d{4}|Z)(?: UTC)?$"
+)
+
+
+def parse_time(value):
+    """Return a POSIX timestamp for a provider or RFC 3339 time string."""
+    match = _PROVIDER_TIME.match(value)
+    if not match:
+        return datetime.fromisoformat(value).timestamp()
+    date, clock, fraction, offset = match.groups()
+    fraction = (fraction or "0")[:6].ljust(6, "0")
+    offset = "+0000" if offset == "Z" else offset
+    return datetime.strptime(
+        f"{date} {clock}.{fraction} {offset}", "%Y-%m-%d %H:%M:%S.%f %z"
+    ).timestamp()
+
+
+def _stack_outputs(stack):
+    command = ["pulumi", "stack", "output", "--json"]
+    if stack:
+        command += ["--stack", stack]
+    return json.loads(
+        subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    )
+
+
+def _hosts(outputs):
+    if "nodes" in outputs:
+        return {
+            name: (node["public_ip"], node["time_created"])
+            for name, node in outputs["nodes"].items()
+        }
+    return {
+        outputs["instance_name"]: (
+            outputs["public_ip"],
+            outputs["instance_time_created"],
+        )
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stack")
+    parser.add_argument("--user", default="ubuntu")
+    parser.add_argument("--identity", help="SSH private key file")
+    args = parser.parse_args()
+
+    outputs = _stack_outputs(args.stack)
+    results = {}
+    for name, (address, time_created) in sorted(_hosts(outputs).items()):
+        ssh = ["ssh", "-o", "BatchMode=yes", "-o", "StrictHostKeyChecking=accept-new"]
+        if args.identity:
+            ssh += ["-i", args.identity]
+        completed = subprocess.run(
+            [*ssh, f"{args.user}@{address}", "cat", TIMING_FILE],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if completed.returncode != 0:
+            print(f"{name}: timing not available yet", file=sys.stderr)
+            continue
+        timing = json.loads(completed.stdout)
+        created_at = parse_time(time_created)
+        results[name] = {
+            "created_to_boot_s": round(timing["boot_at"] - created_at, 1),
+            "boot_to_cloud_init_done_s": round(
+                timing["cloud_init_done_at"] - timing["boot_at"], 1
+            ),
+            "created_to_cloud_init_done_s": round(
+                timing["cloud_init_done_at"] - created_at, 1
+            ),
+        }
+
+    print(
+        json.dumps(
+            {
+                "boot_volume_vpus_per_gb": outputs.get("boot_volume_vpus_per_gb"),
+                "boot_volume_size_in_gbs": outputs.get("boot_volume_size_in_gbs"),
+                "instances": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
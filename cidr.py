@@ -0,0 +1,251 @@
+"""Subnet CIDR allocation for tiered, per-AD networks.
+
+Pure functions: a list of tiers with size requirements is carved into
+non-overlapping subnets of the VCN CIDR. Earlier assignments (pins from
+config or the subnets that already exist in the VCN) are kept whenever the
+subnet is still requested with the same size, together with the subnet's DNS
+label, so adding, removing or reordering tiers never moves or renames an
+existing subnet. New subnets are placed
+largest first in the lowest free aligned block, which keeps the result
+deterministic for the same inputs.
+"""
+
+import ipaddress
+import math
+import re
+from typing import NamedTuple
+
+# OCI reserves the first two and the last address of every subnet
+RESERVED_ADDRESSES = 3
+MIN_PREFIX_LENGTH = 16
+MAX_PREFIX_LENGTH = 30
+DNS_LABEL_LENGTH = 15
+# Oracle allocates a /56 to an IPv6-enabled VCN; subnets get a /64 each
+IPV6_SLOTS = 256
+
+
+class Tier(NamedTuple):
+    name: str
+    prefix_length: int
+    public: bool
+    availability_domains: tuple
+    ipv6: bool
+    instances: bool
+
+
+class SubnetPlan(NamedTuple):
+    name: str
+    tier: str
+    cidr_block: str
+    dns_label: str
+    availability_domain: str | None
+    public: bool
+    ipv6_index: int | None
+    instances: bool
+
+
+def default_subnets(vcn_cidr):
+    """Return the ``(public, private)`` CIDRs used without ``subnet_tiers``.
+
+    They are the second and third /24 of the VCN (10.0.1.0/24 and
+    10.0.2.0/24 in 10.0.0.0/16), or the second and third quarter of a VCN
+    smaller than /22.
+    """
+    vcn = ipaddress.ip_network(vcn_cidr)
+    if not MIN_PREFIX_LENGTH <= vcn.prefixlen <= MAX_PREFIX_LENGTH - 2:
+        raise ValueError(
+            f"vcn_cidr must be a /{MIN_PREFIX_LENGTH} to /{MAX_PREFIX_LENGTH - 2}, "
+            f"got {vcn_cidr}"
+        )
+    blocks = vcn.subnets(new_prefix=max(24, vcn.prefixlen + 2))
+    next(blocks)
+    return str(next(blocks)), str(next(blocks))
+
+
+def prefix_for_hosts(hosts):
+    """Return the longest prefix length with room for ``hosts`` addresses."""
+    if hosts < 1:
+        raise ValueError("subnet tiers need at least 1 host")
+    bits = math.ceil(math.log2(hosts + RESERVED_ADDRESSES))
+    return min(32 - bits, MAX_PREFIX_LENGTH)
+
+
+def parse_tiers(settings):
+    """Validate the ``subnet_tiers`` config list.
+
+    Each entry has a ``name``, a size as ``hosts`` or ``prefix_length`` and
+    optional ``public`` (default true), ``availability_domains`` (one
+    AD-specific subnet each; default one regional subnet), ``ipv6`` and
+    ``instances`` (the tier the instances launch in).
+    """
+    tiers = []
+    for entry in settings:
+        name = entry.get("name")
+        if not name or not re.fullmatch(r"[a-z][a-z0-9-]*", name):
+            raise ValueError(
+                f"subnet tier name {name!r} must be lowercase letters, digits "
+                "and hyphens, starting with a letter"
+            )
+        if "prefix_length" in entry:
+            prefix_length = int(entry["prefix_length"])
+        elif "hosts" in entry:
+            prefix_length = prefix_for_hosts(int(entry["hosts"]))
+        else:
+            raise ValueError(f"subnet tier {name} needs hosts or prefix_length")
+        if not MIN_PREFIX_LENGTH <= prefix_length <= MAX_PREFIX_LENGTH:
+            raise ValueError(
+                f"subnet tier {name}: prefix_length must be between "
+                f"{MIN_PREFIX_LENGTH} and {MAX_PREFIX_LENGTH}"
+            )
+        tiers.append(
+            Tier(
+                name,
+                prefix_length,
+                bool(entry.get("public", True)),
+                tuple(entry.get("availability_domains") or ()),
+                bool(entry.get("ipv6", False)),
+                bool(entry.get("instances", False)),
+            )
+        )
+    names = [tier.name for tier in tiers]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate subnet tiers: {', '.join(duplicates)}")
+    if sum(tier.instances for tier in tiers) > 1:
+        raise ValueError("Only one subnet tier can set instances")
+    return tiers
+
+
+def subnet_name(tier, availability_domain=None):
+    """``web`` or, per AD, ``web-phx-ad-1`` for ``Uocm:PHX-AD-1``."""
+    if availability_domain is None:
+        return tier
+    return f"{tier}-{availability_domain.rsplit(':', 1)[-1].lower()}"
+
+
+def dns_labels(names, previous=None):
+    """Return unique DNS labels (alphanumeric, <= 15 chars) for ``names``.
+
+    ``previous`` maps names to the labels they already have; those are kept,
+    since changing a subnet's DNS label replaces the subnet, and new names
+    only get labels that are not taken.
+    """
+    labels = {}
+    for name in sorted(names):
+        label = (previous or {}).get(name)
+        if label and label not in labels.values():
+            labels[name] = label
+    used = set(labels.values())
+    # Sorted, so reordering tiers never changes a label
+    for name in sorted(set(names) - set(labels)):
+        base = re.sub(r"[^a-z0-9]", "", name.lower())[:DNS_LABEL_LENGTH]
+        label = base
+        counter = 1
+        while label in used:
+            suffix = str(counter)
+            label = base[: DNS_LABEL_LENGTH - len(suffix)] + suffix
+            counter += 1
+        used.add(label)
+        labels[name] = label
+    return labels
+
+
+def _ipv6_index(vcn, subnet):
+    # The VCN is cut into IPV6_SLOTS equal slots and each subnet takes the
+    # /64 of the slot it starts in, so the index follows its IPv4 block
+    slot_bits = max(vcn.max_prefixlen - vcn.prefixlen - int(math.log2(IPV6_SLOTS)), 0)
+    return (int(subnet.network_address) - int(vcn.network_address)) >> slot_bits
+
+
+def allocate(vcn_cidr, tiers, previous=None, labels=None):
+    """Assign a CIDR to every subnet of ``tiers``; returns ``SubnetPlan``s.
+
+    ``previous`` maps subnet names to CIDRs assigned on earlier runs; they
+    are kept when still inside the VCN, of the requested size and not
+    overlapping another kept subnet. ``labels`` maps subnet names to their
+    current DNS labels, which are kept along with the CIDR. Raises
+    ValueError when the VCN is full.
+    """
+    vcn = ipaddress.ip_network(vcn_cidr)
+    if not MIN_PREFIX_LENGTH <= vcn.prefixlen <= MAX_PREFIX_LENGTH:
+        raise ValueError(
+            f"vcn_cidr must be a /{MIN_PREFIX_LENGTH} to /{MAX_PREFIX_LENGTH}, "
+            f"got {vcn_cidr}"
+        )
+    previous = previous or {}
+    requests = [
+        (subnet_name(tier.name, availability_domain), tier, availability_domain)
+        for tier in tiers
+        for availability_domain in tier.availability_domains or (None,)
+    ]
+
+    assigned = {}
+    for name, tier, _ in sorted(requests, key=lambda request: request[0]):
+        if name not in previous:
+            continue
+        block = ipaddress.ip_network(previous[name])
+        if (
+            block.prefixlen == tier.prefix_length
+            and block.subnet_of(vcn)
+            and not any(block.overlaps(other) for other in assigned.values())
+        ):
+            assigned[name] = block
+    kept = set(assigned)
+
+    for name, tier, _ in sorted(
+        requests, key=lambda request: (request[1].prefix_length, request[0])
+    ):
+        if name in assigned:
+            continue
+        if tier.prefix_length < vcn.prefixlen:
+            raise ValueError(
+                f"Subnet {name} (/{tier.prefix_length}) is larger than the VCN "
+                f"{vcn_cidr}"
+            )
+        for block in vcn.subnets(new_prefix=tier.prefix_length):
+            if not any(block.overlaps(other) for other in assigned.values()):
+                assigned[name] = block
+                break
+        else:
+            raise ValueError(
+                f"No free /{tier.prefix_length} left in {vcn_cidr} for subnet {name}"
+            )
+
+    # A subnet that moves is replaced anyway; it gets a fresh label so the
+    # replacement does not collide with the subnet it replaces
+    labels = dns_labels(
+        [name for name, _, _ in requests],
+        {name: label for name, label in (labels or {}).items() if name in kept},
+    )
+    slot_prefix = vcn.prefixlen + int(math.log2(IPV6_SLOTS))
+    plans = []
+    for name, tier, availability_domain in requests:
+        block = assigned[name]
+        if tier.ipv6 and block.prefixlen > slot_prefix:
+            raise ValueError(
+                f"IPv6 subnet {name} needs at least a /{slot_prefix} in "
+                f"{vcn_cidr} to get its own /64"
+            )
+        plans.append(
+            SubnetPlan(
+                name,
+                tier.name,
+                str(block),
+                labels[name],
+                availability_domain,
+                tier.public,
+                _ipv6_index(vcn, block) if tier.ipv6 else None,
+                tier.instances,
+            )
+        )
+    return plans
+
+
+def ipv6_cidr(vcn_ipv6_cidr, index):
+    """Return the ``index``-th /64 of the VCN's IPv6 prefix."""
+    prefix = ipaddress.ip_network(vcn_ipv6_cidr)
+    if not 0 <= index < 2 ** (64 - prefix.prefixlen):
+        raise ValueError(f"{vcn_ipv6_cidr} has no /64 number {index}")
+    return str(
+        ipaddress.ip_network((int(prefix.network_address) + (index << 64), 64))
+    )
@@ -0,0 +1,277 @@
+"""Cloud-init rendering for instance ``user_data``.
+
+Documents are assembled from parts (plain dicts with ``write_files``,
+``runcmd`` and similar cloud-config keys), merged in order and rendered to a
+deterministic ``#cloud-config`` YAML document whose SHA-256 content hash is
+recorded in its header.
+
+Rendered tuning profiles are kept as golden snapshots under
+``cloud-init/golden`` so profile changes show up in review:
+
+    python cloud_init.py --update-golden   # rewrite the snapshots
+    python cloud_init.py --check-golden    # exit 1 if a snapshot is stale
+"""
+
+import base64
+import hashlib
+import json
+import re
+import sys
+from pathlib import Path
+
+GOLDEN_DIR = Path(__file__).resolve().parent / "cloud-init" / "golden"
+
+# Performance tuning profiles applied at first boot
+PROFILES = {
+    "throughput": {
+        "sysctl": {
+            "net.core.netdev_max_backlog": 250000,
+            "net.core.rmem_max": 134217728,
+            "net.core.somaxconn": 65535,
+            "net.core.wmem_max": 134217728,
+            "net.ipv4.tcp_congestion_control": "bbr",
+            "net.ipv4.tcp_mtu_probing": 1,
+            "net.ipv4.tcp_rmem": "4096 87380 134217728",
+            "net.ipv4.tcp_wmem": "4096 65536 134217728",
+            "vm.dirty_background_ratio": 5,
+            "vm.dirty_ratio": 20,
+        },
+        "transparent_hugepages": "always",
+        "cpu_governor": "performance",
+        "io_scheduler": "mq-deadline",
+        "nofile": 1048576,
+    },
+    "low-latency": {
+        "sysctl": {
+            "kernel.sched_autogroup_enabled": 0,
+            "net.core.busy_poll": 50,
+            "net.core.busy_read": 50,
+            "net.ipv4.tcp_fastopen": 3,
+            "net.ipv4.tcp_low_latency": 1,
+            "net.ipv4.tcp_slow_start_after_idle": 0,
+            "vm.stat_interval": 10,
+            "vm.swappiness": 1,
+        },
+        "transparent_hugepages": "never",
+        "cpu_governor": "performance",
+        "io_scheduler": "none",
+        "nofile": 1048576,
+    },
+    "memory-heavy": {
+        "sysctl": {
+            "vm.max_map_count": 1048576,
+            "vm.nr_hugepages": 1024,
+            "vm.overcommit_memory": 1,
+            "vm.swappiness": 10,
+            "vm.vfs_cache_pressure": 50,
+            "vm.zone_reclaim_mode": 0,
+        },
+        "transparent_hugepages": "madvise",
+        "cpu_governor": "schedutil",
+        "io_scheduler": "mq-deadline",
+        "nofile": 524288,
+    },
+}
+
+_TUNING_SCRIPT = """#!/bin/sh
+# Applied at every boot by ronzz-tuning.service
+set -u
+if [ -w /sys/kernel/mm/transparent_hugepage/enabled ]; then
+    echo {thp} > /sys/kernel/mm/transparent_hugepage/enabled
+fi
+for governor in /sys/devices/system/cpu/cpu*/cpufreq/scaling_governor; do
+    # Most VM shapes expose no cpufreq driver; skip quietly
+    [ -w "$governor" ] && echo {governor} > "$governor"
+done
+exit 0
+"""
+
+_TUNING_SERVICE = """[Unit]
+Description=ronzz performance tuning ({profile})
+After=sysinit.target
+
+[Service]
+Type=oneshot
+ExecStart=/usr/local/sbin/ronzz-tuning.sh
+RemainAfterExit=yes
+
+[Install]
+WantedBy=multi-user.target
+"""
+
+
+def tuning_part(profile_name):
+    """Return the cloud-config part applying a named tuning profile."""
+    try:
+        profile = PROFILES[profile_name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown tuning_profile {profile_name!r}; "
+            f"expected one of: {', '.join(sorted(PROFILES))}"
+        ) from None
+
+    sysctl = "".join(
+        f"{key} = {value}\n" for key, value in sorted(profile["sysctl"].items())
+    )
+    nofile = profile["nofile"]
+    return {
+        "write_files": [
+            {
+                "path": "/etc/sysctl.d/90-ronzz-tuning.conf",
+                "permissions": "0644",
+                "content": f"# ronzz tuning profile: {profile_name}\n{sysctl}",
+            },
+            {
+                "path": "/etc/security/limits.d/90-ronzz-nofile.conf",
+                "permissions": "0644",
+                "content": f"* soft nofile {nofile}\n* hard nofile {nofile}\n"
+                f"root soft nofile {nofile}\nroot hard nofile {nofile}\n",
+            },
+            {
+                "path": "/etc/systemd/system.conf.d/90-ronzz-limits.conf",
+                "permissions": "0644",
+                "content": f"[Manager]\nDefaultLimitNOFILE={nofile}\n",
+            },
+            {
+                "path": "/etc/udev/rules.d/60-ronzz-io-scheduler.rules",
+                "permissions": "0644",
+                "content": 'ACTION=="add|change", '
+                'KERNEL=="sd[a-z]*|vd[a-z]*|nvme[0-9]*n[0-9]*", '
+                f'ATTR{{queue/scheduler}}="{profile["io_scheduler"]}"\n',
+            },
+            {
+                "path": "/usr/local/sbin/ronzz-tuning.sh",
+                "permissions": "0755",
+                "content": _TUNING_SCRIPT.format(
+                    thp=profile["transparent_hugepages"],
+                    governor=profile["cpu_governor"],
+                ),
+            },
+            {
+                "path": "/etc/systemd/system/ronzz-tuning.service",
+                "permissions": "0644",
+                "content": _TUNING_SERVICE.format(profile=profile_name),
+            },
+        ],
+        "runcmd": [
+            ["sysctl", "--system"],
+            ["systemctl", "daemon-reload"],
+            ["systemctl", "enable", "--now", "ronzz-tuning.service"],
+            ["udevadm", "control", "--reload-rules"],
+            ["udevadm", "trigger", "--subsystem-match=block"],
+        ],
+    }
+
+
+def merge_parts(*parts):
+    """Merge cloud-config parts; list values are concatenated in order."""
+    document = {}
+    for part in parts:
+        for key, value in part.items():
+            if isinstance(value, list):
+                document.setdefault(key, []).extend(value)
+            elif isinstance(value, dict):
+                document.setdefault(key, {}).update(value)
+            else:
+                document[key] = value
+    return document
+
+
+_PLAIN_KEY = re.compile(r"^[A-Za-z_][A-Za-z0-9_-]*$")
+
+
+def _scalar(value):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return str(value)
+    # JSON strings are valid YAML double-quoted scalars
+    return json.dumps(value)
+
+
+def _emit(value, indent):
+    pad = " " * indent
+    lines = []
+    if isinstance(value, dict):
+        for key in value:
+            item = value[key]
+            label = key if _PLAIN_KEY.match(key) else json.dumps(key)
+            if isinstance(item, (dict, list)) and item:
+                lines.append(f"{pad}{label}:")
+                lines.extend(_emit(item, indent + 2))
+            elif isinstance(item, str) and "\n" in item:
+                # Literal block; "|-" strips the final newline when absent
+                chomp = "" if item.endswith("\n") else "-"
+                lines.append(f"{pad}{label}: |{chomp}")
+                lines.extend(
+                    f"{pad}  {line}" if line else "" for line in item.splitlines()
+                )
+            else:
+                lines.append(f"{pad}{label}: {_inline(item)}")
+    else:
+        for item in value:
+            nested = _emit(item, indent + 2) if isinstance(item, dict) else None
+            if nested:
+                # Put the first key on the dash line
+                lines.append(f"{pad}- {nested[0].lstrip()}")
+                lines.extend(nested[1:])
+            else:
+                lines.append(f"{pad}- {_inline(item)}")
+    return lines
+
+
+def _inline(value):
+    if isinstance(value, list):
+        return "[" + ", ".join(_inline(item) for item in value) + "]"
+    if isinstance(value, dict):
+        return "{" + ", ".join(
+            f"{json.dumps(key)}: {_inline(item)}" for key, item in value.items()
+        ) + "}"
+    return _scalar(value)
+
+
+def content_hash(body):
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def render(document):
+    """Render a cloud-config document; returns ``(text, sha256)``.
+
+    Output depends only on the document's content: keys keep their merge
+    order and no timestamps or random values are emitted.
+    """
+    body = "\n".join(_emit(document, 0)) + "\n"
+    digest = content_hash(body)
+    return f"#cloud-config\n# content-hash: sha256:{digest}\n{body}", digest
+
+
+def user_data(text):
+    """Encode rendered cloud-config for the instance ``user_data`` metadata."""
+    return base64.b64encode(text.encode()).decode()
+
+
+def _golden_documents():
+    return {name: merge_parts(tuning_part(name)) for name in sorted(PROFILES)}
+
+
+def main(argv):
+    if argv not in (["--update-golden"], ["--check-golden"]):
+        print(__doc__, file=sys.stderr)
+        return 2
+    stale = []
+    for name, document in _golden_documents().items():
+        text, _ = render(document)
+        path = GOLDEN_DIR / f"{name}.yaml"
+        if argv[0] == "--update-golden":
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text)
+        elif not path.exists() or path.read_text() != text:
+            stale.append(path.name)
+    if stale:
+        print(f"Stale golden snapshots: {', '.join(stale)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,246 @@
+"""Critical path of a deployment from Automation API step events.
+
+Runs ``pulumi up`` (or a preview) for a stack with ``__main__.py`` as the
+inline program and records when the engine started and finished each
+resource step through ``on_event``. The dependency DAG is then read from the
+exported state. For every resource the report gives:
+
+- work: step start to step finish (time spent in the provider/cloud API)
+- wait: from the moment its last dependency finished to its step start
+  (program-side awaits such as invokes and polling, or engine scheduling)
+
+The critical path is the dependency chain ending at the last resource to
+finish; shortening any resource off that chain does not shorten the run.
+
+    python critical_path.py --stack dev --out critical-path.json
+    python critical_path.py --stack dev --events events.jsonl   # keep raw events
+    python critical_path.py --replay events.jsonl --state state.json
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from inline_program import PROJECT, program, workspace_options
+
+
+class Step:
+    """Timing of one resource step (seconds since the run started)."""
+
+    def __init__(self, urn, type_, op):
+        self.urn = urn
+        self.type = type_
+        self.op = op
+        self.start = None
+        self.finish = None
+        self.failed = False
+
+
+def record_event(steps, event, now):
+    """Update ``steps`` from one engine event dict received at ``now``."""
+    for key, finished in (
+        ("resourcePreEvent", False),
+        ("resOutputsEvent", True),
+        ("resOpFailedEvent", True),
+    ):
+        payload = event.get(key)
+        if not payload:
+            continue
+        metadata = payload["metadata"]
+        step = steps.get(metadata["urn"])
+        if step is None:
+            step = steps[metadata["urn"]] = Step(
+                metadata["urn"], metadata.get("type"), metadata.get("op")
+            )
+        if finished:
+            step.finish = now
+            step.failed = key == "resOpFailedEvent"
+        else:
+            step.start = now
+
+
+def dependencies_from_state(deployment):
+    """Return ``{urn: set(dependency urns)}`` from an exported deployment."""
+    return {
+        resource["urn"]: set(resource.get("dependencies") or [])
+        for resource in deployment.get("resources") or []
+    }
+
+
+def analyze(steps, dependencies):
+    """Compute wait/work per resource and the critical path."""
+    timed = {
+        urn: step
+        for urn, step in steps.items()
+        if step.start is not None and step.finish is not None
+    }
+    resources = {}
+    for urn, step in timed.items():
+        finished_dependencies = [
+            timed[dependency].finish
+            for dependency in dependencies.get(urn, ())
+            if dependency in timed
+        ]
+        ready = max(finished_dependencies, default=0.0)
+        resources[urn] = {
+            "type": step.type,
+            "op": step.op,
+            "failed": step.failed,
+            "start_s": round(step.start, 3),
+            "finish_s": round(step.finish, 3),
+            "work_s": round(step.finish - step.start, 3),
+            "wait_s": round(max(step.start - ready, 0.0), 3),
+        }
+
+    # Walk back from the last resource to finish through the dependency that
+    # finished last, i.e. the one that gated each step
+    path = []
+    current = max(timed, key=lambda urn: timed[urn].finish, default=None)
+    while current is not None:
+        path.append(current)
+        gating = [
+            dependency
+            for dependency in dependencies.get(current, ())
+            if dependency in timed
+        ]
+        current = max(gating, key=lambda urn: timed[urn].finish, default=None)
+    path.reverse()
+
+    return {
+        "total_s": round(
+            max((step.finish for step in timed.values()), default=0.0), 3
+        ),
+        "critical_path": [{"urn": urn, **resources[urn]} for urn in path],
+        "critical_path_work_s": round(sum(resources[urn]["work_s"] for urn in path), 3),
+        "critical_path_wait_s": round(sum(resources[urn]["wait_s"] for urn in path), 3),
+        "resources": resources,
+    }
+
+
+def _name(urn):
+    return urn.rsplit("::", 1)[-1]
+
+
+def print_report(report, top=10):
+    print(f"Total: {report['total_s']:.1f}s")
+    print(
+        f"Critical path: {len(report['critical_path'])} steps, "
+        f"{report['critical_path_work_s']:.1f}s work, "
+        f"{report['critical_path_wait_s']:.1f}s wait"
+    )
+    for entry in report["critical_path"]:
+        print(
+            f"  {entry['start_s']:8.1f}s  wait {entry['wait_s']:6.1f}s  "
+            f"work {entry['work_s']:6.1f}s  {entry['op']:<8} {_name(entry['urn'])}"
+        )
+    for metric in ("wait_s", "work_s"):
+        print(f"\nTop {top} by {metric.removesuffix('_s')}:")
+        ranked = sorted(
+            report["resources"].items(), key=lambda item: -item[1][metric]
+        )[:top]
+        for urn, entry in ranked:
+            print(f"  {entry[metric]:6.1f}s  {_name(urn)}")
+
+
+def run(stack_name, action, backend, events_path=None):
+    """Run ``action`` on the stack; returns ``(steps, deployment)``."""
+    from pulumi import automation as auto
+
+    stack = auto.create_or_select_stack(
+        stack_name=stack_name,
+        project_name=PROJECT,
+        program=program,
+        opts=workspace_options(backend),
+    )
+    steps = {}
+    events_file = open(events_path, "w") if events_path else None
+    start = time.perf_counter()
+
+    def on_event(event):
+        now = time.perf_counter() - start
+        raw = _event_dict(event)
+        record_event(steps, raw, now)
+        if events_file:
+            events_file.write(json.dumps({"received_s": now, "event": raw}) + "\n")
+
+    try:
+        if action == "preview":
+            stack.preview(on_event=on_event, on_output=lambda line: None)
+        else:
+            stack.up(on_event=on_event, on_output=lambda line: None)
+    finally:
+        if events_file:
+            events_file.close()
+    return steps, stack.export_stack().deployment
+
+
+def _event_dict(event):
+    # Keep only the fields the analysis needs, in the engine's JSON shape
+    raw = {}
+    for key, attribute in (
+        ("resourcePreEvent", "resource_pre_event"),
+        ("resOutputsEvent", "res_outputs_event"),
+        ("resOpFailedEvent", "res_op_failed_event"),
+    ):
+        payload = getattr(event, attribute, None)
+        if payload is not None:
+            metadata = payload.metadata
+            raw[key] = {
+                "metadata": {
+                    "urn": metadata.urn,
+                    "type": metadata.type,
+                    "op": str(getattr(metadata.op, "value", metadata.op)),
+                }
+            }
+    return raw
+
+
+def replay(events_path):
+    steps = {}
+    with open(events_path) as f:
+        for line in f:
+            entry = json.loads(line)
+            record_event(steps, entry["event"], entry["received_s"])
+    return steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stack")
+    parser.add_argument("--action", choices=("up", "preview"), default="up")
+    parser.add_argument("--backend", help="State backend URL, e.g. file://~/.pulumi")
+    parser.add_argument("--events", help="Also write the raw step events (JSON lines)")
+    parser.add_argument("--replay", help="Analyze a recorded events file instead")
+    parser.add_argument(
+        "--state", help="Exported state (pulumi stack export) for --replay"
+    )
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--out", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    if args.replay:
+        if not args.state:
+            parser.error("--replay needs --state")
+        steps = replay(args.replay)
+        with open(args.state) as f:
+            state = json.load(f)
+        deployment = state.get("deployment", state)
+    elif args.stack:
+        steps, deployment = run(args.stack, args.action, args.backend, args.events)
+    else:
+        parser.error("give --stack or --replay")
+
+    report = analyze(steps, dependencies_from_state(deployment))
+    if not report["resources"]:
+        print("No resource steps were recorded", file=sys.stderr)
+        sys.exit(1)
+    print_report(report, top=args.top)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Expansion of the ``fleet`` config block into per-node launch specs."""
+
+from dataclasses import dataclass, field
+
+# Keys a per-node entry under ``fleet.nodes`` may override
+NODE_OVERRIDE_KEYS = {"availability_domain", "fault_domain", "image_id", "metadata"}
+
+
+@dataclass
+class NodeSpec:
+    """Launch parameters for a single compute instance."""
+
+    name: str
+    availability_domain: str
+    fault_domain: str | None = None
+    image_id: str | None = None
+    metadata: dict = field(default_factory=dict)
+    vnic_name: str | None = None
+
+
+def plan_fleet(fleet, default_availability_domain, placements=None, pinned=None):
+    """Return the list of ``NodeSpec`` described by a ``fleet`` config object.
+
+    Nodes are named ``<name_prefix>-<index>`` and spread round-robin across
+    ``spread.availability_domains`` first, then ``spread.fault_domains``
+    within each availability domain. When ``placements`` (a list of
+    ``(availability_domain, fault_domain)`` pairs, e.g. from the capacity
+    scheduler) is given, nodes are spread round-robin over it instead.
+    Nodes named in ``pinned`` (``{name: (availability_domain, fault_domain)}``,
+    e.g. instances that already exist) keep that placement. Entries under
+    ``nodes`` override the computed values for the node with the matching
+    name.
+    """
+    count = int(fleet.get("count", 1))
+    if count < 1:
+        raise ValueError("fleet.count must be at least 1")
+    prefix = fleet.get("name_prefix", "ronzz-worker")
+    spread = fleet.get("spread") or {}
+    availability_domains = spread.get("availability_domains") or [
+        default_availability_domain
+    ]
+    fault_domains = spread.get("fault_domains") or [None]
+    overrides = fleet.get("nodes") or {}
+    pinned = pinned or {}
+
+    names = [f"{prefix}-{index}" for index in range(count)]
+    unknown_nodes = set(overrides) - set(names)
+    if unknown_nodes:
+        raise ValueError(
+            f"fleet.nodes references unknown nodes: {', '.join(sorted(unknown_nodes))}"
+        )
+
+    if placements:
+        slots = list(placements)
+    else:
+        width = len(availability_domains)
+        slots = [
+            (
+                availability_domains[index % width],
+                fault_domains[(index // width) % len(fault_domains)],
+            )
+            for index in range(width * len(fault_domains))
+        ]
+
+    nodes = []
+    for index, name in enumerate(names):
+        node_overrides = overrides.get(name) or {}
+        unknown_keys = set(node_overrides) - NODE_OVERRIDE_KEYS
+        if unknown_keys:
+            raise ValueError(
+                f"fleet.nodes.{name} has unsupported keys: "
+                f"{', '.join(sorted(unknown_keys))}"
+            )
+        slot_availability_domain, slot_fault_domain = pinned.get(
+            name, slots[index % len(slots)]
+        )
+        nodes.append(
+            NodeSpec(
+                name=name,
+                availability_domain=node_overrides.get(
+                    "availability_domain", slot_availability_domain
+                ),
+                fault_domain=node_overrides.get("fault_domain", slot_fault_domain),
+                image_id=node_overrides.get("image_id"),
+                metadata=dict(node_overrides.get("metadata") or {}),
+                vnic_name=f"{name}-vnic",
+            )
+        )
+    return nodes
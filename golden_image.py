@@ -0,0 +1,155 @@
+"""Golden images baked from the provisioning payload.
+
+The payload (``provisioning`` packages and commands) is rendered as
+cloud-config and hashed together with the base image OCID. When an image
+named ``ronzz-golden-<hash>`` carrying that hash as a freeform tag already
+exists it is reused. Otherwise a builder instance boots the base image,
+applies the payload, cleans cloud-init state and powers off; once it is
+STOPPED an ``oci.core.Image`` is captured from it. Images are kept when they
+leave the program, so the builder is removed on the next run while the
+image stays available.
+"""
+
+import asyncio
+import hashlib
+import time
+
+import pulumi
+import pulumi_oci as oci
+
+from launch_options import instance_launch_options
+
+HASH_TAG = "ronzz-payload-hash"
+
+
+def provisioning_part(settings):
+    """Return the cloud-config part for a ``provisioning`` config object."""
+    part = {}
+    if settings.get("packages"):
+        part["package_update"] = True
+        part["package_upgrade"] = bool(settings.get("package_upgrade", False))
+        part["packages"] = list(settings["packages"])
+    if settings.get("runcmd"):
+        part["runcmd"] = list(settings["runcmd"])
+    if not part:
+        raise ValueError("provisioning needs packages or runcmd")
+    return part
+
+
+def builder_part():
+    """Return the cloud-config part that prepares the builder for capture."""
+    return {
+        # Instances launched from the image run cloud-init from scratch
+        "runcmd": [["cloud-init", "clean", "--logs", "--machine-id"]],
+        "power_state": {"mode": "poweroff", "condition": True, "delay": "now"},
+    }
+
+
+def payload_hash(payload_text, base_image_id):
+    """Hash the rendered payload together with the image it is applied to."""
+    digest = hashlib.sha256()
+    digest.update(base_image_id.encode())
+    digest.update(b"\0")
+    digest.update(payload_text.encode())
+    return digest.hexdigest()
+
+
+def image_name(digest):
+    return f"ronzz-golden-{digest[:16]}"
+
+
+def find_image(invokes, compartment_id, digest):
+    """Return the OCID of an available golden image for ``digest`` or None."""
+    images = invokes.invoke(
+        oci.core.get_images,
+        compartment_id=compartment_id,
+        display_name=image_name(digest),
+        state="AVAILABLE",
+    )
+    for image in images.images:
+        if (image.freeform_tags or {}).get(HASH_TAG) == digest:
+            return image.id
+    return None
+
+
+async def _wait_until_stopped(invokes, instance_id, timeout, initial_delay, max_delay):
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
+    while True:
+        instance = await invokes.invoke_async(
+            oci.core.get_instance_output, cache=False, instance_id=instance_id
+        )
+        if instance.state == "STOPPED":
+            return instance_id
+        if instance.state in ("TERMINATING", "TERMINATED"):
+            raise Exception(f"Image builder {instance_id} was terminated")
+        if time.monotonic() + delay > deadline:
+            raise Exception(
+                f"Image builder {instance_id} did not power off within {timeout}s "
+                f"(state {instance.state}); check its cloud-init log"
+            )
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, max_delay)
+
+
+def stopped_instance_id(
+    invokes, instance, timeout=1800, initial_delay=15.0, max_delay=60.0
+):
+    """Return an Output resolving to the instance's id once it is STOPPED."""
+    return instance.id.apply(
+        lambda instance_id: _wait_until_stopped(
+            invokes, instance_id, timeout, initial_delay, max_delay
+        )
+    )
+
+
+def bake(
+    invokes,
+    digest,
+    compartment_id,
+    availability_domain,
+    shape,
+    shape_config,
+    subnet_id,
+    assign_public_ip,
+    base_image_id,
+    metadata,
+    timeout=1800,
+    launch_options=None,
+):
+    """Launch the builder and capture the golden image; returns the Image.
+
+    The image records the builder's launch options, so the builder launches
+    with the same ``launch_options`` profile as the instances.
+    """
+    name = image_name(digest)
+    builder = oci.core.Instance(
+        f"{name}-builder",
+        availability_domain=availability_domain,
+        compartment_id=compartment_id,
+        shape=shape,
+        shape_config=shape_config,
+        display_name=f"{name}-builder",
+        create_vnic_details=oci.core.InstanceCreateVnicDetailsArgs(
+            subnet_id=subnet_id, assign_public_ip=assign_public_ip
+        ),
+        source_details=oci.core.InstanceSourceDetailsArgs(
+            source_type="image", source_id=base_image_id
+        ),
+        metadata=metadata,
+        launch_options=(
+            instance_launch_options(launch_options) if launch_options else None
+        ),
+        is_pv_encryption_in_transit_enabled=(
+            launch_options.in_transit_encryption if launch_options else True
+        ),
+    )
+    return oci.core.Image(
+        name,
+        compartment_id=compartment_id,
+        instance_id=stopped_instance_id(invokes, builder, timeout=timeout),
+        display_name=name,
+        freeform_tags={HASH_TAG: digest},
+        # Later runs look the image up instead of managing it
+        opts=pulumi.ResourceOptions(retain_on_delete=True),
+    )
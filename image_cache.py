@@ -0,0 +1,78 @@
+"""On-disk cache for the platform image lookup done by __main__.py."""
+
+import json
+import os
+import time
+from pathlib import Path
+
+
+class ImageCache:
+    """Cache image OCIDs keyed by region, compartment, OS, OS version and shape.
+
+    Image OCIDs are regional while compartments are not, so ``region`` (the
+    provider region, None for the provider default) is part of every key and
+    stacks in several regions can share one file. Entries are stored as JSON
+    in ``path`` and expire after ``ttl`` seconds. ``fetch`` performs the actual
+    lookup and must return an image OCID or ``None``; it is only called on a
+    miss, an expired entry or when ``refresh`` is set.
+    """
+
+    def __init__(self, path, ttl, fetch, refresh=False, region=None, clock=time.time):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.fetch = fetch
+        self.refresh = refresh
+        self.region = region
+        self.clock = clock
+
+    def key(self, compartment_id, operating_system, operating_system_version, shape):
+        return "|".join(
+            [
+                self.region or "",
+                compartment_id,
+                operating_system,
+                operating_system_version,
+                shape,
+            ]
+        )
+
+    def _load(self):
+        try:
+            with self.path.open() as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _store(self, entries):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with tmp_path.open("w") as f:
+            json.dump(entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def get(self, compartment_id, operating_system, operating_system_version, shape):
+        key = self.key(
+            compartment_id, operating_system, operating_system_version, shape
+        )
+        entries = self._load()
+        entry = entries.get(key)
+        now = self.clock()
+        if (
+            not self.refresh
+            and entry is not None
+            and now - entry.get("fetched_at", 0) < self.ttl
+        ):
+            return entry["image_id"]
+
+        image_id = self.fetch(
+            compartment_id=compartment_id,
+            operating_system=operating_system,
+            operating_system_version=operating_system_version,
+            shape=shape,
+        )
+        if image_id:
+            # Re-read so concurrent runs sharing the file keep each other's keys
+            entries = self._load()
+            entries[key] = {"image_id": image_id, "fetched_at": now}
+            self._store(entries)
+        return image_id
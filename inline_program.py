@@ -0,0 +1,98 @@
+"""Run this project's ``__main__.py`` as an inline program.
+
+Shared by the Automation API drivers and the offline benchmarks: the
+program directory is executed with ``runpy`` exactly as the Pulumi CLI
+would run it, either under a live engine (``program`` as the Automation API
+``program=``) or against ``pulumi.runtime.set_mocks`` (``run_mocked``).
+"""
+
+import json
+import os
+import runpy
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+PROJECT = "ronzz-linux-pulumi"
+
+
+def program():
+    """Evaluate ``__main__.py``; pass as an Automation API inline program."""
+    runpy.run_path(str(ROOT), run_name="__main__")
+
+
+def _expand_backend(url):
+    # file://~/state -> file:///home/user/state
+    if url.startswith("file://"):
+        return "file://" + os.path.expanduser(url.removeprefix("file://"))
+    return url
+
+
+def workspace_options(backend=None, env_vars=None):
+    """Return ``LocalWorkspaceOptions`` for running the inline program.
+
+    Without ``backend`` the project directory is the workspace, so its
+    ``Pulumi.yaml``, stack files and current login are used. With a backend
+    URL a scratch workspace whose project settings point ``main`` back at
+    the project directory keeps the override out of ``Pulumi.yaml``; stack
+    config is written there and set again on every run.
+    """
+    from pulumi import automation as auto
+
+    env_vars = dict(env_vars or {})
+    if not backend:
+        return auto.LocalWorkspaceOptions(work_dir=str(ROOT), env_vars=env_vars)
+    env_vars.setdefault(
+        "PULUMI_CONFIG_PASSPHRASE", os.environ.get("PULUMI_CONFIG_PASSPHRASE", "")
+    )
+    return auto.LocalWorkspaceOptions(
+        work_dir=tempfile.mkdtemp(prefix="ronzz-automation-"),
+        project_settings=auto.ProjectSettings(
+            name=PROJECT,
+            runtime="python",
+            main=str(ROOT),
+            backend=auto.ProjectBackend(url=_expand_backend(backend)),
+        ),
+        env_vars=env_vars,
+    )
+
+
+def namespaced(config):
+    """Prefix project config keys and encode objects as JSON strings.
+
+    Keys that already carry a namespace (``oci:region``) are kept as is.
+    """
+    return {
+        (key if ":" in key else f"{PROJECT}:{key}"): (
+            value if isinstance(value, str) else json.dumps(value)
+        )
+        for key, value in config.items()
+    }
+
+
+def run_mocked(config, mocks, stack="mock", preview=False, outputs=None):
+    """Evaluate the program once against ``mocks``; returns the wall time.
+
+    ``outputs``, when given, is filled with the stack exports (values may be
+    unresolved ``Output``s). Runtime settings are process-global, so run one
+    evaluation per process.
+    """
+    import pulumi
+    from pulumi.runtime.stack import run_in_stack
+    from pulumi.runtime.sync_await import _sync_await
+
+    pulumi.runtime.set_mocks(mocks, project=PROJECT, stack=stack, preview=preview)
+    # set_mocks registers a placeholder root Stack; run_in_stack registers
+    # the real one that collects the program's exports
+    pulumi.runtime.settings.set_root_resource(None)
+    pulumi.runtime.set_all_config(namespaced(config))
+
+    def evaluate():
+        program()
+        if outputs is not None:
+            outputs.update(pulumi.runtime.settings.get_root_resource().outputs)
+
+    start = time.perf_counter()
+    _sync_await(run_in_stack(evaluate))
+    return time.perf_counter() - start
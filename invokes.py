@@ -0,0 +1,211 @@
+"""Shared invoke layer for OCI data-source calls.
+
+Every data-source call in the program goes through one ``InvokeLayer`` so
+that identical calls are issued once per run, concurrent calls stay under a
+configurable limit and throttled (429) or failing (5xx) calls are retried
+with jittered exponential backoff.
+"""
+
+import asyncio
+import bisect
+import json
+import random
+import re
+import sys
+import time
+
+import pulumi
+
+# Upper bounds (milliseconds) of the latency histogram buckets
+LATENCY_BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+_RETRYABLE = re.compile(
+    r"\b(429|500|502|503|504)\b|TooManyRequests|InternalServerError|ServiceUnavailable"
+)
+
+
+def is_retryable(error):
+    """Return True for throttling (429) and server-side (5xx) failures."""
+    return bool(_RETRYABLE.search(str(error)))
+
+
+def _invoke_name(fn):
+    return fn.__name__.removesuffix("_output")
+
+
+class _InvokeStats:
+    def __init__(self):
+        self.calls = 0
+        self.api_calls = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.retries = 0
+        self.errors = 0
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.total_ms = 0.0
+
+    def observe(self, elapsed_ms):
+        self.api_calls += 1
+        self.total_ms += elapsed_ms
+        self.histogram[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+
+    def as_dict(self):
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [
+            f">{LATENCY_BUCKETS_MS[-1]}ms"
+        ]
+        return {
+            "calls": self.calls,
+            "api_calls": self.api_calls,
+            "cache_hits": self.cache_hits,
+            "coalesced": self.coalesced,
+            "retries": self.retries,
+            "errors": self.errors,
+            "mean_ms": (
+                round(self.total_ms / self.api_calls, 3) if self.api_calls else 0.0
+            ),
+            "histogram": dict(zip(labels, self.histogram)),
+        }
+
+
+class InvokeLayer:
+    """Coalescing, memoizing, rate-limited wrapper around pulumi-oci invokes.
+
+    ``invoke`` takes a synchronous invoke function (e.g.
+    ``oci.core.get_images``); ``invoke_async`` and ``invoke_output`` take
+    the matching ``*_output`` variant. Results are memoized for the lifetime
+    of the layer, which is one program evaluation; pass ``cache=False`` for
+    calls that poll for a changing result.
+    """
+
+    def __init__(
+        self,
+        concurrency=8,
+        max_retries=5,
+        base_delay=0.5,
+        max_delay=20.0,
+        report_path=None,
+        tracer=None,
+    ):
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.tracer = tracer
+        self.stats = {}
+        self._memo = {}
+        self._in_flight = {}
+        self._semaphore = None
+        self.report_path = report_path
+
+    @staticmethod
+    def _key(fn, kwargs):
+        return (
+            _invoke_name(fn),
+            json.dumps(kwargs, sort_keys=True, default=repr),
+        )
+
+    def _stats_for(self, fn):
+        return self.stats.setdefault(_invoke_name(fn), _InvokeStats())
+
+    def _observe(self, fn, stats, start, attempt, outcome):
+        elapsed = time.perf_counter() - start
+        stats.observe(elapsed * 1000)
+        if self.tracer is not None:
+            end_us = time.time_ns() // 1000
+            self.tracer.record_invoke(
+                _invoke_name(fn), end_us - int(elapsed * 1e6), end_us, outcome, attempt
+            )
+
+    def _backoff(self, attempt):
+        # Full jitter keeps many throttled callers from retrying in lockstep
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def invoke(self, fn, cache=True, **kwargs):
+        """Call a synchronous invoke with memoization and retries."""
+        stats = self._stats_for(fn)
+        stats.calls += 1
+        key = self._key(fn, kwargs)
+        if cache and key in self._memo:
+            stats.cache_hits += 1
+            return self._memo[key]
+
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                result = fn(**kwargs)
+            except Exception as error:
+                self._observe(fn, stats, start, attempt, "error")
+                if attempt < self.max_retries and is_retryable(error):
+                    stats.retries += 1
+                    time.sleep(self._backoff(attempt))
+                    continue
+                stats.errors += 1
+                raise
+            self._observe(fn, stats, start, attempt, "ok")
+            if cache:
+                self._memo[key] = result
+            return result
+
+    async def _call_with_retries(self, fn, kwargs, stats):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        for attempt in range(self.max_retries + 1):
+            async with self._semaphore:
+                start = time.perf_counter()
+                try:
+                    result = await fn(**kwargs).future()
+                except Exception as error:
+                    self._observe(fn, stats, start, attempt, "error")
+                    if attempt < self.max_retries and is_retryable(error):
+                        stats.retries += 1
+                        retry_error = error
+                    else:
+                        stats.errors += 1
+                        raise
+                else:
+                    self._observe(fn, stats, start, attempt, "ok")
+                    return result
+            # Back off outside the semaphore so waiting does not hold a slot
+            pulumi.log.debug(f"Retrying {_invoke_name(fn)}: {retry_error}")
+            await asyncio.sleep(self._backoff(attempt))
+
+    async def invoke_async(self, fn, cache=True, **kwargs):
+        """Await an ``*_output`` invoke, merging identical in-flight calls."""
+        stats = self._stats_for(fn)
+        stats.calls += 1
+        key = self._key(fn, kwargs)
+        if cache and key in self._memo:
+            stats.cache_hits += 1
+            return self._memo[key]
+        if key in self._in_flight:
+            stats.coalesced += 1
+            return await asyncio.shield(self._in_flight[key])
+
+        task = asyncio.ensure_future(self._call_with_retries(fn, kwargs, stats))
+        self._in_flight[key] = task
+        try:
+            result = await asyncio.shield(task)
+        finally:
+            self._in_flight.pop(key, None)
+        if cache:
+            self._memo[key] = result
+        return result
+
+    def invoke_output(self, fn, cache=True, **kwargs):
+        """Return an Output for an ``*_output`` invoke whose args may be Inputs."""
+        return pulumi.Output.all(**kwargs).apply(
+            lambda resolved: self.invoke_async(fn, cache=cache, **resolved)
+        )
+
+    def report(self):
+        return {name: stats.as_dict() for name, stats in sorted(self.stats.items())}
+
+    def write_report(self, path=None):
+        """Write ``report()`` as JSON to ``path`` (default ``report_path``)."""
+        path = path or self.report_path
+        report = json.dumps(self.report(), indent=2)
+        if path == "-":
+            print(report, file=sys.stderr)
+            return
+        with open(path, "w") as f:
+            f.write(report + "\n")
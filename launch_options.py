@@ -0,0 +1,134 @@
+"""Launch options profiles: network data path, boot volume attachment and
+in-transit encryption.
+
+A profile picks the VNIC network type (hardware-assisted ``VFIO`` (SR-IOV)
+or ``PARAVIRTUALIZED``), how the boot volume is attached and whether
+in-transit encryption is enabled for paravirtualized volume attachments.
+Profiles are validated locally against the shape and, through the invoke
+layer, against the image's launch mode before anything is registered.
+"""
+
+from typing import NamedTuple
+
+import pulumi_oci as oci
+
+NETWORK_TYPES = ("PARAVIRTUALIZED", "VFIO")
+BOOT_VOLUME_TYPES = ("PARAVIRTUALIZED", "ISCSI")
+
+# Profiles as (network type, boot volume type, in-transit encryption); None
+# keeps the platform's choice for the image and shape
+PROFILES = {
+    # Platform launch options with in-transit encryption, as before profiles
+    "default": (None, None, True),
+    # SR-IOV data path, no encryption work on the paravirtualized path
+    "low-latency": ("VFIO", "PARAVIRTUALIZED", False),
+    # Everything on the paravirtualized path, volume traffic encrypted
+    "secure": ("PARAVIRTUALIZED", "PARAVIRTUALIZED", True),
+}
+
+# VM shapes with hardware-assisted (SR-IOV) networking. Known shapes missing
+# from this list (sizing.SHAPE_LIMITS) are paravirtualized only; other
+# shapes are left to the API
+VFIO_SHAPES = (
+    "VM.Standard2.",
+    "VM.Standard3.Flex",
+    "VM.Standard.E3.Flex",
+    "VM.Standard.E4.Flex",
+    "VM.Standard.E5.Flex",
+    "VM.Optimized3.Flex",
+    "VM.DenseIO2.",
+)
+PARAVIRTUALIZED_SHAPES = ("VM.Standard.A1.Flex", "VM.Standard.A2.Flex")
+
+# Image launch modes that cannot take a VFIO VNIC
+_PARAVIRTUALIZED_IMAGE_MODES = ("PARAVIRTUALIZED", "EMULATED")
+
+
+class LaunchOptions(NamedTuple):
+    profile: str
+    network_type: str | None
+    boot_volume_type: str | None
+    in_transit_encryption: bool
+
+    @property
+    def customized(self):
+        return self.network_type is not None or self.boot_volume_type is not None
+
+
+def resolve_launch_options(settings=None):
+    """Combine a ``launch_options`` config object with its profile.
+
+    ``settings`` has an optional ``profile`` (default ``default``) and
+    explicit ``network_type``, ``boot_volume_type`` and
+    ``in_transit_encryption`` overrides.
+    """
+    settings = settings or {}
+    profile = settings.get("profile") or "default"
+    if profile not in PROFILES:
+        raise ValueError(
+            f"Unknown launch_options profile {profile!r}; "
+            f"expected one of: {', '.join(PROFILES)}"
+        )
+    network_type, boot_volume_type, in_transit_encryption = PROFILES[profile]
+    network_type = settings.get("network_type", network_type)
+    boot_volume_type = settings.get("boot_volume_type", boot_volume_type)
+    in_transit_encryption = bool(
+        settings.get("in_transit_encryption", in_transit_encryption)
+    )
+    if network_type is not None and network_type not in NETWORK_TYPES:
+        raise ValueError(
+            f"launch_options.network_type must be one of: {', '.join(NETWORK_TYPES)}"
+        )
+    if boot_volume_type is not None and boot_volume_type not in BOOT_VOLUME_TYPES:
+        raise ValueError(
+            "launch_options.boot_volume_type must be one of: "
+            f"{', '.join(BOOT_VOLUME_TYPES)}"
+        )
+    if in_transit_encryption and boot_volume_type == "ISCSI":
+        raise ValueError(
+            "In-transit encryption needs a PARAVIRTUALIZED boot volume; "
+            "set in_transit_encryption to false for ISCSI"
+        )
+    return LaunchOptions(
+        profile, network_type, boot_volume_type, in_transit_encryption
+    )
+
+
+def validate_launch_options(shape, options):
+    """Raise ValueError when ``shape`` cannot take ``options``."""
+    if options.network_type != "VFIO" or shape.startswith(VFIO_SHAPES):
+        return
+    if shape in PARAVIRTUALIZED_SHAPES:
+        raise ValueError(
+            f"{shape} only supports PARAVIRTUALIZED networking; use another "
+            f"launch_options profile than {options.profile!r} or a shape with "
+            "hardware-assisted networking such as VM.Standard.E5.Flex"
+        )
+
+
+def check_image(invokes, image_id, options):
+    """Raise ValueError when the image's launch mode rules out ``options``."""
+    if options.network_type != "VFIO":
+        return
+    image = invokes.invoke(oci.core.get_image, image_id=image_id)
+    if image.launch_mode in _PARAVIRTUALIZED_IMAGE_MODES:
+        raise ValueError(
+            f"Image {image_id} launches in {image.launch_mode} mode and cannot "
+            "use VFIO networking; pick a NATIVE or CUSTOM image or another "
+            "launch_options profile"
+        )
+
+
+def instance_launch_options(options, args=None):
+    """Return launch options args for ``options`` or None for the defaults.
+
+    ``args`` is the launch options args class; instances use
+    ``oci.core.InstanceLaunchOptionsArgs``.
+    """
+    if not options.customized:
+        return None
+    args = args or oci.core.InstanceLaunchOptionsArgs
+    return args(
+        network_type=options.network_type,
+        boot_volume_type=options.boot_volume_type,
+    )
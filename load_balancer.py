@@ -0,0 +1,251 @@
+"""Optional layer-4 network load balancer in front of the instances.
+
+A ``load_balancer`` config object creates a pass-through
+``oci.networkloadbalancer.NetworkLoadBalancer`` in the public (ingress)
+subnet with one listener and backend set per configured port. Backends are
+the deployed instances, or the instance pool registers its own instances
+when autoscaling is enabled.
+"""
+
+from typing import NamedTuple
+
+import pulumi_oci as oci
+
+PROTOCOLS = ("TCP", "UDP", "TCP_AND_UDP")
+HEALTH_CHECK_PROTOCOLS = ("TCP", "UDP", "HTTP", "HTTPS")
+POLICIES = ("FIVE_TUPLE", "THREE_TUPLE", "TWO_TUPLE")
+
+# Security list protocol numbers per listener protocol
+_IP_PROTOCOLS = {"TCP": ("6",), "UDP": ("17",), "TCP_AND_UDP": ("6", "17")}
+
+
+class Listener(NamedTuple):
+    name: str
+    port: int
+    backend_port: int
+    protocol: str
+
+
+class HealthCheck(NamedTuple):
+    protocol: str
+    port: int
+    interval_in_millis: int
+    timeout_in_millis: int
+    retries: int
+    url_path: str | None
+    return_code: int | None
+
+
+class LoadBalancerSettings(NamedTuple):
+    listeners: list
+    health_check: HealthCheck
+    policy: str
+    is_private: bool
+    is_preserve_source: bool
+    source_cidr: str
+
+
+def _port(value, label):
+    port = int(value)
+    if not 1 <= port <= 65535:
+        raise ValueError(f"{label} must be between 1 and 65535, got {port}")
+    return port
+
+
+def parse_load_balancer(settings):
+    """Validate the ``load_balancer`` config object and fill in defaults."""
+    listeners = []
+    names = set()
+    for entry in settings.get("listeners") or [{"port": 80}]:
+        port = _port(entry.get("port", 80), "load_balancer.listeners.port")
+        name = entry.get("name", f"port{port}")
+        if not name.isalnum() or name in names:
+            raise ValueError(
+                f"load_balancer listener names must be unique and alphanumeric, "
+                f"got {name!r}"
+            )
+        names.add(name)
+        protocol = entry.get("protocol", "TCP")
+        if protocol not in PROTOCOLS:
+            raise ValueError(
+                f"load_balancer.listeners.{name}: protocol must be one of: "
+                f"{', '.join(PROTOCOLS)}"
+            )
+        backend_port = _port(
+            entry.get("backend_port", port),
+            f"load_balancer.listeners.{name}.backend_port",
+        )
+        listeners.append(Listener(name, port, backend_port, protocol))
+
+    health = settings.get("health_check") or {}
+    health_protocol = health.get("protocol", "TCP")
+    if health_protocol not in HEALTH_CHECK_PROTOCOLS:
+        raise ValueError(
+            "load_balancer.health_check.protocol must be one of: "
+            f"{', '.join(HEALTH_CHECK_PROTOCOLS)}"
+        )
+    is_http = health_protocol in ("HTTP", "HTTPS")
+    health_check = HealthCheck(
+        protocol=health_protocol,
+        port=_port(
+            health.get("port", listeners[0].backend_port),
+            "load_balancer.health_check.port",
+        ),
+        interval_in_millis=int(health.get("interval_in_millis", 10000)),
+        timeout_in_millis=int(health.get("timeout_in_millis", 3000)),
+        retries=int(health.get("retries", 3)),
+        url_path=health.get("url_path", "/") if is_http else None,
+        return_code=int(health.get("return_code", 200)) if is_http else None,
+    )
+    if health_check.timeout_in_millis >= health_check.interval_in_millis:
+        raise ValueError(
+            "load_balancer.health_check.timeout_in_millis must be shorter than "
+            "interval_in_millis"
+        )
+
+    policy = settings.get("policy", "FIVE_TUPLE")
+    if policy not in POLICIES:
+        raise ValueError(
+            f"load_balancer.policy must be one of: {', '.join(POLICIES)}"
+        )
+    return LoadBalancerSettings(
+        listeners=listeners,
+        health_check=health_check,
+        policy=policy,
+        is_private=bool(settings.get("is_private", False)),
+        is_preserve_source=bool(settings.get("is_preserve_source", False)),
+        source_cidr=settings.get("source_cidr", "0.0.0.0/0"),
+    )
+
+
+def ingress_rules(settings, backend_source):
+    """Return ``(listener_rules, backend_rules)`` for the security lists.
+
+    Rules are ``(protocol, port, source, description)`` tuples. Clients reach
+    the listener ports from ``source_cidr``; the load balancer (or, with
+    source preservation, the clients themselves) reaches the backend and
+    health check ports from ``backend_source``.
+    """
+    listener_rules = []
+    backend_rules = []
+    for listener in settings.listeners:
+        for protocol in _IP_PROTOCOLS[listener.protocol]:
+            listener_rules.append(
+                (protocol, listener.port, settings.source_cidr, f"NLB {listener.name}")
+            )
+            backend_rules.append(
+                (
+                    protocol,
+                    listener.backend_port,
+                    settings.source_cidr
+                    if settings.is_preserve_source
+                    else backend_source,
+                    f"NLB {listener.name} backends",
+                )
+            )
+    health_check = settings.health_check
+    backend_rules.append(
+        (
+            "17" if health_check.protocol == "UDP" else "6",
+            health_check.port,
+            backend_source,
+            "NLB health checks",
+        )
+    )
+    return _unique(listener_rules), _unique(backend_rules)
+
+
+def _unique(rules):
+    # Keep the first description of each (protocol, port, source)
+    unique = {}
+    for protocol, port, source, description in rules:
+        unique.setdefault((protocol, port, source), description)
+    return [(*key, description) for key, description in unique.items()]
+
+
+def create_load_balancer(name, compartment_id, subnet_id, settings):
+    """Create the load balancer, its backend sets and listeners.
+
+    Returns ``(network_load_balancer, backend_sets)`` with backend sets keyed
+    by listener name.
+    """
+    nlb = oci.networkloadbalancer
+    network_load_balancer = nlb.NetworkLoadBalancer(
+        name,
+        compartment_id=compartment_id,
+        display_name=name,
+        subnet_id=subnet_id,
+        is_private=settings.is_private,
+    )
+    health_check = settings.health_check
+    backend_sets = {}
+    for listener in settings.listeners:
+        backend_set = nlb.BackendSet(
+            f"{name}-{listener.name}",
+            network_load_balancer_id=network_load_balancer.id,
+            name=listener.name,
+            policy=settings.policy,
+            is_preserve_source=settings.is_preserve_source,
+            health_checker=nlb.BackendSetHealthCheckerArgs(
+                protocol=health_check.protocol,
+                port=health_check.port,
+                interval_in_millis=health_check.interval_in_millis,
+                timeout_in_millis=health_check.timeout_in_millis,
+                retries=health_check.retries,
+                url_path=health_check.url_path,
+                return_code=health_check.return_code,
+            ),
+        )
+        nlb.Listener(
+            f"{name}-{listener.name}-listener",
+            network_load_balancer_id=network_load_balancer.id,
+            name=listener.name,
+            default_backend_set_name=backend_set.name,
+            port=listener.port,
+            protocol=listener.protocol,
+        )
+        backend_sets[listener.name] = backend_set
+    return network_load_balancer, backend_sets
+
+
+def add_backends(name, network_load_balancer, backend_sets, settings, instances):
+    """Register every instance as a backend of every backend set."""
+    backends = []
+    for listener in settings.listeners:
+        for instance_name, instance in instances.items():
+            backends.append(
+                oci.networkloadbalancer.Backend(
+                    f"{name}-{listener.name}-{instance_name}",
+                    network_load_balancer_id=network_load_balancer.id,
+                    backend_set_name=backend_sets[listener.name].name,
+                    target_id=instance.id,
+                    port=listener.backend_port,
+                )
+            )
+    return backends
+
+
+def pool_load_balancers(network_load_balancer, backend_sets, settings):
+    """Return the instance pool attachments for every backend set."""
+    return [
+        oci.core.InstancePoolLoadBalancerArgs(
+            load_balancer_id=network_load_balancer.id,
+            backend_set_name=backend_sets[listener.name].name,
+            port=listener.backend_port,
+            vnic_selection="PrimaryVnic",
+        )
+        for listener in settings.listeners
+    ]
+
+
+def service_endpoint(network_load_balancer):
+    """Return an output with the load balancer's public (or private) address."""
+
+    def pick(ip_addresses):
+        # Unknown until the load balancer exists
+        ip_addresses = ip_addresses or []
+        addresses = [ip.ip_address for ip in ip_addresses if ip.is_public]
+        addresses += [ip.ip_address for ip in ip_addresses if not ip.is_public]
+        return addresses[0] if addresses else None
+
+    return network_load_balancer.ip_addresses.apply(pick)
@@ -0,0 +1,282 @@
+"""Simulated OCI for evaluating the program offline.
+
+``OciMocks`` plugs into ``pulumi.runtime.set_mocks`` (see
+``inline_program.run_mocked``) and stands in for the provider: resources
+echo their inputs back as state and the data sources this program calls
+(``get_images``, ``get_image``, ``get_vnic_attachments``, ``get_vnic``,
+``get_instance``, ``get_instances``, ``get_services``,
+``get_compute_capacity_reservation``) return plausible responses. Every
+call takes a latency drawn from a configurable distribution, and
+``Faults`` injects the failure modes the program has to cope with:
+
+- throttling: invokes answer 429 at random or above a calls/second limit
+- eventual consistency: the primary VNIC attachment stays ATTACHING for a
+  number of polls after launch
+- out of host capacity: instance launches in matching placements fail, and
+  ``capacity_probe`` reports the same placements as unavailable
+
+Draws come from one seeded ``random.Random``, so a run is reproducible up to
+thread scheduling.
+"""
+
+import random
+import threading
+import time
+from collections import Counter, deque
+from typing import NamedTuple
+
+import pulumi
+
+INSTANCE_TYPE = "oci:Core/instance:Instance"
+STACK_REFERENCE_TYPE = "pulumi:pulumi:StackReference"
+
+# Outputs of a network stack (network-stack/) read through a StackReference
+NETWORK_STACK_OUTPUTS = {
+    "vcn_id": "ocid1.vcn.oc1..bench",
+    "subnet_id": "ocid1.subnet.oc1..bench",
+    "public_subnet_id": "ocid1.subnet.oc1..bench",
+    "cidr_block": "10.0.0.0/16",
+    "assign_public_ip": True,
+}
+
+THROTTLED = "429-TooManyRequests, Too many requests for the tenancy (simulated)"
+OUT_OF_CAPACITY = (
+    "500-InternalError, Out of host capacity. Service: Core Instance "
+    "Operation: LaunchInstance (simulated)"
+)
+
+
+class Latency(NamedTuple):
+    """Per-call latency distribution, in seconds.
+
+    ``fixed`` waits ``value``; ``uniform`` waits between ``value`` and
+    ``spread``; ``lognormal`` has median ``value`` and shape ``spread``
+    (sigma), giving the long tail typical of control-plane APIs.
+    """
+
+    distribution: str = "fixed"
+    value: float = 0.0
+    spread: float = 0.0
+
+    @classmethod
+    def parse(cls, spec):
+        """Parse ``MS``, ``uniform:LOW_MS:HIGH_MS`` or ``lognormal:MEDIAN_MS:SIGMA``."""
+        if isinstance(spec, cls):
+            return spec
+        if isinstance(spec, (int, float)):
+            return cls("fixed", float(spec))
+        distribution, _, rest = str(spec).partition(":")
+        if not rest:
+            return cls("fixed", float(distribution) / 1000)
+        parts = rest.split(":")
+        if distribution == "uniform" and len(parts) == 2:
+            return cls("uniform", float(parts[0]) / 1000, float(parts[1]) / 1000)
+        if distribution == "lognormal" and len(parts) == 2:
+            return cls("lognormal", float(parts[0]) / 1000, float(parts[1]))
+        raise ValueError(
+            f"Unknown latency {spec!r}; use MS, uniform:LOW_MS:HIGH_MS or "
+            "lognormal:MEDIAN_MS:SIGMA"
+        )
+
+    def sample(self, rng):
+        if self.distribution == "uniform":
+            return rng.uniform(self.value, self.spread)
+        if self.distribution == "lognormal" and self.value > 0:
+            return rng.lognormvariate(0.0, self.spread) * self.value
+        return self.value
+
+
+class Faults(NamedTuple):
+    """Failure modes injected by ``OciMocks``.
+
+    ``out_of_capacity`` entries are dicts with any of ``shape``,
+    ``availability_domain`` and ``fault_domain``; missing keys match
+    anything.
+    """
+
+    throttle_rate: float = 0.0
+    rate_limit: float | None = None
+    vnic_attach_polls: int = 0
+    out_of_capacity: tuple = ()
+
+    @classmethod
+    def from_dict(cls, settings):
+        settings = dict(settings or {})
+        unknown = set(settings) - set(cls._fields)
+        if unknown:
+            raise ValueError(f"Unknown fault settings: {', '.join(sorted(unknown))}")
+        settings["out_of_capacity"] = tuple(settings.get("out_of_capacity") or ())
+        return cls(**settings)
+
+
+def _matches(entry, shape, availability_domain, fault_domain):
+    return all(
+        entry.get(key) in (None, value)
+        for key, value in (
+            ("shape", shape),
+            ("availability_domain", availability_domain),
+            ("fault_domain", fault_domain),
+        )
+    )
+
+
+class OciMocks(pulumi.runtime.Mocks):
+    """OCI stand-in with latency distributions and injected faults.
+
+    ``invoke_latency`` and ``resource_latency`` are ``Latency`` values (a
+    number is a fixed latency in seconds, a string is parsed with
+    ``Latency.parse``); ``type_latency`` overrides the resource latency per
+    type token, e.g. ``{"oci:Core/instance:Instance": "lognormal:800:0.4"}``.
+    """
+
+    def __init__(
+        self,
+        invoke_latency=0.0,
+        resource_latency=0.0,
+        type_latency=None,
+        faults=None,
+        seed=0,
+    ):
+        self.invoke_latency = Latency.parse(invoke_latency)
+        self.resource_latency = Latency.parse(resource_latency)
+        self.type_latency = {
+            token: Latency.parse(spec) for token, spec in (type_latency or {}).items()
+        }
+        self.faults = faults if isinstance(faults, Faults) else Faults.from_dict(faults)
+        self.resources = Counter()
+        self.invokes = Counter()
+        self.throttled = Counter()
+        self.capacity_errors = Counter()
+        self.first_registration_at = None
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._recent_calls = deque()
+        self._vnic_polls = Counter()
+
+    def _sleep(self, latency):
+        with self._lock:
+            seconds = latency.sample(self._rng)
+        time.sleep(seconds)
+
+    def _out_of_capacity(self, shape, availability_domain, fault_domain):
+        return any(
+            _matches(entry, shape, availability_domain, fault_domain)
+            for entry in self.faults.out_of_capacity
+        )
+
+    def _throttle(self, token):
+        now = time.monotonic()
+        with self._lock:
+            limited = False
+            if self.faults.rate_limit:
+                while self._recent_calls and now - self._recent_calls[0] > 1.0:
+                    self._recent_calls.popleft()
+                limited = len(self._recent_calls) >= self.faults.rate_limit
+                if not limited:
+                    self._recent_calls.append(now)
+            if limited or self._rng.random() < self.faults.throttle_rate:
+                self.throttled[token] += 1
+                return True
+        return False
+
+    def capacity_probe(self, candidate):
+        """Answer a ``placement`` capacity probe for ``candidate``."""
+        self._sleep(self.invoke_latency)
+        return not self._out_of_capacity(
+            candidate.shape, candidate.availability_domain, candidate.fault_domain
+        )
+
+    def new_resource(self, args):
+        with self._lock:
+            if self.first_registration_at is None:
+                self.first_registration_at = time.time()
+        self._sleep(self.type_latency.get(args.typ, self.resource_latency))
+        state = dict(args.inputs)
+        if args.typ == STACK_REFERENCE_TYPE:
+            state.update(outputs=NETWORK_STACK_OUTPUTS, secretOutputNames=[])
+        if args.typ == INSTANCE_TYPE:
+            if self._out_of_capacity(
+                state.get("shape"),
+                state.get("availabilityDomain"),
+                state.get("faultDomain"),
+            ):
+                with self._lock:
+                    self.capacity_errors[state.get("availabilityDomain")] += 1
+                raise Exception(OUT_OF_CAPACITY)
+            state.setdefault("state", "RUNNING")
+            state.setdefault("timeCreated", "2024-01-01T00:00:00.000Z")
+        with self._lock:
+            self.resources[args.typ] += 1
+        return f"{args.name}-id", state
+
+    def call(self, args):
+        self._sleep(self.invoke_latency)
+        with self._lock:
+            self.invokes[args.token] += 1
+        if self._throttle(args.token):
+            raise Exception(THROTTLED)
+
+        if args.token == "oci:Core/getImages:getImages":
+            return {"images": [{"id": "ocid1.image.oc1..bench"}]}
+        if args.token == "oci:Core/getVcns:getVcns":
+            return {"virtualNetworks": []}
+        if args.token == "oci:Core/getSubnets:getSubnets":
+            return {"subnets": []}
+        if args.token == "oci:Core/getImage:getImage":
+            return {"id": args.args["imageId"], "launchMode": "NATIVE"}
+        if args.token == "oci:Core/getInstances:getInstances":
+            return {"instances": []}
+        if args.token == "oci:Core/getInstance:getInstance":
+            return {"id": args.args["instanceId"], "state": "STOPPED"}
+        if args.token == "oci:Core/getServices:getServices":
+            return {
+                "services": [
+                    {
+                        "id": "ocid1.service.oc1..bench",
+                        "name": "All IAD Services In Oracle Services Network",
+                        "cidrBlock": "all-iad-services-in-oracle-services-network",
+                    }
+                ]
+            }
+        if args.token == "oci:Core/getVnicAttachments:getVnicAttachments":
+            instance_id = args.args.get("instanceId")
+            with self._lock:
+                self._vnic_polls[instance_id] += 1
+                attached = self._vnic_polls[instance_id] > self.faults.vnic_attach_polls
+            # The attachment is listed before the VNIC exists
+            return {
+                "vnicAttachments": [
+                    {
+                        "state": "ATTACHED" if attached else "ATTACHING",
+                        "vnicId": f"{instance_id}-vnic" if attached else None,
+                    }
+                ]
+            }
+        if args.token == "oci:Core/getVnic:getVnic":
+            return {
+                "publicIpAddress": "203.0.113.10",
+                "privateIpAddress": "10.0.1.10",
+            }
+        if args.token == (
+            "oci:Core/getComputeCapacityReservation:getComputeCapacityReservation"
+        ):
+            return {
+                "availabilityDomain": "BENCH-AD-1",
+                "reservedInstanceCount": "10",
+                "usedInstanceCount": "0",
+                "instanceReservationConfigs": [
+                    {"faultDomain": None, "reservedCount": "10"}
+                ],
+            }
+        return {}
+
+
+def install_capacity_probe(mocks):
+    """Answer ``placement`` capacity probes from ``mocks`` instead of the SDK.
+
+    Call before evaluating the program: ``__main__.py`` builds its probe
+    through ``placement.sdk_capacity_probe``.
+    """
+    import placement
+
+    placement.sdk_capacity_probe = lambda *args, **kwargs: mocks.capacity_probe
@@ -0,0 +1,249 @@
+"""Preview or update this project in several regions concurrently.
+
+Each target is a (region, compartment, availability domain) triple run as
+its own stack through the Automation API with ``__main__.py`` as the inline
+program. Targets run in a bounded pool of worker processes (Pulumi runtime
+settings are process-global), output is streamed line by line with a
+``[stack]`` prefix and a summary of durations and failures is printed at
+the end:
+
+    python multi_region.py preview --targets targets.json --parallel 4
+    python multi_region.py up --target eu-paris-1,ocid1.compartment...,CDG-AD-1
+    python multi_region.py preview --targets targets.json \
+        --backend file://~/.pulumi-local
+    python multi_region.py preview --targets targets.json --mocks
+
+``targets.json`` is a list of ``{"region", "compartment_id",
+"availability_domain"}`` objects with optional ``stack`` (default: the
+region with ``--stack-prefix``) and per-target ``config``. ``--config``
+values apply to every target. ``--mocks`` evaluates each target offline
+against ``mocks.OciMocks`` instead of running the engine; it needs no
+``ssh_public_key`` and leaves the image cache alone. With ``--backend`` as
+well, each stack is created or selected in that backend, its config is set
+and the config read back from the stack is evaluated.
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from inline_program import PROJECT, program, run_mocked, workspace_options
+
+ACTIONS = ("preview", "up")
+
+# Nothing is launched under mocks, so any well-formed key will do
+MOCK_SSH_PUBLIC_KEY = "ssh-ed25519 AAAAC3NzaC1lZDI1NTE5AAAAIMock mock@example"
+
+
+def parse_target(value):
+    """Parse ``REGION,COMPARTMENT_ID,AVAILABILITY_DOMAIN``."""
+    parts = value.split(",")
+    if len(parts) != 3 or not all(parts):
+        raise argparse.ArgumentTypeError(
+            "targets must be REGION,COMPARTMENT_ID,AVAILABILITY_DOMAIN"
+        )
+    region, compartment_id, availability_domain = parts
+    return {
+        "region": region,
+        "compartment_id": compartment_id,
+        "availability_domain": availability_domain,
+    }
+
+
+def parse_config(value):
+    key, separator, config_value = value.partition("=")
+    if not separator or not key:
+        raise argparse.ArgumentTypeError("config values must be KEY=VALUE")
+    return key, config_value
+
+
+def target_config(target, shared_config):
+    """Return the flat config for one target's stack."""
+    return {
+        **shared_config,
+        **(target.get("config") or {}),
+        "oci:region": target["region"],
+        "compartment_id": target["compartment_id"],
+        "availability_domain": target["availability_domain"],
+    }
+
+
+def _printer(stack_name):
+    def emit(text):
+        for line in text.rstrip("\n").splitlines():
+            print(f"[{stack_name}] {line}", flush=True)
+
+    return emit
+
+
+def _select_stack(stack_name, config, backend):
+    from pulumi import automation as auto
+
+    stack = auto.create_or_select_stack(
+        stack_name=stack_name,
+        project_name=PROJECT,
+        program=program,
+        opts=workspace_options(backend),
+    )
+    stack.set_all_config(
+        {
+            key: auto.ConfigValue(
+                value=value if isinstance(value, str) else json.dumps(value)
+            )
+            for key, value in config.items()
+        }
+    )
+    return stack
+
+
+def _run_engine(action, stack_name, config, backend, emit):
+    stack = _select_stack(stack_name, config, backend)
+    if action == "preview":
+        return stack.preview(on_output=emit).change_summary
+    return stack.up(on_output=emit).summary.resource_changes
+
+
+def _run_mocked(action, stack_name, config, emit, backend=None):
+    from mocks import OciMocks
+
+    if backend:
+        # Evaluate the config as stored in the backend's stack
+        stack = _select_stack(stack_name, config, backend)
+        config = {
+            key.removeprefix(f"{PROJECT}:"): value.value
+            for key, value in stack.get_all_config().items()
+        }
+    mocks = OciMocks()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        elapsed = run_mocked(
+            {
+                "ssh_public_key": MOCK_SSH_PUBLIC_KEY,
+                **config,
+                # Keep mocked image IDs out of the real image cache
+                "image_cache_path": str(Path(cache_dir) / "images.json"),
+            },
+            mocks,
+            stack=stack_name,
+            preview=action == "preview",
+        )
+    emit(
+        f"evaluated in {elapsed:.3f}s: {sum(mocks.resources.values())} resources, "
+        f"{sum(mocks.invokes.values())} invokes"
+    )
+    return dict(mocks.resources)
+
+
+def run_target(action, stack_name, config, backend=None, mocked=False):
+    """Run one stack; returns a result dict instead of raising."""
+    emit = _printer(stack_name)
+    start = time.perf_counter()
+    try:
+        if mocked:
+            changes = _run_mocked(action, stack_name, config, emit, backend)
+        else:
+            changes = _run_engine(action, stack_name, config, backend, emit)
+        error = None
+    except Exception as exc:
+        changes = None
+        error = str(exc).strip().splitlines()[-1] if str(exc).strip() else repr(exc)
+        emit(f"failed: {exc}")
+    return {
+        "stack": stack_name,
+        "region": config["oci:region"],
+        "action": action,
+        "succeeded": error is None,
+        "duration_s": round(time.perf_counter() - start, 2),
+        "changes": changes,
+        "error": error,
+    }
+
+
+def print_summary(results):
+    print()
+    print(f"{'stack':<28} {'region':<20} {'result':<8} {'duration':>9}  changes")
+    for result in sorted(results, key=lambda result: result["stack"]):
+        changes = ", ".join(
+            f"{kind}={count}"
+            for kind, count in sorted((result["changes"] or {}).items())
+        )
+        print(
+            f"{result['stack']:<28} {result['region']:<20} "
+            f"{'ok' if result['succeeded'] else 'FAILED':<8} "
+            f"{result['duration_s']:>8.1f}s  {changes or result['error'] or '-'}"
+        )
+    failed = [result for result in results if not result["succeeded"]]
+    print(f"\n{len(results) - len(failed)} succeeded, {len(failed)} failed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("action", choices=ACTIONS)
+    parser.add_argument("--targets", help="JSON file with a list of targets")
+    parser.add_argument(
+        "--target",
+        action="append",
+        type=parse_target,
+        default=[],
+        help="REGION,COMPARTMENT_ID,AVAILABILITY_DOMAIN (repeatable)",
+    )
+    parser.add_argument(
+        "--config",
+        action="append",
+        type=parse_config,
+        default=[],
+        help="KEY=VALUE applied to every target (repeatable)",
+    )
+    parser.add_argument("--stack-prefix", default="")
+    parser.add_argument("--parallel", type=int, default=4)
+    parser.add_argument("--backend", help="State backend URL, e.g. file://~/.pulumi")
+    parser.add_argument(
+        "--mocks", action="store_true", help="Evaluate offline against mocks"
+    )
+    parser.add_argument("--out", help="Write the results as JSON")
+    args = parser.parse_args()
+
+    targets = list(args.target)
+    if args.targets:
+        with open(args.targets) as f:
+            targets += json.load(f)
+    if not targets:
+        parser.error("give at least one --target or a --targets file")
+    if args.parallel < 1:
+        parser.error("--parallel must be at least 1")
+
+    shared_config = dict(args.config)
+    jobs = {}
+    for target in targets:
+        stack_name = target.get("stack") or f"{args.stack_prefix}{target['region']}"
+        if stack_name in jobs:
+            parser.error(f"duplicate stack {stack_name}")
+        jobs[stack_name] = target_config(target, shared_config)
+
+    results = []
+    # One fresh process per stack: runtime settings never leak between runs
+    with ProcessPoolExecutor(
+        max_workers=min(args.parallel, len(jobs)), max_tasks_per_child=1
+    ) as pool:
+        futures = [
+            pool.submit(
+                run_target, args.action, stack_name, config, args.backend, args.mocks
+            )
+            for stack_name, config in jobs.items()
+        ]
+        for future in as_completed(futures):
+            results.append(future.result())
+
+    print_summary(results)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+    sys.exit(0 if all(result["succeeded"] for result in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
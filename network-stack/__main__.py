@@ -0,0 +1,67 @@
+"""Network stack for ronzz-linux-pulumi: VCN, gateways and subnets only.
+
+Compute stacks set ``network_stack`` to this stack's fully qualified name
+and read the outputs through a ``StackReference``, so instance changes no
+longer evaluate or diff the network.
+"""
+
+import sys
+from pathlib import Path
+
+import pulumi
+
+# The network modules live in the compute project's directory
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from cidr import parse_tiers  # noqa: E402
+from invokes import InvokeLayer  # noqa: E402
+from load_balancer import ingress_rules, parse_load_balancer  # noqa: E402
+from network import (  # noqa: E402
+    VCN_CIDR,
+    create_network,
+    export_network,
+    plan_subnets,
+)
+
+config = pulumi.Config()
+compartment_id = config.require("compartment_id")
+network_topology = config.get("network_topology") or "public"
+vcn_cidr = config.get("vcn_cidr") or VCN_CIDR
+subnet_tiers = parse_tiers(config.get_object("subnet_tiers") or [])
+
+# Same shape as the compute stack's load_balancer object; only the listener
+# ports, health check and source_cidr are used, to open the security lists
+load_balancer_config = config.get_object("load_balancer")
+load_balancer = (
+    parse_load_balancer(load_balancer_config) if load_balancer_config else None
+)
+listener_rules, backend_rules = (
+    ingress_rules(load_balancer, vcn_cidr) if load_balancer else ([], [])
+)
+
+invokes = InvokeLayer(
+    concurrency=config.get_int("invoke_concurrency") or 8,
+    max_retries=config.get_int("invoke_max_retries") or 5,
+)
+
+export_network(
+    create_network(
+        compartment_id,
+        network_topology,
+        invokes,
+        ingress_rules=listener_rules,
+        backend_rules=backend_rules,
+        vcn_cidr=vcn_cidr,
+        subnet_plan=(
+            plan_subnets(
+                invokes,
+                compartment_id,
+                vcn_cidr,
+                subnet_tiers,
+                config.get_object("subnet_cidrs"),
+            )
+            if subnet_tiers
+            else None
+        ),
+    )
+)
@@ -0,0 +1,443 @@
+"""VCN, gateways and subnets created when no ``vcn_id`` is configured.
+
+The ``public`` topology is a single public subnet routed through an internet
+gateway. The ``split`` topology keeps that subnet for ingress only and puts
+the instances in a private worker subnet that reaches Oracle services
+(Object Storage, package mirrors, monitoring) through a service gateway and
+everything else through a NAT gateway.
+
+With ``subnet_tiers`` the fixed /24 subnets are replaced by one subnet per
+tier (and per AD for AD-specific tiers), sized and placed by
+``cidr.allocate``; public tiers use the internet gateway route table and
+private tiers the service/NAT gateway one.
+
+The network can also be deployed on its own by the ``network-stack``
+project; compute stacks then read it back with ``stack_network``.
+"""
+
+import ipaddress
+import re
+from typing import NamedTuple
+
+import pulumi
+import pulumi_oci as oci
+
+from cidr import allocate, default_subnets, ipv6_cidr
+
+TOPOLOGIES = ("public", "split")
+
+VCN_CIDR = "10.0.0.0/16"
+
+# Matches e.g. "All IAD Services In Oracle Services Network"
+_ALL_SERVICES = re.compile(r"^All .* Services In Oracle Services Network$")
+
+
+class Network(NamedTuple):
+    vcn_id: object
+    subnet_id: object
+    public_subnet_id: object
+    cidr_block: object
+    assign_public_ip: object
+    # Tier subnets only: {subnet name: id}, {subnet name: CIDR} and the
+    # instance subnets of AD-specific instance tiers as {AD: id}
+    subnet_ids: object = None
+    subnet_cidrs: object = None
+    instance_subnet_ids: object = None
+
+    def instance_subnet_id(self, availability_domain):
+        """Return the subnet for instances in ``availability_domain``."""
+        if isinstance(self.instance_subnet_ids, pulumi.Output):
+            return pulumi.Output.all(self.instance_subnet_ids, self.subnet_id).apply(
+                lambda args: (args[0] or {}).get(availability_domain) or args[1]
+            )
+        return (self.instance_subnet_ids or {}).get(
+            availability_domain, self.subnet_id
+        )
+
+
+# Stack outputs of the network stack, one per Network field
+OUTPUTS = Network._fields
+_REQUIRED_OUTPUTS = OUTPUTS[:5]
+
+
+def all_services(invokes):
+    """Return the "All Services in Oracle Services Network" service."""
+    services = invokes.invoke(oci.core.get_services).services
+    for service in services:
+        if _ALL_SERVICES.match(service.name):
+            return service
+    raise Exception(
+        "No 'All Services in Oracle Services Network' service found in this "
+        "region; use network_topology public instead"
+    )
+
+
+def _tier_subnet_name(display_name):
+    # "ronzz-web-subnet" -> "web"
+    match = re.fullmatch(r"ronzz-(.+)-subnet", display_name or "")
+    return match.group(1) if match else None
+
+
+def existing_subnets(invokes, compartment_id, vcn_cidr):
+    """Return ``{subnet name: (CIDR, DNS label)}`` of the deployed tier subnets."""
+    vcns = [
+        vcn
+        for vcn in invokes.invoke(
+            oci.core.get_vcns,
+            compartment_id=compartment_id,
+            display_name="ronzz-vcn",
+            state="AVAILABLE",
+        ).virtual_networks
+        if vcn_cidr in (vcn.cidr_blocks or [])
+    ]
+    if len(vcns) != 1:
+        if vcns:
+            pulumi.log.warn(
+                f"{len(vcns)} ronzz-vcn VCNs with {vcn_cidr} in this compartment; "
+                "pin existing subnets with subnet_cidrs to keep their CIDRs"
+            )
+        return {}
+    subnets = invokes.invoke(
+        oci.core.get_subnets, compartment_id=compartment_id, vcn_id=vcns[0].id
+    ).subnets
+    existing = {}
+    for subnet in subnets:
+        name = _tier_subnet_name(subnet.display_name)
+        if name:
+            existing[name] = (subnet.cidr_block, subnet.dns_label)
+    return existing
+
+
+def plan_subnets(invokes, compartment_id, vcn_cidr, tiers, pins=None):
+    """Allocate the tier subnets, keeping deployed and pinned CIDRs.
+
+    Deployed subnets also keep their DNS labels.
+    """
+    pins = pins or {}
+    existing = existing_subnets(invokes, compartment_id, vcn_cidr)
+    previous = {name: cidr for name, (cidr, _) in existing.items()}
+    labels = {
+        name: label
+        for name, (cidr, label) in existing.items()
+        # A pin that moves the subnet replaces it under a fresh label
+        if label
+        and ipaddress.ip_network(pins.get(name, cidr)) == ipaddress.ip_network(cidr)
+    }
+    return allocate(vcn_cidr, tiers, {**previous, **pins}, labels)
+
+
+def _instance_plans(topology, subnet_plan):
+    # The tier marked instances, else the first private tier of a split
+    # network or the first public tier
+    tier = next((plan.tier for plan in subnet_plan if plan.instances), None)
+    if tier is None:
+        public = topology == "public"
+        tier = next(
+            (plan.tier for plan in subnet_plan if plan.public == public),
+            subnet_plan[0].tier,
+        )
+    return [plan for plan in subnet_plan if plan.tier == tier]
+
+
+def _ingress_rule(protocol, port, source, description):
+    ports = {"min": port, "max": port}
+    return oci.core.SecurityListIngressSecurityRuleArgs(
+        protocol=protocol,
+        source=source,
+        description=description,
+        tcp_options=(
+            oci.core.SecurityListIngressSecurityRuleTcpOptionsArgs(**ports)
+            if protocol == "6"
+            else None
+        ),
+        udp_options=(
+            oci.core.SecurityListIngressSecurityRuleUdpOptionsArgs(**ports)
+            if protocol == "17"
+            else None
+        ),
+    )
+
+
+def create_network(
+    compartment_id,
+    topology,
+    invokes,
+    ingress_rules=(),
+    backend_rules=(),
+    vcn_cidr=VCN_CIDR,
+    subnet_plan=None,
+    ssh_ingress=True,
+):
+    """Create the VCN and subnets for ``topology`` and return a ``Network``.
+
+    ``ingress_rules`` are added to the public subnet's security list and
+    ``backend_rules`` to the list of the subnet the instances run in, both
+    as ``(protocol, port, source, description)`` tuples. ``subnet_plan``
+    (from ``plan_subnets``) replaces the default subnets. Without
+    ``ssh_ingress`` the public security list does not open port 22, for
+    when network security groups grant access instead.
+    """
+    if topology not in TOPOLOGIES:
+        raise ValueError(
+            f"Unknown network_topology {topology!r}; "
+            f"expected one of: {', '.join(TOPOLOGIES)}"
+        )
+    if subnet_plan:
+        if not any(plan.public for plan in subnet_plan):
+            raise ValueError("subnet_tiers need at least one public tier")
+        if topology == "public" and not all(plan.public for plan in subnet_plan):
+            raise ValueError("Private subnet tiers need network_topology split")
+        instance_plans = _instance_plans(topology, subnet_plan)
+        instances_public = instance_plans[0].public
+    else:
+        instances_public = topology == "public"
+        public_subnet_cidr, private_subnet_cidr = default_subnets(vcn_cidr)
+
+    # Create Virtual Cloud Network (VCN)
+    vcn = oci.core.Vcn(
+        "ronzz-vcn",
+        compartment_id=compartment_id,
+        cidr_blocks=[vcn_cidr],
+        display_name="ronzz-vcn",
+        dns_label="ronzz",
+        is_ipv6enabled=(
+            True
+            if any(plan.ipv6_index is not None for plan in subnet_plan or ())
+            else None
+        ),
+    )
+
+    # Create Internet Gateway
+    internet_gateway = oci.core.InternetGateway(
+        "ronzz-igw",
+        compartment_id=compartment_id,
+        vcn_id=vcn.id,
+        enabled=True,
+        display_name="ronzz-internet-gateway",
+    )
+
+    # Create Route Table
+    route_table = oci.core.RouteTable(
+        "ronzz-route-table",
+        compartment_id=compartment_id,
+        vcn_id=vcn.id,
+        display_name="ronzz-route-table",
+        route_rules=[
+            oci.core.RouteTableRouteRuleArgs(
+                network_entity_id=internet_gateway.id,
+                destination="0.0.0.0/0",
+                destination_type="CIDR_BLOCK",
+            )
+        ],
+    )
+
+    # Create Security List
+    security_list = oci.core.SecurityList(
+        "ronzz-security-list",
+        compartment_id=compartment_id,
+        vcn_id=vcn.id,
+        display_name="ronzz-security-list",
+        egress_security_rules=[
+            oci.core.SecurityListEgressSecurityRuleArgs(
+                destination="0.0.0.0/0",
+                protocol="all",
+                description="Allow all outbound traffic",
+            )
+        ],
+        ingress_security_rules=[
+            *(
+                [_ingress_rule("6", 22, "0.0.0.0/0", "Allow SSH")]
+                if ssh_ingress
+                else []
+            ),
+            oci.core.SecurityListIngressSecurityRuleArgs(
+                protocol="1", source="0.0.0.0/0", description="Allow ICMP"  # ICMP
+            ),
+            *(_ingress_rule(*rule) for rule in ingress_rules),
+            *(
+                _ingress_rule(*rule)
+                for rule in (backend_rules if instances_public else ())
+            ),
+        ],
+    )
+
+    if not subnet_plan:
+        # Create Subnet
+        subnet = oci.core.Subnet(
+            "ronzz-subnet",
+            compartment_id=compartment_id,
+            vcn_id=vcn.id,
+            cidr_block=public_subnet_cidr,
+            display_name="ronzz-subnet",
+            dns_label="ronzzsubnet",
+            route_table_id=route_table.id,
+            security_list_ids=[security_list.id],
+        )
+
+    if topology == "public":
+        if subnet_plan:
+            return _tier_network(
+                compartment_id,
+                vcn,
+                vcn_cidr,
+                subnet_plan,
+                instance_plans,
+                {True: (route_table, security_list)},
+            )
+        return Network(vcn.id, subnet.id, subnet.id, vcn_cidr, assign_public_ip=True)
+
+    # Oracle services stay on the OCI backbone; all other egress is NATed
+    service = all_services(invokes)
+    service_gateway = oci.core.ServiceGateway(
+        "ronzz-sgw",
+        compartment_id=compartment_id,
+        vcn_id=vcn.id,
+        display_name="ronzz-service-gateway",
+        services=[oci.core.ServiceGatewayServiceArgs(service_id=service.id)],
+    )
+    nat_gateway = oci.core.NatGateway(
+        "ronzz-ngw",
+        compartment_id=compartment_id,
+        vcn_id=vcn.id,
+        display_name="ronzz-nat-gateway",
+    )
+    private_route_table = oci.core.RouteTable(
+        "ronzz-private-route-table",
+        compartment_id=compartment_id,
+        vcn_id=vcn.id,
+        display_name="ronzz-private-route-table",
+        route_rules=[
+            oci.core.RouteTableRouteRuleArgs(
+                network_entity_id=service_gateway.id,
+                destination=service.cidr_block,
+                destination_type="SERVICE_CIDR_BLOCK",
+            ),
+            oci.core.RouteTableRouteRuleArgs(
+                network_entity_id=nat_gateway.id,
+                destination="0.0.0.0/0",
+                destination_type="CIDR_BLOCK",
+            ),
+        ],
+    )
+    private_security_list = oci.core.SecurityList(
+        "ronzz-private-security-list",
+        compartment_id=compartment_id,
+        vcn_id=vcn.id,
+        display_name="ronzz-private-security-list",
+        egress_security_rules=[
+            oci.core.SecurityListEgressSecurityRuleArgs(
+                destination="0.0.0.0/0",
+                protocol="all",
+                description="Allow all outbound traffic",
+            )
+        ],
+        ingress_security_rules=[
+            oci.core.SecurityListIngressSecurityRuleArgs(
+                protocol="all",
+                source=vcn_cidr,
+                description="Allow traffic from within the VCN",
+            ),
+            *(
+                _ingress_rule(*rule)
+                for rule in (() if instances_public else backend_rules)
+            ),
+        ],
+    )
+    if subnet_plan:
+        return _tier_network(
+            compartment_id,
+            vcn,
+            vcn_cidr,
+            subnet_plan,
+            instance_plans,
+            {
+                True: (route_table, security_list),
+                False: (private_route_table, private_security_list),
+            },
+        )
+    private_subnet = oci.core.Subnet(
+        "ronzz-private-subnet",
+        compartment_id=compartment_id,
+        vcn_id=vcn.id,
+        cidr_block=private_subnet_cidr,
+        display_name="ronzz-private-subnet",
+        dns_label="ronzzprivate",
+        prohibit_public_ip_on_vnic=True,
+        route_table_id=private_route_table.id,
+        security_list_ids=[private_security_list.id],
+    )
+    return Network(
+        vcn.id, private_subnet.id, subnet.id, vcn_cidr, assign_public_ip=False
+    )
+
+
+def export_network(network):
+    """Export every ``Network`` field as a stack output."""
+    for name, value in network._asdict().items():
+        pulumi.export(name, value)
+
+
+def stack_network(stack_name):
+    """Return the ``Network`` exported by the network stack ``stack_name``.
+
+    ``stack_name`` is a fully qualified ``org/project/stack`` name; the
+    outputs resolve without re-evaluating or diffing any network resource.
+    """
+    reference = pulumi.StackReference("ronzz-network-stack", stack_name=stack_name)
+    return Network(
+        *(
+            (
+                reference.require_output(name)
+                if name in _REQUIRED_OUTPUTS
+                else reference.get_output(name)
+            )
+            for name in OUTPUTS
+        )
+    )
+
+
+def _tier_network(
+    compartment_id, vcn, vcn_cidr, subnet_plan, instance_plans, routing
+):
+    """Create the planned subnets and return their ``Network``.
+
+    ``routing`` maps a tier's ``public`` flag to its route table and
+    security list.
+    """
+    subnets = {}
+    for plan in subnet_plan:
+        route_table, security_list = routing[plan.public]
+        subnets[plan.name] = oci.core.Subnet(
+            f"ronzz-{plan.name}-subnet",
+            compartment_id=compartment_id,
+            vcn_id=vcn.id,
+            cidr_block=plan.cidr_block,
+            availability_domain=plan.availability_domain,
+            ipv6cidr_blocks=(
+                vcn.ipv6cidr_blocks.apply(
+                    lambda blocks, index=plan.ipv6_index: [ipv6_cidr(blocks[0], index)]
+                )
+                if plan.ipv6_index is not None
+                else None
+            ),
+            display_name=f"ronzz-{plan.name}-subnet",
+            dns_label=plan.dns_label,
+            prohibit_public_ip_on_vnic=not plan.public,
+            route_table_id=route_table.id,
+            security_list_ids=[security_list.id],
+        )
+    public_subnet = next(plan for plan in subnet_plan if plan.public)
+    return Network(
+        vcn.id,
+        subnets[instance_plans[0].name].id,
+        subnets[public_subnet.name].id,
+        vcn_cidr,
+        assign_public_ip=instance_plans[0].public,
+        subnet_ids={name: subnet.id for name, subnet in subnets.items()},
+        subnet_cidrs={plan.name: plan.cidr_block for plan in subnet_plan},
+        instance_subnet_ids={
+            plan.availability_domain: subnets[plan.name].id
+            for plan in instance_plans
+            if plan.availability_domain
+        },
+    )
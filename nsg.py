@@ -0,0 +1,257 @@
+"""Network security groups compiled from per-role rule sets.
+
+A ``security_groups`` config object maps role names to lists of rules.
+Every role becomes one ``NetworkSecurityGroup`` and every rule its own
+``NetworkSecurityGroupSecurityRule`` named after a hash of the rule's
+content, so adding or removing a rule creates or deletes exactly that rule
+and leaves the rest of the group untouched. Rules are normalized, identical
+rules are merged, and a rule already granted by another group attached to
+the same VNICs is dropped.
+"""
+
+import hashlib
+import ipaddress
+import json
+from typing import NamedTuple
+
+import pulumi_oci as oci
+
+PROTOCOLS = {"all": "all", "icmp": "1", "tcp": "6", "udp": "17"}
+DIRECTIONS = ("ingress", "egress")
+
+# OCI limits: security rules per NSG and NSGs per VNIC
+MAX_RULES_PER_GROUP = 120
+MAX_GROUPS_PER_VNIC = 5
+
+_PORT_PROTOCOLS = ("6", "17")
+
+
+class Rule(NamedTuple):
+    """One normalized security rule; ``peer`` is a CIDR or a role name."""
+
+    direction: str
+    protocol: str
+    peer: str
+    peer_type: str
+    min_port: int | None = None
+    max_port: int | None = None
+    icmp_type: int | None = None
+    icmp_code: int | None = None
+    stateless: bool = False
+    description: str = ""
+
+    @property
+    def key(self):
+        # Everything but the description identifies the rule
+        return self[:-1]
+
+    def digest(self):
+        return hashlib.sha256(json.dumps(self.key).encode()).hexdigest()[:12]
+
+
+def _port_range(entry):
+    if "port" in entry:
+        port = int(entry["port"])
+        return port, port
+    if "ports" in entry:
+        low, _, high = str(entry["ports"]).partition("-")
+        return int(low), int(high or low)
+    return None, None
+
+
+def parse_rule(role, entry):
+    """Normalize one rule entry of ``role``."""
+    direction = entry.get("direction", "ingress")
+    if direction not in DIRECTIONS:
+        raise ValueError(
+            f"security_groups.{role}: direction must be ingress or egress"
+        )
+    protocol = str(entry.get("protocol", "tcp")).lower()
+    if protocol not in PROTOCOLS:
+        raise ValueError(
+            f"security_groups.{role}: unknown protocol {protocol!r}; "
+            f"expected one of: {', '.join(PROTOCOLS)}"
+        )
+    protocol = PROTOCOLS[protocol]
+
+    peer = entry.get("source" if direction == "ingress" else "destination")
+    if not peer:
+        raise ValueError(
+            f"security_groups.{role}: {direction} rules need a "
+            f"{'source' if direction == 'ingress' else 'destination'}"
+        )
+    if peer.startswith("nsg:"):
+        peer, peer_type = peer.removeprefix("nsg:"), "NETWORK_SECURITY_GROUP"
+    else:
+        try:
+            peer = str(ipaddress.ip_network(peer))
+        except ValueError as error:
+            raise ValueError(f"security_groups.{role}: {error}") from None
+        peer_type = "CIDR_BLOCK"
+
+    min_port, max_port = _port_range(entry)
+    if min_port is not None:
+        if protocol not in _PORT_PROTOCOLS:
+            raise ValueError(
+                f"security_groups.{role}: ports need protocol tcp or udp"
+            )
+        if not 1 <= min_port <= max_port <= 65535:
+            raise ValueError(
+                f"security_groups.{role}: invalid port range {min_port}-{max_port}"
+            )
+    icmp_type = entry.get("icmp_type")
+    icmp_code = entry.get("icmp_code")
+    if (icmp_type is not None or icmp_code is not None) and protocol != "1":
+        raise ValueError(f"security_groups.{role}: icmp_type needs protocol icmp")
+    if icmp_code is not None and icmp_type is None:
+        raise ValueError(f"security_groups.{role}: icmp_code needs an icmp_type")
+
+    return Rule(
+        direction.upper(),
+        protocol,
+        peer,
+        peer_type,
+        min_port,
+        max_port,
+        None if icmp_type is None else int(icmp_type),
+        None if icmp_code is None else int(icmp_code),
+        bool(entry.get("stateless", False)),
+        entry.get("description", ""),
+    )
+
+
+def _join_descriptions(rules):
+    descriptions = []
+    for rule in rules:
+        if rule.description and rule.description not in descriptions:
+            descriptions.append(rule.description)
+    # OCI caps descriptions at 255 characters
+    return "; ".join(descriptions)[:255]
+
+
+def merge_rules(rules):
+    """Merge identical rules into one, joining their descriptions.
+
+    Overlapping or adjacent port ranges are left apart: a merged range would
+    be a new rule under a new name, so adding one port would replace the
+    rules next to it.
+    """
+    groups = {}
+    for rule in rules:
+        groups.setdefault(rule.key, []).append(rule)
+    merged = [
+        group[0]._replace(description=_join_descriptions(group))
+        for group in groups.values()
+    ]
+    return sorted(merged, key=lambda rule: json.dumps(rule.key))
+
+
+def compile_groups(settings, attached=None):
+    """Compile ``security_groups`` into ``{role: [Rule]}``.
+
+    ``attached`` lists the roles attached to the instance VNICs (default:
+    every role); among those, a rule is kept only in the first role (by
+    name) that grants it. Removing it from that role moves it to the next
+    one: the engine creates it there before deleting the old rule.
+    """
+    roles = sorted(settings)
+    attached = roles if attached is None else list(attached)
+    unknown = sorted(set(attached) - set(roles))
+    if unknown:
+        raise ValueError(f"Unknown security groups: {', '.join(unknown)}")
+    if len(attached) > MAX_GROUPS_PER_VNIC:
+        raise ValueError(
+            f"A VNIC takes at most {MAX_GROUPS_PER_VNIC} security groups, "
+            f"got {len(attached)}"
+        )
+
+    groups = {}
+    granted = set()
+    for role in roles:
+        rules = merge_rules(
+            parse_rule(role, entry) for entry in settings[role] or []
+        )
+        for rule in rules:
+            if rule.peer_type == "NETWORK_SECURITY_GROUP" and rule.peer not in roles:
+                raise ValueError(
+                    f"security_groups.{role} refers to unknown group {rule.peer}"
+                )
+        if role in attached:
+            rules = [rule for rule in rules if rule.key not in granted]
+            granted.update(rule.key for rule in rules)
+        if len(rules) > MAX_RULES_PER_GROUP:
+            raise ValueError(
+                f"security_groups.{role} has {len(rules)} rules; OCI allows "
+                f"{MAX_RULES_PER_GROUP} per group"
+            )
+        groups[role] = rules
+    return groups
+
+
+def _rule_args(rule):
+    core = oci.core
+    tcp_options = core.NetworkSecurityGroupSecurityRuleTcpOptionsArgs
+    tcp_ports = core.NetworkSecurityGroupSecurityRuleTcpOptionsDestinationPortRangeArgs
+    udp_options = core.NetworkSecurityGroupSecurityRuleUdpOptionsArgs
+    udp_ports = core.NetworkSecurityGroupSecurityRuleUdpOptionsDestinationPortRangeArgs
+    icmp_options = core.NetworkSecurityGroupSecurityRuleIcmpOptionsArgs
+    ports = (
+        {"min": rule.min_port, "max": rule.max_port}
+        if rule.min_port is not None
+        else None
+    )
+    return {
+        "tcp_options": (
+            tcp_options(destination_port_range=tcp_ports(**ports))
+            if rule.protocol == "6" and ports
+            else None
+        ),
+        "udp_options": (
+            udp_options(destination_port_range=udp_ports(**ports))
+            if rule.protocol == "17" and ports
+            else None
+        ),
+        "icmp_options": (
+            icmp_options(type=rule.icmp_type, code=rule.icmp_code)
+            if rule.icmp_type is not None
+            else None
+        ),
+    }
+
+
+def create_security_groups(compartment_id, vcn_id, groups):
+    """Create one NSG per role and one resource per rule.
+
+    Returns a dict mapping each role to its ``NetworkSecurityGroup``.
+    """
+    created = {
+        role: oci.core.NetworkSecurityGroup(
+            f"ronzz-nsg-{role}",
+            compartment_id=compartment_id,
+            vcn_id=vcn_id,
+            display_name=f"ronzz-nsg-{role}",
+        )
+        for role in groups
+    }
+    for role, rules in groups.items():
+        for rule in rules:
+            peer = (
+                created[rule.peer].id
+                if rule.peer_type == "NETWORK_SECURITY_GROUP"
+                else rule.peer
+            )
+            ingress = rule.direction == "INGRESS"
+            oci.core.NetworkSecurityGroupSecurityRule(
+                f"ronzz-nsg-{role}-{rule.digest()}",
+                network_security_group_id=created[role].id,
+                direction=rule.direction,
+                protocol=rule.protocol,
+                source=peer if ingress else None,
+                source_type=rule.peer_type if ingress else None,
+                destination=None if ingress else peer,
+                destination_type=None if ingress else rule.peer_type,
+                stateless=rule.stateless,
+                description=rule.description or None,
+                **_rule_args(rule),
+            )
+    return created
@@ -0,0 +1,198 @@
+"""Capacity-aware placement of instances across ADs, fault domains and shapes."""
+
+import os
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import NamedTuple
+
+import pulumi
+import pulumi_oci as oci
+
+# Instances in these states no longer hold their placement
+_GONE_STATES = ("TERMINATING", "TERMINATED")
+
+# Freeform tag naming the stack an instance belongs to
+STACK_TAG = "ronzz-stack"
+
+
+class Candidate(NamedTuple):
+    """One (shape, availability domain, fault domain) launch option."""
+
+    shape: str
+    availability_domain: str
+    fault_domain: str | None = None
+
+
+def candidates(shapes, availability_domains, fault_domains=None):
+    """Expand the preference lists into candidates, most preferred first.
+
+    Shape is the outermost preference, then availability domain, then fault
+    domain, so a fallback shape is only considered once every placement of
+    the preferred shape has been ruled out.
+    """
+    return [
+        Candidate(shape, availability_domain, fault_domain)
+        for shape in shapes
+        for availability_domain in availability_domains
+        for fault_domain in (fault_domains or [None])
+    ]
+
+
+def probe_capacity(candidate_list, probe, timeout=30.0):
+    """Probe all candidates concurrently.
+
+    ``probe`` is called as ``probe(candidate)`` and returns True when the
+    candidate has capacity. Returns a dict mapping each candidate to True,
+    False, or None when the probe failed or did not answer within
+    ``timeout`` seconds.
+    """
+    results = {candidate: None for candidate in candidate_list}
+    if not candidate_list:
+        return results
+    executor = ThreadPoolExecutor(max_workers=len(candidate_list))
+    try:
+        futures = {
+            executor.submit(probe, candidate): candidate for candidate in candidate_list
+        }
+        done, _ = wait(futures, timeout=timeout)
+        for future in done:
+            candidate = futures[future]
+            try:
+                results[candidate] = bool(future.result())
+            except Exception as error:
+                pulumi.log.warn(f"Capacity probe failed for {candidate}: {error}")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
+def schedule(candidate_list, probe, timeout=30.0):
+    """Return the candidates that can fit, in preference order.
+
+    Raises when every probe answered and none reported capacity. When some
+    probes could not answer (missing credentials, timeouts), those
+    candidates are kept after the confirmed ones so the launch can still be
+    attempted.
+    """
+    results = probe_capacity(candidate_list, probe, timeout=timeout)
+    available = [c for c in candidate_list if results[c] is True]
+    unknown = [c for c in candidate_list if results[c] is None]
+    if not available and not unknown:
+        raise Exception(
+            "No capacity for any placement candidate: "
+            + ", ".join(
+                f"{c.shape}/{c.availability_domain}/{c.fault_domain or 'any FD'}"
+                for c in candidate_list
+            )
+        )
+    if not available:
+        pulumi.log.warn(
+            "Capacity could not be confirmed for any candidate; "
+            "falling back to the configured preference order"
+        )
+    return available + unknown
+
+
+def stack_tag():
+    """Return the ``STACK_TAG`` value of this stack's instances."""
+    return "/".join(
+        part
+        for part in (
+            pulumi.get_organization(),
+            pulumi.get_project(),
+            pulumi.get_stack(),
+        )
+        if part
+    )
+
+
+def existing_placements(invokes, compartment_id, names):
+    """Return ``{name: Candidate}`` for the named instances already launched.
+
+    Moving an instance to another availability domain or fault domain
+    replaces it, so only instances that do not exist yet are scheduled; the
+    others keep the placement they were launched with. Only instances tagged
+    with this stack's ``STACK_TAG`` count: other stacks in the compartment
+    may use the same names.
+    """
+    names = set(names)
+    tag = stack_tag()
+    instances = invokes.invoke(
+        oci.core.get_instances, compartment_id=compartment_id
+    ).instances
+    return {
+        instance.display_name: Candidate(
+            instance.shape, instance.availability_domain, instance.fault_domain
+        )
+        for instance in instances or []
+        if instance.display_name in names
+        and instance.state not in _GONE_STATES
+        and (instance.freeform_tags or {}).get(STACK_TAG) == tag
+    }
+
+
+def _sdk_config(oci_sdk, region=None):
+    # Mirror the provider's authentication: environment variables first,
+    # then the OCI CLI configuration file
+    if os.environ.get("OCI_TENANCY_OCID"):
+        sdk_config = {
+            "tenancy": os.environ["OCI_TENANCY_OCID"],
+            "user": os.environ.get("OCI_USER_OCID"),
+            "fingerprint": os.environ.get("OCI_FINGERPRINT"),
+            "key_file": os.environ.get("OCI_PRIVATE_KEY_PATH"),
+            "region": os.environ.get("OCI_REGION"),
+        }
+    else:
+        sdk_config = oci_sdk.config.from_file(
+            os.environ.get("OCI_CLI_CONFIG_FILE", "~/.oci/config"),
+            os.environ.get("OCI_CLI_PROFILE", "DEFAULT"),
+        )
+    if region:
+        sdk_config["region"] = region
+    return sdk_config
+
+
+def sdk_capacity_probe(compartment_id, ocpus=None, memory_in_gbs=None, region=None):
+    """Build a probe backed by the Compute capacity report API.
+
+    Requires the optional ``oci`` Python SDK (``pip install oci``); returns
+    None when it is not installed or has no usable configuration, so callers
+    can skip probing.
+    """
+    try:
+        import oci as oci_sdk
+    except ImportError:
+        return None
+
+    try:
+        client = oci_sdk.core.ComputeClient(_sdk_config(oci_sdk, region))
+    except oci_sdk.exceptions.ClientError as error:
+        # Missing ~/.oci/config, unknown profile, incomplete OCI_* variables
+        pulumi.log.warn(f"Cannot configure the oci Python SDK: {error}")
+        return None
+    models = oci_sdk.core.models
+
+    def probe(candidate):
+        shape_config = None
+        if ocpus is not None or memory_in_gbs is not None:
+            shape_config = models.CapacityReportInstanceShapeConfig(
+                ocpus=ocpus, memory_in_gbs=memory_in_gbs
+            )
+        report = client.create_compute_capacity_report(
+            models.CreateComputeCapacityReportDetails(
+                compartment_id=compartment_id,
+                availability_domain=candidate.availability_domain,
+                shape_availabilities=[
+                    models.CreateCapacityReportShapeAvailabilityDetails(
+                        instance_shape=candidate.shape,
+                        fault_domain=candidate.fault_domain,
+                        instance_shape_config=shape_config,
+                    )
+                ],
+            )
+        ).data
+        return all(
+            availability.availability_status == "AVAILABLE"
+            for availability in report.shape_availabilities
+        )
+
+    return probe
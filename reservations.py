@@ -0,0 +1,179 @@
+"""Compute capacity reservations and the local fleet-size pre-flight check.
+
+A ``capacity_reservation`` config object either reserves capacity for a
+number of instances of the configured shape and size per availability
+domain and fault domain (one ``ComputeCapacityReservation`` per AD), or
+points at an existing reservation by ``id``. Instances launch into the
+reservation through ``capacity_reservation_id``, and the requested fleet is
+compared with the reserved slots before anything is registered, so a fleet
+that cannot fit fails at once instead of partway through an update.
+"""
+
+from collections import Counter
+from typing import NamedTuple
+
+import pulumi
+import pulumi_oci as oci
+
+
+class Reservation(NamedTuple):
+    """Reserved instance slots in one availability domain / fault domain."""
+
+    availability_domain: str
+    fault_domain: str | None
+    count: int
+
+
+def parse_reservations(settings, default_availability_domain, size):
+    """Validate the ``reservations`` list of a ``capacity_reservation`` object.
+
+    Each entry reserves ``count`` instances, or ``ocpus`` worth of instances
+    of the configured ``size``, in ``availability_domain`` (default: the
+    stack's) and optionally one ``fault_domain``.
+    """
+    reservations = []
+    seen = set()
+    for entry in settings.get("reservations") or []:
+        availability_domain = (
+            entry.get("availability_domain") or default_availability_domain
+        )
+        if not availability_domain:
+            raise ValueError(
+                "capacity_reservation.reservations entries need an "
+                "availability_domain"
+            )
+        fault_domain = entry.get("fault_domain")
+        if (availability_domain, fault_domain) in seen:
+            raise ValueError(
+                f"Duplicate capacity reservation for {availability_domain}/"
+                f"{fault_domain or 'any FD'}"
+            )
+        seen.add((availability_domain, fault_domain))
+
+        if "ocpus" in entry:
+            ocpus = float(entry["ocpus"])
+            if ocpus % size.ocpus:
+                raise ValueError(
+                    f"capacity_reservation ocpus ({ocpus:g}) must be a multiple "
+                    f"of the instance size ({size.ocpus:g} OCPUs)"
+                )
+            count = int(ocpus // size.ocpus)
+        else:
+            count = int(entry.get("count", 1))
+        if count < 1:
+            raise ValueError("capacity_reservation entries must reserve at least 1")
+        reservations.append(Reservation(availability_domain, fault_domain, count))
+    if not reservations and not settings.get("id"):
+        raise ValueError("capacity_reservation needs reservations or an id")
+    return reservations
+
+
+def preflight(reservations, requested):
+    """Raise ValueError when ``requested`` slots exceed the reservations.
+
+    ``requested`` is a list of ``(availability_domain, fault_domain)`` pairs,
+    one per instance. An instance pinned to a fault domain uses a
+    reservation for that fault domain first, then one without a fault
+    domain; an unpinned instance can use any slot in its AD.
+    """
+    free = Counter()
+    for reservation in reservations:
+        free[reservation.availability_domain, reservation.fault_domain] += (
+            reservation.count
+        )
+    short = Counter()
+    for availability_domain, fault_domain in requested:
+        if fault_domain:
+            keys = [(availability_domain, fault_domain), (availability_domain, None)]
+        else:
+            # OCI picks the fault domain, so any slot in the AD will do
+            keys = sorted(
+                (key for key in free if key[0] == availability_domain),
+                key=lambda key: key[1] is not None,
+            )
+        for key in keys:
+            if free[key] > 0:
+                free[key] -= 1
+                break
+        else:
+            short[availability_domain, fault_domain] += 1
+    if short:
+        raise ValueError(
+            "Requested instances exceed the reserved capacity: "
+            + ", ".join(
+                f"{count} more in {availability_domain}/{fault_domain or 'any FD'}"
+                for (availability_domain, fault_domain), count in sorted(
+                    short.items(), key=lambda item: (item[0][0], item[0][1] or "")
+                )
+            )
+        )
+
+
+def check_existing(invokes, reservation_id, requested):
+    """Check ``requested`` slots against an existing reservation's headroom."""
+    reservation = invokes.invoke(
+        oci.core.get_compute_capacity_reservation,
+        capacity_reservation_id=reservation_id,
+    )
+    preflight(
+        [
+            Reservation(
+                reservation.availability_domain,
+                entry.fault_domain,
+                int(entry.reserved_count),
+            )
+            for entry in reservation.instance_reservation_configs
+        ],
+        requested,
+    )
+    headroom = int(reservation.reserved_instance_count) - int(
+        reservation.used_instance_count
+    )
+    if len(requested) > headroom:
+        # Used slots include instances this stack launched on earlier runs
+        pulumi.log.warn(
+            f"Capacity reservation {reservation_id} has {headroom} unused slots "
+            f"for {len(requested)} requested instances; launches beyond this "
+            "stack's existing instances may fail"
+        )
+    return reservation.availability_domain
+
+
+def create_reservations(name, compartment_id, shape, size, reservations):
+    """Create one reservation per availability domain.
+
+    Returns a dict mapping each availability domain to its reservation.
+    """
+    by_availability_domain = {}
+    for reservation in reservations:
+        by_availability_domain.setdefault(reservation.availability_domain, []).append(
+            reservation
+        )
+    core = oci.core
+    config_args = core.ComputeCapacityReservationInstanceReservationConfigArgs
+    shape_config_args = (
+        core.ComputeCapacityReservationInstanceReservationConfigInstanceShapeConfigArgs
+    )
+    created = {}
+    for availability_domain, entries in by_availability_domain.items():
+        # "Uocm:PHX-AD-1" -> "phx-ad-1"
+        suffix = availability_domain.rsplit(":", 1)[-1].lower()
+        created[availability_domain] = oci.core.ComputeCapacityReservation(
+            f"{name}-{suffix}",
+            compartment_id=compartment_id,
+            availability_domain=availability_domain,
+            display_name=f"{name}-{suffix}",
+            is_default_reservation=False,
+            instance_reservation_configs=[
+                config_args(
+                    instance_shape=shape,
+                    fault_domain=entry.fault_domain,
+                    reserved_count=str(entry.count),
+                    instance_shape_config=shape_config_args(
+                        ocpus=size.ocpus, memory_in_gbs=size.memory_in_gbs
+                    ),
+                )
+                for entry in entries
+            ],
+        )
+    return created
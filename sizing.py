@@ -0,0 +1,105 @@
+"""Flex shape sizing: named presets and local validation of OCPU/memory."""
+
+from typing import NamedTuple
+
+# Named sizes as (OCPUs, memory in GB); "standard" matches the documented
+# 4 OCPU / 24 GB A1 instance
+PRESETS = {
+    "micro": (1, 6),
+    "small": (2, 12),
+    "standard": (4, 24),
+    "large": (8, 48),
+    "xlarge": (16, 96),
+    "memory-large": (8, 128),
+}
+
+# Per-shape limits: max OCPUs, GB of memory per OCPU (min, max), max total
+# memory in GB and whether burstable baselines are supported
+SHAPE_LIMITS = {
+    "VM.Standard.A1.Flex": (80, (1, 64), 512, False),
+    "VM.Standard.A2.Flex": (78, (1, 64), 946, False),
+    "VM.Standard.E3.Flex": (64, (1, 64), 1024, True),
+    "VM.Standard.E4.Flex": (64, (1, 64), 1024, True),
+    "VM.Standard.E5.Flex": (94, (1, 64), 1049, True),
+    "VM.Standard3.Flex": (32, (1, 64), 512, True),
+}
+
+BASELINES = {
+    "1/8": "BASELINE_1_8",
+    "1/2": "BASELINE_1_2",
+    "1": "BASELINE_1_1",
+}
+
+
+class Size(NamedTuple):
+    ocpus: float
+    memory_in_gbs: float
+    baseline_ocpu_utilization: str | None = None
+
+
+def resolve_size(preset=None, ocpus=None, memory_in_gbs=None, baseline=None):
+    """Combine a preset with explicit overrides into a ``Size``.
+
+    Explicit ``ocpus``/``memory_in_gbs`` take precedence over the preset;
+    without either, the ``standard`` preset is used. ``baseline`` accepts
+    ``1/8``, ``1/2``, ``1`` or the API enum value.
+    """
+    if preset is not None and preset not in PRESETS:
+        raise ValueError(
+            f"Unknown instance_size {preset!r}; "
+            f"expected one of: {', '.join(PRESETS)}"
+        )
+    preset_ocpus, preset_memory = PRESETS[preset or "standard"]
+    baseline_value = None
+    if baseline is not None:
+        baseline = str(baseline)
+        if baseline in BASELINES:
+            baseline_value = BASELINES[baseline]
+        elif baseline in BASELINES.values():
+            baseline_value = baseline
+        else:
+            raise ValueError(
+                f"Unknown baseline_ocpu_utilization {baseline!r}; "
+                f"expected one of: {', '.join(BASELINES)}"
+            )
+    return Size(
+        float(ocpus if ocpus is not None else preset_ocpus),
+        float(memory_in_gbs if memory_in_gbs is not None else preset_memory),
+        baseline_value,
+    )
+
+
+def validate_size(shape, size):
+    """Raise ValueError when ``size`` cannot be launched on ``shape``.
+
+    Runs locally so invalid combinations fail before any API call.
+    """
+    if not shape.endswith(".Flex"):
+        raise ValueError(
+            f"{shape} is a fixed shape and cannot take shape_config; "
+            "use a .Flex shape such as VM.Standard.A1.Flex"
+        )
+    if size.ocpus < 1 or size.ocpus != int(size.ocpus):
+        raise ValueError(f"ocpus must be a whole number >= 1, got {size.ocpus:g}")
+    limits = SHAPE_LIMITS.get(shape)
+    if limits is None:
+        # Unknown flex shape: leave the remaining checks to the API
+        return
+    max_ocpus, (min_ratio, max_ratio), max_memory, burstable = limits
+    if size.ocpus > max_ocpus:
+        raise ValueError(
+            f"{shape} supports at most {max_ocpus} OCPUs, got {size.ocpus:g}"
+        )
+    ratio = size.memory_in_gbs / size.ocpus
+    if not min_ratio <= ratio <= max_ratio:
+        raise ValueError(
+            f"{shape} needs {min_ratio}-{max_ratio} GB of memory per OCPU; "
+            f"{size.memory_in_gbs:g} GB / {size.ocpus:g} OCPUs is {ratio:g}"
+        )
+    if size.memory_in_gbs > max_memory:
+        raise ValueError(
+            f"{shape} supports at most {max_memory} GB of memory, "
+            f"got {size.memory_in_gbs:g}"
+        )
+    if size.baseline_ocpu_utilization not in (None, "BASELINE_1_1") and not burstable:
+        raise ValueError(f"{shape} does not support burstable (baseline) OCPUs")
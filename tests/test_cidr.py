@@ -0,0 +1,106 @@
+"""Subnet CIDR and DNS label allocation."""
+
+import pytest
+
+from cidr import allocate, dns_labels, ipv6_cidr, parse_tiers, prefix_for_hosts
+
+ADS = ["Uocm:PHX-AD-1", "Uocm:PHX-AD-2"]
+
+
+def plans_by_name(plans):
+    return {plan.name: plan for plan in plans}
+
+
+def test_prefix_for_hosts_leaves_room_for_reserved_addresses():
+    assert prefix_for_hosts(1) == 30
+    assert prefix_for_hosts(61) == 26
+    assert prefix_for_hosts(253) == 24
+    assert prefix_for_hosts(254) == 23
+
+
+def test_allocation_is_deterministic_and_largest_first():
+    tiers = parse_tiers(
+        [
+            {"name": "edge", "hosts": 60},
+            {"name": "app", "prefix_length": 22, "availability_domains": ADS},
+        ]
+    )
+    plans = plans_by_name(allocate("10.0.0.0/16", tiers))
+
+    assert {name: plan.cidr_block for name, plan in plans.items()} == {
+        "edge": "10.0.8.0/26",
+        "app-phx-ad-1": "10.0.0.0/22",
+        "app-phx-ad-2": "10.0.4.0/22",
+    }
+    assert allocate("10.0.0.0/16", tiers) == allocate("10.0.0.0/16", tiers)
+
+
+def test_adding_a_tier_keeps_existing_subnets():
+    before = allocate("10.0.0.0/16", parse_tiers([{"name": "edge", "hosts": 60}]))
+    previous = {plan.name: plan.cidr_block for plan in before}
+    labels = {plan.name: plan.dns_label for plan in before}
+
+    after = allocate(
+        "10.0.0.0/16",
+        parse_tiers(
+            [{"name": "app", "prefix_length": 20}, {"name": "edge", "hosts": 60}]
+        ),
+        previous,
+        labels,
+    )
+
+    assert plans_by_name(after)["edge"] == before[0]
+
+
+def test_adding_a_subnet_keeps_existing_dns_labels():
+    # Both names truncate to "applicationphxa"; the one deployed first keeps it
+    only_ad_2 = parse_tiers(
+        [{"name": "application", "hosts": 10, "availability_domains": [ADS[1]]}]
+    )
+    (before,) = allocate("10.0.0.0/16", only_ad_2)
+    assert before.dns_label == "applicationphxa"
+
+    both = parse_tiers(
+        [{"name": "application", "hosts": 10, "availability_domains": ADS}]
+    )
+    after = plans_by_name(
+        allocate(
+            "10.0.0.0/16",
+            both,
+            {before.name: before.cidr_block},
+            {before.name: before.dns_label},
+        )
+    )
+
+    assert after["application-phx-ad-2"] == before
+    assert after["application-phx-ad-1"].dns_label == "applicationphx1"
+
+
+def test_moved_subnet_gets_a_fresh_label():
+    tiers = parse_tiers([{"name": "edge", "prefix_length": 24}])
+    (plan,) = allocate(
+        "10.0.0.0/16", tiers, {"edge": "10.0.0.0/26"}, {"edge": "oldlabel"}
+    )
+
+    assert plan.dns_label == "edge"
+
+
+def test_dns_labels_are_unique_and_short():
+    labels = dns_labels(["web-frontend-phx-ad-1", "web-frontend-phx-ad-2", "db"])
+
+    assert len(set(labels.values())) == 3
+    assert all(len(label) <= 15 and label.isalnum() for label in labels.values())
+
+
+def test_full_vcn_is_rejected():
+    tiers = parse_tiers(
+        [{"name": name, "prefix_length": 25} for name in ("a", "b", "c")]
+    )
+    with pytest.raises(ValueError, match="No free /25 left"):
+        allocate("10.0.0.0/24", tiers)
+
+
+def test_ipv6_cidr():
+    assert ipv6_cidr("2603:c020:1:100::/56", 3) == "2603:c020:1:103::/64"
+    with pytest.raises(ValueError):
+        ipv6_cidr("2603:c020:1:100::/56", 256)
@@ -0,0 +1,112 @@
+"""Rendering of cloud-init documents and tuning profiles."""
+
+import base64
+import hashlib
+
+import pytest
+
+import cloud_init
+from cloud_init import PROFILES, merge_parts, render, tuning_part, user_data
+
+yaml = pytest.importorskip("yaml")
+
+# Values that need quoting or block scalars in YAML
+AWKWARD = {
+    "write_files": [
+        {
+            "path": "/etc/ronzz/awkward.conf",
+            "content": "key: value\n# not a comment\n\n  indented\n",
+        },
+        {"path": "/etc/ronzz/no-newline", "content": "first\nlast"},
+    ],
+    "runcmd": [["echo", "a: b", "'quoted'", '"double"', "- dash", "yes", "1.0"]],
+    "bootcmd": [],
+    "package_upgrade": False,
+    "ntp": {"enabled": True, "servers": ["169.254.169.254"]},
+    "key with spaces": "value",
+}
+
+
+@pytest.mark.parametrize("profile", sorted(PROFILES))
+def test_render_is_deterministic(profile):
+    first = render(merge_parts(tuning_part(profile)))
+    second = render(merge_parts(tuning_part(profile)))
+
+    assert first == second
+
+
+def test_hash_covers_the_body():
+    text, digest = render(AWKWARD)
+    magic, header, body = text.split("\n", 2)
+
+    assert magic == "#cloud-config"
+    assert header == f"# content-hash: sha256:{digest}"
+    assert digest == hashlib.sha256(body.encode()).hexdigest()
+
+
+def test_hash_changes_with_content():
+    _, digest = render(merge_parts(tuning_part("throughput")))
+    _, changed = render(merge_parts(tuning_part("throughput"), {"runcmd": ["true"]}))
+
+    assert digest != changed
+
+
+@pytest.mark.parametrize("profile", sorted(PROFILES))
+def test_profiles_render_valid_yaml(profile):
+    document = merge_parts(tuning_part(profile))
+    text, _ = render(document)
+
+    assert text.startswith("#cloud-config\n")
+    assert yaml.safe_load(text) == document
+
+
+def test_awkward_values_round_trip():
+    text, _ = render(AWKWARD)
+
+    assert yaml.safe_load(text) == AWKWARD
+
+
+def test_merge_parts_concatenates_lists_in_order():
+    document = merge_parts(
+        {"runcmd": ["first"], "write_files": [{"path": "/a"}]},
+        {"runcmd": ["second", "third"], "package_upgrade": True},
+        {"runcmd": ["fourth"], "write_files": [{"path": "/b"}]},
+    )
+
+    assert document["runcmd"] == ["first", "second", "third", "fourth"]
+    assert document["write_files"] == [{"path": "/a"}, {"path": "/b"}]
+    assert list(document) == ["runcmd", "write_files", "package_upgrade"]
+
+
+def test_merge_parts_updates_mappings_and_overrides_scalars():
+    document = merge_parts(
+        {"ntp": {"enabled": True}, "package_upgrade": False},
+        {"ntp": {"servers": ["x"]}, "package_upgrade": True},
+    )
+
+    assert document == {
+        "ntp": {"enabled": True, "servers": ["x"]},
+        "package_upgrade": True,
+    }
+
+
+def test_merge_parts_leaves_its_inputs_alone():
+    part = {"runcmd": ["first"]}
+    merge_parts(part, {"runcmd": ["second"]})
+
+    assert part == {"runcmd": ["first"]}
+
+
+def test_unknown_profile():
+    with pytest.raises(ValueError, match="Unknown tuning_profile 'fast'"):
+        tuning_part("fast")
+
+
+def test_user_data_is_base64():
+    text, _ = render(merge_parts(tuning_part("low-latency")))
+
+    assert base64.b64decode(user_data(text)).decode() == text
+
+
+def test_golden_snapshots_are_current():
+    assert cloud_init.main(["--check-golden"]) == 0
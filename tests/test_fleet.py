@@ -0,0 +1,160 @@
+"""Fleet expansion, and a 500-node evaluation against the mocked provider."""
+
+import pytest
+
+from fleet import plan_fleet
+from inline_program import run_mocked
+from mocks import INSTANCE_TYPE, OciMocks
+
+AVAILABILITY_DOMAINS = ["AD-1", "AD-2", "AD-3"]
+FAULT_DOMAINS = ["FAULT-DOMAIN-1", "FAULT-DOMAIN-2"]
+
+
+def test_default_fleet_uses_the_default_availability_domain():
+    nodes = plan_fleet({"count": 2}, "AD-1")
+
+    assert [node.name for node in nodes] == ["ronzz-worker-0", "ronzz-worker-1"]
+    assert {node.availability_domain for node in nodes} == {"AD-1"}
+    assert {node.fault_domain for node in nodes} == {None}
+    assert nodes[0].vnic_name == "ronzz-worker-0-vnic"
+
+
+def test_spread_round_robins_availability_domains_then_fault_domains():
+    spread = {
+        "availability_domains": AVAILABILITY_DOMAINS,
+        "fault_domains": FAULT_DOMAINS,
+    }
+    nodes = plan_fleet({"count": 7, "spread": spread}, "AD-1")
+
+    assert [(node.availability_domain, node.fault_domain) for node in nodes] == [
+        ("AD-1", "FAULT-DOMAIN-1"),
+        ("AD-2", "FAULT-DOMAIN-1"),
+        ("AD-3", "FAULT-DOMAIN-1"),
+        ("AD-1", "FAULT-DOMAIN-2"),
+        ("AD-2", "FAULT-DOMAIN-2"),
+        ("AD-3", "FAULT-DOMAIN-2"),
+        ("AD-1", "FAULT-DOMAIN-1"),
+    ]
+
+
+def test_placements_replace_the_spread():
+    placements = [("AD-2", "FAULT-DOMAIN-3"), ("AD-3", None)]
+    nodes = plan_fleet(
+        {"count": 3, "spread": {"availability_domains": AVAILABILITY_DOMAINS}},
+        "AD-1",
+        placements=placements,
+    )
+
+    assert [(node.availability_domain, node.fault_domain) for node in nodes] == [
+        ("AD-2", "FAULT-DOMAIN-3"),
+        ("AD-3", None),
+        ("AD-2", "FAULT-DOMAIN-3"),
+    ]
+
+
+def test_node_overrides():
+    fleet = {
+        "count": 2,
+        "name_prefix": "web",
+        "nodes": {
+            "web-1": {
+                "availability_domain": "AD-3",
+                "image_id": "ocid1.image.oc1..custom",
+                "metadata": {"role": "canary"},
+            }
+        },
+    }
+    first, second = plan_fleet(fleet, "AD-1")
+
+    assert (first.availability_domain, first.image_id, first.metadata) == (
+        "AD-1",
+        None,
+        {},
+    )
+    assert second.availability_domain == "AD-3"
+    assert second.image_id == "ocid1.image.oc1..custom"
+    assert second.metadata == {"role": "canary"}
+
+
+def test_unknown_node_is_rejected():
+    with pytest.raises(ValueError, match="unknown nodes: ronzz-worker-5"):
+        plan_fleet({"count": 2, "nodes": {"ronzz-worker-5": {}}}, "AD-1")
+
+
+def test_unsupported_override_key_is_rejected():
+    with pytest.raises(ValueError, match="unsupported keys: shape"):
+        plan_fleet({"count": 1, "nodes": {"ronzz-worker-0": {"shape": "x"}}}, "AD-1")
+
+
+def test_count_must_be_positive():
+    with pytest.raises(ValueError, match="at least 1"):
+        plan_fleet({"count": 0}, "AD-1")
+
+
+def test_500_node_fleet_against_mocks(tmp_path):
+    config = {
+        "compartment_id": "ocid1.compartment.oc1..test",
+        "availability_domain": "AD-1",
+        "ssh_public_key": "ssh-ed25519 AAAAC3NzaC1lZDI1NTE5AAAAITest test@example",
+        "image_cache_path": str(tmp_path / "images.json"),
+        "fleet": {
+            "count": 500,
+            "spread": {
+                "availability_domains": AVAILABILITY_DOMAINS,
+                "fault_domains": FAULT_DOMAINS,
+            },
+        },
+    }
+    mocks = OciMocks()
+    outputs = {}
+    run_mocked(config, mocks, stack="test", outputs=outputs)
+
+    assert mocks.resources[INSTANCE_TYPE] == 500
+    assert sorted(outputs["nodes"]) == sorted(
+        f"ronzz-worker-{index}" for index in range(500)
+    )
+    assert set(outputs["nodes"]["ronzz-worker-499"]) == {
+        "id",
+        "time_created",
+        "public_ip",
+        "private_ip",
+    }
+
+
+class MetadataMocks(OciMocks):
+    """Mocks recording the metadata each instance is launched with."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.metadata = {}
+
+    def new_resource(self, args):
+        if args.typ == INSTANCE_TYPE:
+            self.metadata[args.name] = args.inputs["metadata"]
+        return super().new_resource(args)
+
+
+def test_node_metadata_overrides_the_stack_metadata(tmp_path):
+    config = {
+        "compartment_id": "ocid1.compartment.oc1..test",
+        "availability_domain": "AD-1",
+        "ssh_public_key": "ssh-ed25519 AAAAC3NzaC1lZDI1NTE5AAAAITest test@example",
+        "image_cache_path": str(tmp_path / "images.json"),
+        "fleet": {
+            "count": 2,
+            "nodes": {
+                "ronzz-worker-1": {
+                    "metadata": {"ssh_authorized_keys": "ssh-ed25519 AAAA canary"}
+                }
+            },
+        },
+    }
+    mocks = MetadataMocks()
+    run_mocked(config, mocks, stack="test")
+
+    assert mocks.metadata["ronzz-worker-0"]["ssh_authorized_keys"] == (
+        config["ssh_public_key"]
+    )
+    assert mocks.metadata["ronzz-worker-1"]["ssh_authorized_keys"] == (
+        "ssh-ed25519 AAAA canary"
+    )
@@ -0,0 +1,111 @@
+"""Image lookup cache, mostly exercised through the mocked provider."""
+
+import json
+
+from image_cache import ImageCache
+from inline_program import run_mocked
+from mocks import INSTANCE_TYPE, OciMocks
+
+CONFIG = {
+    "compartment_id": "ocid1.compartment.oc1..test",
+    "ssh_public_key": "ssh-ed25519 AAAAC3NzaC1lZDI1NTE5AAAAITest test@example",
+    "availability_domain": "AD-1",
+}
+
+GET_IMAGES = "oci:Core/getImages:getImages"
+
+
+class RegionalMocks(OciMocks):
+    """Mocks answering image lookups with an OCID of ``region``."""
+
+    def __init__(self, region, **kwargs):
+        super().__init__(**kwargs)
+        self.region = region
+        self.source_ids = []
+
+    def new_resource(self, args):
+        if args.typ == INSTANCE_TYPE:
+            self.source_ids.append(args.inputs["sourceDetails"]["sourceId"])
+        return super().new_resource(args)
+
+    def call(self, args):
+        if args.token == GET_IMAGES:
+            super().call(args)
+            return {"images": [{"id": f"ocid1.image.oc1.{self.region}..test"}]}
+        return super().call(args)
+
+
+def test_regions_sharing_a_cache_file_keep_their_own_images(tmp_path):
+    cache_path = tmp_path / "images.json"
+    for region in ["eu-paris-1", "us-ashburn-1"]:
+        mocks = RegionalMocks(region)
+        run_mocked(
+            {**CONFIG, "oci:region": region, "image_cache_path": str(cache_path)},
+            mocks,
+            stack=region,
+        )
+
+        assert mocks.invokes[GET_IMAGES] == 1
+        assert mocks.source_ids == [f"ocid1.image.oc1.{region}..test"]
+
+    entries = json.loads(cache_path.read_text())
+    assert sorted(entry["image_id"] for entry in entries.values()) == [
+        "ocid1.image.oc1.eu-paris-1..test",
+        "ocid1.image.oc1.us-ashburn-1..test",
+    ]
+
+
+def evaluate(cache_path, **config):
+    mocks = OciMocks()
+    run_mocked(
+        {**CONFIG, "image_cache_path": str(cache_path), **config}, mocks, stack="test"
+    )
+    return mocks.invokes[GET_IMAGES]
+
+
+def test_second_run_reads_the_image_from_the_cache(tmp_path):
+    cache_path = tmp_path / "images.json"
+
+    assert evaluate(cache_path) == 1
+    assert evaluate(cache_path) == 0
+
+
+def test_expired_entries_are_fetched_again(tmp_path):
+    cache_path = tmp_path / "images.json"
+    evaluate(cache_path, image_cache_ttl=3600)
+    entries = json.loads(cache_path.read_text())
+    for entry in entries.values():
+        entry["fetched_at"] -= 7200
+    cache_path.write_text(json.dumps(entries))
+
+    assert evaluate(cache_path, image_cache_ttl=3600) == 1
+    assert evaluate(cache_path, image_cache_ttl=3600) == 0
+
+
+def test_refresh_bypasses_the_cache(tmp_path):
+    cache_path = tmp_path / "images.json"
+    evaluate(cache_path)
+
+    assert evaluate(cache_path, image_cache_refresh="true") == 1
+
+
+def test_ttl_is_measured_from_the_fetch(tmp_path):
+    fetched = []
+    now = [1000.0]
+
+    def fetch(**kwargs):
+        fetched.append(kwargs)
+        return "ocid1.image.oc1..test"
+
+    cache = ImageCache(
+        tmp_path / "images.json", ttl=60, fetch=fetch, clock=lambda: now[0]
+    )
+    args = ("ocid1.compartment.oc1..test", "Canonical Ubuntu", "24.04", "VM.Test")
+
+    assert cache.get(*args) == "ocid1.image.oc1..test"
+    now[0] += 59
+    cache.get(*args)
+    assert len(fetched) == 1
+    now[0] += 1
+    cache.get(*args)
+    assert len(fetched) == 2
@@ -0,0 +1,44 @@
+"""Multi-region runs evaluated against the mocked provider."""
+
+import shutil
+
+import pytest
+
+from mocks import INSTANCE_TYPE
+from multi_region import parse_target, run_target, target_config
+
+
+def test_mocked_preview_of_one_target():
+    target = parse_target("eu-paris-1,ocid1.compartment.oc1..test,CDG-AD-1")
+    config = target_config(target, {"fleet": {"count": 3}})
+
+    result = run_target("preview", "eu-paris-1", config, mocked=True)
+
+    assert result["succeeded"], result["error"]
+    assert result["region"] == "eu-paris-1"
+    assert result["changes"][INSTANCE_TYPE] == 3
+
+
+def test_failures_are_reported_not_raised():
+    target = parse_target("eu-paris-1,ocid1.compartment.oc1..test,CDG-AD-1")
+    config = target_config(target, {"fleet": {"count": 0}})
+
+    result = run_target("preview", "eu-paris-1", config, mocked=True)
+
+    assert not result["succeeded"]
+    assert result["error"] == "fleet.count must be at least 1"
+
+
+@pytest.mark.skipif(not shutil.which("pulumi"), reason="needs the Pulumi CLI")
+def test_file_backend_preview_against_mocks(tmp_path, monkeypatch):
+    monkeypatch.setenv("PULUMI_CONFIG_PASSPHRASE", "test")
+    target = parse_target("eu-paris-1,ocid1.compartment.oc1..test,CDG-AD-1")
+    config = target_config(target, {"fleet": {"count": 2}})
+
+    result = run_target(
+        "preview", "eu-paris-1", config, backend=f"file://{tmp_path}", mocked=True
+    )
+
+    assert result["succeeded"], result["error"]
+    assert result["changes"][INSTANCE_TYPE] == 2
+    assert list(tmp_path.rglob("eu-paris-1.json"))
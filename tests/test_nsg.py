@@ -0,0 +1,91 @@
+"""Compilation of per-role rule sets into network security group rules."""
+
+import pytest
+
+from nsg import MAX_GROUPS_PER_VNIC, compile_groups, merge_rules, parse_rule
+
+
+def names(rules):
+    return {rule.digest() for rule in rules}
+
+
+def test_parse_rule_normalizes():
+    rule = parse_rule("web", {"ports": "8000-8080", "source": "10.0.0.0/8"})
+
+    assert rule.direction == "INGRESS"
+    assert rule.protocol == "6"
+    assert (rule.peer, rule.peer_type) == ("10.0.0.0/8", "CIDR_BLOCK")
+    assert (rule.min_port, rule.max_port) == (8000, 8080)
+
+
+def test_parse_rule_errors():
+    with pytest.raises(ValueError, match="need a source"):
+        parse_rule("web", {"port": 80})
+    with pytest.raises(ValueError, match="ports need protocol tcp or udp"):
+        parse_rule("web", {"protocol": "icmp", "port": 80, "source": "0.0.0.0/0"})
+    with pytest.raises(ValueError, match="unknown protocol"):
+        parse_rule("web", {"protocol": "sctp", "source": "0.0.0.0/0"})
+
+
+def test_identical_rules_are_merged():
+    rules = merge_rules(
+        [
+            parse_rule("web", {"port": 443, "source": "0.0.0.0/0"}),
+            parse_rule(
+                "web", {"port": 443, "source": "0.0.0.0/0", "description": "TLS"}
+            ),
+        ]
+    )
+
+    assert len(rules) == 1
+    assert rules[0].description == "TLS"
+
+
+def test_adding_a_port_leaves_existing_rules_alone():
+    before = merge_rules([parse_rule("web", {"port": 80, "source": "0.0.0.0/0"})])
+    after = merge_rules(
+        [
+            parse_rule("web", {"port": 80, "source": "0.0.0.0/0"}),
+            parse_rule("web", {"port": 81, "source": "0.0.0.0/0"}),
+            parse_rule("web", {"protocol": "tcp", "source": "0.0.0.0/0"}),
+        ]
+    )
+
+    assert names(before) < names(after)
+    assert len(after) == 3
+
+
+def test_description_does_not_change_the_name():
+    plain = parse_rule("web", {"port": 80, "source": "0.0.0.0/0"})
+    described = parse_rule(
+        "web", {"port": 80, "source": "0.0.0.0/0", "description": "HTTP"}
+    )
+
+    assert plain.digest() == described.digest()
+
+
+def test_rules_shared_by_attached_roles_are_kept_once():
+    settings = {
+        "base": [{"port": 22, "source": "10.0.0.0/8"}],
+        "web": [
+            {"port": 22, "source": "10.0.0.0/8"},
+            {"port": 443, "source": "0.0.0.0/0"},
+        ],
+        "peers": [{"port": 22, "source": "10.0.0.0/8"}],
+    }
+    groups = compile_groups(settings, attached=["base", "web"])
+
+    assert [rule.min_port for rule in groups["base"]] == [22]
+    assert [rule.min_port for rule in groups["web"]] == [443]
+    # Not attached to the instances, so it keeps its own copy
+    assert [rule.min_port for rule in groups["peers"]] == [22]
+
+
+def test_group_references_and_limits():
+    with pytest.raises(ValueError, match="unknown group db"):
+        compile_groups({"web": [{"port": 5432, "source": "nsg:db"}]})
+    with pytest.raises(ValueError, match="Unknown security groups: db"):
+        compile_groups({"web": []}, attached=["db"])
+    too_many = {f"role{index}": [] for index in range(MAX_GROUPS_PER_VNIC + 1)}
+    with pytest.raises(ValueError, match="at most 5 security groups"):
+        compile_groups(too_many)
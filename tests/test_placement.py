@@ -0,0 +1,119 @@
+"""Placement scheduling against the mocked provider."""
+
+import pytest
+
+import placement
+from inline_program import PROJECT, run_mocked
+from mocks import INSTANCE_TYPE, OciMocks
+
+CONFIG = {
+    "compartment_id": "ocid1.compartment.oc1..test",
+    "ssh_public_key": "ssh-ed25519 AAAAC3NzaC1lZDI1NTE5AAAAITest test@example",
+    "placement": {
+        "availability_domains": ["AD-1", "AD-2"],
+        "fault_domains": ["FAULT-DOMAIN-1", "FAULT-DOMAIN-2"],
+    },
+}
+
+
+class RunningFleetMocks(OciMocks):
+    """Mocks with instances already launched and a record of launches.
+
+    The running instances are tagged as launched by ``stack``.
+    """
+
+    def __init__(self, running, stack="test", **kwargs):
+        super().__init__(**kwargs)
+        self.running = running
+        self.stack = stack
+        self.launched = {}
+        self.probes = 0
+
+    def capacity_probe(self, candidate):
+        self.probes += 1
+        return super().capacity_probe(candidate)
+
+    def new_resource(self, args):
+        if args.typ == INSTANCE_TYPE:
+            self.launched[args.name] = (
+                args.inputs["availabilityDomain"],
+                args.inputs.get("faultDomain"),
+            )
+            if args.name in self.running:
+                # Already launched: no capacity needed
+                return f"{args.name}-id", dict(args.inputs)
+        return super().new_resource(args)
+
+    def call(self, args):
+        if args.token == "oci:Core/getInstances:getInstances":
+            return {
+                "instances": [
+                    {
+                        "displayName": name,
+                        "shape": "VM.Standard.A1.Flex",
+                        "availabilityDomain": availability_domain,
+                        "faultDomain": fault_domain,
+                        "state": "RUNNING",
+                        "freeformTags": {
+                            placement.STACK_TAG: f"{PROJECT}/{self.stack}"
+                        },
+                    }
+                    for name, (availability_domain, fault_domain) in (
+                        self.running.items()
+                    )
+                ]
+            }
+        return super().call(args)
+
+
+@pytest.fixture
+def evaluate(tmp_path, monkeypatch):
+    def evaluate(mocks, **config):
+        def sdk_capacity_probe(*args, **kwargs):
+            return mocks.capacity_probe
+
+        monkeypatch.setattr(placement, "sdk_capacity_probe", sdk_capacity_probe)
+        run_mocked(
+            {
+                **CONFIG,
+                "image_cache_path": str(tmp_path / "images.json"),
+                **config,
+            },
+            mocks,
+            stack="test",
+        )
+
+    return evaluate
+
+
+def test_running_instances_keep_their_placement(evaluate):
+    # AD-1 has run out of capacity since ronzz-worker-0 was launched there
+    mocks = RunningFleetMocks(
+        {"ronzz-worker-0": ("AD-1", "FAULT-DOMAIN-1")},
+        faults={"out_of_capacity": [{"availability_domain": "AD-1"}]},
+    )
+    evaluate(mocks, fleet={"count": 3})
+
+    assert mocks.launched == {
+        "ronzz-worker-0": ("AD-1", "FAULT-DOMAIN-1"),
+        "ronzz-worker-1": ("AD-2", "FAULT-DOMAIN-2"),
+        "ronzz-worker-2": ("AD-2", "FAULT-DOMAIN-1"),
+    }
+
+
+def test_no_probes_when_every_instance_exists(evaluate):
+    mocks = RunningFleetMocks({"ronzz-linux-server": ("AD-2", "FAULT-DOMAIN-2")})
+    evaluate(mocks)
+
+    assert mocks.probes == 0
+    assert mocks.launched == {"ronzz-linux-server": ("AD-2", "FAULT-DOMAIN-2")}
+
+
+def test_instances_of_other_stacks_are_ignored(evaluate):
+    mocks = RunningFleetMocks(
+        {"ronzz-linux-server": ("AD-2", "FAULT-DOMAIN-2")}, stack="other"
+    )
+    evaluate(mocks)
+
+    assert mocks.probes == 4
+    assert mocks.launched == {"ronzz-linux-server": ("AD-1", "FAULT-DOMAIN-1")}
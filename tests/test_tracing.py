@@ -0,0 +1,54 @@
+"""Trace and invoke reports written per evaluation, against the mocked provider."""
+
+import json
+
+import pytest
+
+from inline_program import run_mocked
+from mocks import OciMocks
+
+CONFIG = {
+    "compartment_id": "ocid1.compartment.oc1..test",
+    "ssh_public_key": "ssh-ed25519 AAAAC3NzaC1lZDI1NTE5AAAAITest test@example",
+    "availability_domain": "AD-1",
+}
+
+
+@pytest.fixture
+def config(tmp_path):
+    return {
+        **CONFIG,
+        "image_cache_path": str(tmp_path / "images.json"),
+        "trace_file": str(tmp_path / "trace.json"),
+        "invoke_stats_path": str(tmp_path / "invokes.json"),
+    }
+
+
+def resource_spans(path):
+    events = json.loads(path.read_text())["traceEvents"]
+    return {
+        event["name"]: event["args"]["outcome"]
+        for event in events
+        if event.get("cat") == "resource"
+    }
+
+
+def test_each_evaluation_writes_its_own_reports(config, tmp_path):
+    # A warm runner evaluates the program repeatedly in one process
+    for count in (1, 3):
+        run_mocked({**config, "fleet": {"count": count}}, OciMocks(), stack="test")
+
+        spans = resource_spans(tmp_path / "trace.json")
+        workers = [name for name in spans if name.startswith("ronzz-worker-")]
+        assert len(workers) == count
+        assert set(spans.values()) == {"ok"}
+        invokes = json.loads((tmp_path / "invokes.json").read_text())
+        assert invokes["get_vnic_attachments"]["calls"] == count
+
+
+def test_failed_registration_writes_the_trace(config, tmp_path):
+    mocks = OciMocks(faults={"out_of_capacity": [{"availability_domain": "AD-1"}]})
+    with pytest.raises(Exception, match="Out of host capacity"):
+        run_mocked(config, mocks, stack="test")
+
+    assert resource_spans(tmp_path / "trace.json")["ronzz-linux-server"] == "error"
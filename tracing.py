@@ -0,0 +1,179 @@
+"""Opt-in timing instrumentation written as a Chrome trace file.
+
+A ``Tracer`` records one span per resource registration (from the moment
+the program registers it until the engine reports it created, or its URN
+resolves during a preview), one span per data-source API call made through
+the ``InvokeLayer`` and spans for synchronous program phases. The file is
+written once the program evaluation settles (see ``after_evaluation``) in
+the Chrome trace event format, which can be opened in Perfetto
+(https://ui.perfetto.dev) or chrome://tracing.
+
+Nothing in this module runs unless a ``Tracer`` is created or
+``after_evaluation`` is called.
+"""
+
+import asyncio
+import contextlib
+import itertools
+import json
+import os
+import time
+
+import pulumi
+from pulumi.runtime.settings import SETTINGS
+
+
+def _now_us():
+    return time.time_ns() // 1000
+
+
+def _awaited_by_engine(coroutine):
+    # Wrap in an Output: the engine keeps the evaluation open until every
+    # output resolves. Output.from_input would chain a second output on it.
+    known = asyncio.get_event_loop().create_future()
+    known.set_result(True)
+    return pulumi.Output(set(), coroutine, known)
+
+
+class Tracer:
+    """Collects spans and writes them to ``path`` with ``write``."""
+
+    def __init__(self, path):
+        self.path = path
+        self.events = []
+        self._pid = os.getpid()
+        self._lanes = itertools.count(1)
+        self._pending = {}
+        self._program_start = _now_us()
+
+    def _lane(self, label):
+        # Give every span its own row so overlapping spans render side by side
+        tid = next(self._lanes)
+        self.events.append(
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": self._pid,
+                "tid": tid,
+                "args": {"name": label},
+            }
+        )
+        return tid
+
+    def _event(self, name, category, start_us, end_us, tid=None, **args):
+        return {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": start_us,
+            "dur": max(end_us - start_us, 0),
+            "pid": self._pid,
+            "tid": tid if tid is not None else self._lane(name),
+            "args": args,
+        }
+
+    def span(self, name, category, start_us, end_us, tid=None, **args):
+        self.events.append(
+            self._event(name, category, start_us, end_us, tid=tid, **args)
+        )
+
+    @contextlib.contextmanager
+    def phase(self, name, category="program"):
+        start = _now_us()
+        outcome = "ok"
+        try:
+            yield
+        except BaseException:
+            outcome = "error"
+            raise
+        finally:
+            self.span(name, category, start, _now_us(), outcome=outcome)
+
+    def record_invoke(self, name, start_us, end_us, outcome, attempt):
+        self.span(name, "invoke", start_us, end_us, outcome=outcome, attempt=attempt)
+
+    def install(self):
+        """Start tracing every resource registered after this call."""
+        pulumi.runtime.register_stack_transformation(self._on_register)
+
+    def _on_register(self, args):
+        start = _now_us()
+        key = (args.type_, args.name)
+        self._pending[key] = start
+        _awaited_by_engine(self._watch(args.resource, key, start))
+        # Leave the resource untouched
+        return None
+
+    async def _watch(self, resource, key, start):
+        outcome = "ok"
+        error_message = None
+        try:
+            await resource.urn.future()
+            if isinstance(resource, pulumi.CustomResource):
+                await resource.id.future(with_unknowns=True)
+        except Exception as error:
+            outcome = "error"
+            error_message = str(error)
+        self._pending.pop(key, None)
+        type_, name = key
+        args = {"type": type_, "outcome": outcome}
+        if error_message:
+            args["error"] = error_message
+        self.span(name, "resource", start, _now_us(), **args)
+        if outcome == "error":
+            # A failed registration ends the evaluation before it settles
+            self.write()
+
+    def end_program(self):
+        """Mark the end of program evaluation (all resources registered)."""
+        self.span("program evaluation", "program", self._program_start, _now_us())
+
+    def write(self):
+        """Write the spans so far; unfinished registrations are incomplete."""
+        end = _now_us()
+        incomplete = [
+            self._event(name, "resource", start, end, type=type_, outcome="incomplete")
+            for (type_, name), start in self._pending.items()
+        ]
+        with open(self.path, "w") as f:
+            json.dump(
+                {"traceEvents": self.events + incomplete, "displayTimeUnit": "ms"},
+                f,
+                indent=1,
+            )
+
+
+def after_evaluation(callback):
+    """Call ``callback`` once every other output of this evaluation resolved.
+
+    The engine keeps an evaluation open until all of its outputs resolve, so
+    waiting from inside one of them runs ``callback`` at the end of each
+    evaluation, also when a warm runner evaluates the program many times in
+    one process. Call it last: outputs created later are not waited for.
+    """
+
+    async def settle():
+        current = asyncio.current_task()
+        try:
+            while True:
+                with SETTINGS.lock:
+                    pending = [
+                        output
+                        for output in SETTINGS.outputs
+                        if output is not current and not output.done()
+                    ]
+                if not pending:
+                    break
+                await asyncio.wait(pending)
+        finally:
+            # Also when a failed registration makes the engine cancel the run
+            callback()
+
+    return _awaited_by_engine(settle())
+
+
+def phase(tracer, name, category="program"):
+    """Time a synchronous phase with ``tracer``; a no-op when it is None."""
+    if tracer is None:
+        return contextlib.nullcontext()
+    return tracer.phase(name, category)
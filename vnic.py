@@ -0,0 +1,55 @@
+"""Primary VNIC lookup for compute instances."""
+
+import asyncio
+
+import pulumi
+import pulumi_oci as oci
+
+
+async def _resolve_primary_vnic(
+    invokes, compartment_id, instance_id, attempts, initial_delay, max_delay
+):
+    delay = initial_delay
+    for attempt in range(attempts):
+        # Attachment state changes while the instance provisions, so this
+        # call is never memoized
+        attachments = await invokes.invoke_async(
+            oci.core.get_vnic_attachments_output,
+            cache=False,
+            compartment_id=compartment_id,
+            instance_id=instance_id,
+        )
+        attached = [
+            attachment
+            for attachment in attachments.vnic_attachments
+            if attachment.state == "ATTACHED" and attachment.vnic_id
+        ]
+        if attached:
+            return await invokes.invoke_async(
+                oci.core.get_vnic_output, vnic_id=attached[0].vnic_id
+            )
+        if attempt + 1 < attempts:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_delay)
+
+    pulumi.log.warn(
+        f"No attached VNIC found for {instance_id} after {attempts} attempts"
+    )
+    return None
+
+
+def primary_vnic(
+    invokes, compartment_id, instance, attempts=8, initial_delay=2.0, max_delay=30.0
+):
+    """Return an Output resolving to the instance's primary VNIC (or None).
+
+    Uses the non-blocking ``*_output`` invokes through the shared
+    ``InvokeLayer`` and polls the VNIC attachment with bounded exponential
+    backoff, so the public IP is available in the same ``pulumi up`` that
+    launches the instance.
+    """
+    return pulumi.Output.all(compartment_id, instance.id).apply(
+        lambda args: _resolve_primary_vnic(
+            invokes, args[0], args[1], attempts, initial_delay, max_delay
+        )
+    )
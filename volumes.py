@@ -0,0 +1,343 @@
+"""Block storage: boot volume sizing and striped data volume sets.
+
+A volume set is N identical block volumes attached to each instance and
+assembled by cloud-init into one filesystem, either as an mdadm RAID0 array
+or as a striped LVM logical volume, so IOPS and throughput scale with N.
+"""
+
+import shlex
+from typing import NamedTuple
+
+import pulumi_oci as oci
+
+# Named performance tiers as volume performance units (VPUs) per GB
+VPU_TIERS = {
+    "lower": 0,
+    "balanced": 10,
+    "higher": 20,
+    "ultra": 30,
+}
+
+# Boot volume presets as (size in GB, VPUs per GB); None keeps the image
+# default size and the Balanced tier
+BOOT_VOLUME_PRESETS = {
+    "default": (None, None),
+    "balanced": (100, 10),
+    "higher": (100, 20),
+    "ultra": (200, 30),
+}
+
+LAYOUTS = ("single", "raid0", "lvm")
+FILESYSTEMS = ("xfs", "ext4")
+
+# Consistent device paths available for paravirtualized and iSCSI attachments
+_DEVICE_LETTERS = "bcdefghijklmnopqrstuvwxyz"
+
+_MOUNT_OPTIONS = {
+    "xfs": "defaults,noatime,nofail,logbufs=8,logbsize=256k",
+    "ext4": "defaults,noatime,nofail",
+}
+
+
+class BootVolume(NamedTuple):
+    size_in_gbs: int | None
+    vpus_per_gb: int | None
+
+
+def resolve_boot_volume(preset=None, size_in_gbs=None, vpus_per_gb=None):
+    """Combine a boot volume preset with explicit overrides and validate them."""
+    if preset is not None and preset not in BOOT_VOLUME_PRESETS:
+        raise ValueError(
+            f"Unknown boot_volume_preset {preset!r}; "
+            f"expected one of: {', '.join(BOOT_VOLUME_PRESETS)}"
+        )
+    preset_size, preset_vpus = BOOT_VOLUME_PRESETS[preset or "default"]
+    size_in_gbs = size_in_gbs if size_in_gbs is not None else preset_size
+    vpus_per_gb = vpus_per_gb if vpus_per_gb is not None else preset_vpus
+    if size_in_gbs is not None and not 50 <= size_in_gbs <= 32768:
+        raise ValueError("boot_volume_size_in_gbs must be between 50 and 32768")
+    if vpus_per_gb is not None and (not 10 <= vpus_per_gb <= 120 or vpus_per_gb % 10):
+        raise ValueError(
+            "boot_volume_vpus_per_gb must be a multiple of 10 between 10 and 120"
+        )
+    return BootVolume(size_in_gbs, vpus_per_gb)
+
+
+class VolumeSet(NamedTuple):
+    name: str
+    size_in_gbs: int
+    vpus_per_gb: int
+    count: int
+    layout: str
+    filesystem: str
+    mount: str
+    attachment_type: str
+    devices: tuple
+
+
+def parse_volume_sets(volumes):
+    """Validate the ``volumes`` config list and assign device paths."""
+    volume_sets = []
+    names = set()
+    next_device = 0
+    for entry in volumes:
+        name = entry.get("name")
+        if not name or not name.isalnum():
+            raise ValueError(f"Volume set names must be alphanumeric, got {name!r}")
+        if name in names:
+            raise ValueError(f"Duplicate volume set name {name!r}")
+        names.add(name)
+
+        if "vpus_per_gb" in entry:
+            vpus_per_gb = int(entry["vpus_per_gb"])
+        else:
+            tier = entry.get("performance", "balanced")
+            if tier not in VPU_TIERS:
+                raise ValueError(
+                    f"volumes.{name}: unknown performance {tier!r}; "
+                    f"expected one of: {', '.join(VPU_TIERS)}"
+                )
+            vpus_per_gb = VPU_TIERS[tier]
+        if not 0 <= vpus_per_gb <= 120 or vpus_per_gb % 10:
+            raise ValueError(
+                f"volumes.{name}: vpus_per_gb must be a multiple of 10 "
+                f"between 0 and 120, got {vpus_per_gb}"
+            )
+
+        attachment_type = entry.get("attachment_type", "paravirtualized")
+        if attachment_type not in ("paravirtualized", "iscsi"):
+            raise ValueError(
+                f"volumes.{name}: attachment_type must be paravirtualized or iscsi"
+            )
+        if vpus_per_gb > 20 and attachment_type != "iscsi":
+            raise ValueError(
+                f"volumes.{name}: Ultra High Performance ({vpus_per_gb} VPUs/GB) "
+                "needs attachment_type iscsi"
+            )
+
+        count = int(entry.get("count", 1))
+        layout = entry.get("layout", "raid0" if count > 1 else "single")
+        if layout not in LAYOUTS:
+            raise ValueError(
+                f"volumes.{name}: layout must be one of: {', '.join(LAYOUTS)}"
+            )
+        if count < 1 or (layout == "single" and count != 1):
+            raise ValueError(
+                f"volumes.{name}: count must be 1 for a single layout "
+                "and at least 1 otherwise"
+            )
+
+        filesystem = entry.get("filesystem", "xfs")
+        if filesystem not in FILESYSTEMS:
+            raise ValueError(
+                f"volumes.{name}: filesystem must be one of: {', '.join(FILESYSTEMS)}"
+            )
+
+        size_in_gbs = int(entry.get("size_in_gbs", 50))
+        if not 50 <= size_in_gbs <= 32768:
+            raise ValueError(
+                f"volumes.{name}: size_in_gbs must be between 50 and 32768"
+            )
+
+        if next_device + count > len(_DEVICE_LETTERS):
+            raise ValueError(
+                f"At most {len(_DEVICE_LETTERS)} data volumes can be attached "
+                "per instance"
+            )
+        devices = tuple(
+            f"/dev/oracleoci/oraclevd{_DEVICE_LETTERS[next_device + index]}"
+            for index in range(count)
+        )
+        next_device += count
+
+        volume_sets.append(
+            VolumeSet(
+                name=name,
+                size_in_gbs=size_in_gbs,
+                vpus_per_gb=vpus_per_gb,
+                count=count,
+                layout=layout,
+                filesystem=filesystem,
+                mount=entry.get("mount", f"/mnt/{name}"),
+                attachment_type=attachment_type,
+                devices=devices,
+            )
+        )
+    return volume_sets
+
+
+def needs_block_volume_plugin(volume_sets):
+    """Return True when a set needs the Block Volume Management agent plugin.
+
+    The plugin performs the automatic iSCSI logins of every ``iscsi``
+    attachment, including the multipath logins of Ultra High Performance
+    volumes (which always attach over iSCSI).
+    """
+    return any(volume_set.attachment_type == "iscsi" for volume_set in volume_sets)
+
+
+def create_volumes(
+    node_name, availability_domain, compartment_id, instance, volume_sets
+):
+    """Create and attach the volumes of every set to one instance."""
+    attachments = []
+    for volume_set in volume_sets:
+        for index, device in enumerate(volume_set.devices):
+            name = f"{node_name}-{volume_set.name}-{index}"
+            volume = oci.core.Volume(
+                name,
+                availability_domain=availability_domain,
+                compartment_id=compartment_id,
+                display_name=name,
+                size_in_gbs=str(volume_set.size_in_gbs),
+                vpus_per_gb=str(volume_set.vpus_per_gb),
+            )
+            attachments.append(
+                oci.core.VolumeAttachment(
+                    f"{name}-attachment",
+                    attachment_type=volume_set.attachment_type,
+                    instance_id=instance.id,
+                    volume_id=volume.id,
+                    device=device,
+                    display_name=f"{name}-attachment",
+                    is_agent_auto_iscsi_login_enabled=(
+                        True if volume_set.attachment_type == "iscsi" else None
+                    ),
+                )
+            )
+    return attachments
+
+
+_VOLUMES_SCRIPT = """#!/bin/sh
+# Assembles ronzz volume sets; runs at every boot and is idempotent
+set -eu
+
+wait_for() {
+    for device in "$@"; do
+        tries=0
+        while [ ! -b "$device" ]; do
+            tries=$((tries + 1))
+            if [ "$tries" -gt 120 ]; then
+                echo "Timed out waiting for $device" >&2
+                return 1
+            fi
+            sleep 5
+        done
+    done
+}
+
+make_fs() {
+    device=$1 fs=$2 width=$3
+    if blkid "$device" >/dev/null 2>&1; then
+        return 0
+    fi
+    # 256 KiB stripe unit, one stripe across every member volume
+    case "$fs" in
+        xfs) mkfs.xfs -f -d su=256k,sw="$width" "$device" ;;
+        ext4) mkfs.ext4 -F -E stride=64,stripe_width=$((64 * width)) "$device" ;;
+    esac
+}
+
+mount_fs() {
+    device=$1 fs=$2 target=$3 options=$4
+    mkdir -p "$target"
+    uuid=$(blkid -s UUID -o value "$device")
+    if ! grep -q "UUID=$uuid " /etc/fstab; then
+        echo "UUID=$uuid $target $fs $options 0 2" >> /etc/fstab
+    fi
+    mountpoint -q "$target" || mount "$target"
+}
+
+layout_single() {
+    name=$1 fs=$2 target=$3 options=$4
+    shift 4
+    wait_for "$@"
+    make_fs "$1" "$fs" 1
+    mount_fs "$1" "$fs" "$target" "$options"
+}
+
+layout_raid0() {
+    name=$1 fs=$2 target=$3 options=$4
+    shift 4
+    wait_for "$@"
+    array=/dev/md/$name
+    if [ ! -e "$array" ]; then
+        mdadm --assemble "$array" "$@" 2>/dev/null || \\
+            mdadm --create "$array" --run --level=0 --chunk=256 \\
+                --raid-devices=$# --name="$name" "$@"
+        mdadm --detail --scan > /etc/mdadm/mdadm.conf
+    fi
+    make_fs "$array" "$fs" $#
+    mount_fs "$array" "$fs" "$target" "$options"
+}
+
+layout_lvm() {
+    name=$1 fs=$2 target=$3 options=$4
+    shift 4
+    wait_for "$@"
+    if ! vgs "$name" >/dev/null 2>&1; then
+        pvcreate -y "$@"
+        vgcreate "$name" "$@"
+        lvcreate -y -i $# -I 256k -l 100%FREE -n data "$name"
+    fi
+    make_fs "/dev/$name/data" "$fs" $#
+    mount_fs "/dev/$name/data" "$fs" "$target" "$options"
+}
+
+"""
+
+_VOLUMES_SERVICE = """[Unit]
+Description=Assemble ronzz block volume sets
+Wants=network-online.target
+After=network-online.target local-fs.target
+
+[Service]
+Type=oneshot
+ExecStart=/usr/local/sbin/ronzz-volumes.sh
+RemainAfterExit=yes
+
+[Install]
+WantedBy=multi-user.target
+"""
+
+
+def cloud_init_part(volume_sets):
+    """Return the cloud-config part that assembles and mounts volume sets."""
+    calls = []
+    for volume_set in volume_sets:
+        options = _MOUNT_OPTIONS[volume_set.filesystem]
+        if volume_set.attachment_type == "iscsi":
+            options += ",_netdev"
+        calls.append(
+            shlex.join(
+                [
+                    f"layout_{volume_set.layout}",
+                    volume_set.name,
+                    volume_set.filesystem,
+                    volume_set.mount,
+                    options,
+                    *volume_set.devices,
+                ]
+            )
+        )
+    return {
+        "write_files": [
+            {
+                "path": "/usr/local/sbin/ronzz-volumes.sh",
+                "permissions": "0755",
+                "content": _VOLUMES_SCRIPT + "\n".join(calls) + "\n",
+            },
+            {
+                "path": "/etc/systemd/system/ronzz-volumes.service",
+                "permissions": "0644",
+                "content": _VOLUMES_SERVICE,
+            },
+        ],
+        "runcmd": [
+            ["systemctl", "daemon-reload"],
+            ["systemctl", "enable", "ronzz-volumes.service"],
+            # Attachments may land after first boot; wait for them off the
+            # cloud-init critical path
+            ["systemctl", "start", "--no-block", "ronzz-volumes.service"],
+        ],
+    }
@@ -0,0 +1,241 @@
+"""Long-lived preview runner that keeps the workspace and provider warm.
+
+Every ``pulumi preview`` from the CLI starts the CLI, the Python language
+host and the OCI provider and imports the program from scratch. This runner
+selects the stack once through ``pulumi.automation.create_or_select_stack``
+with ``__main__.py`` as the inline program and then runs many previews in a
+row in the same process. Python modules (pulumi, pulumi_oci and the
+program's own) stay imported, the workspace is reused and, with
+``--reuse-provider``, one OCI provider process started up front is attached
+to every preview through ``PULUMI_DEBUG_PROVIDERS``.
+
+Runs are config overrides applied on top of the stack's config, read from a
+JSON list or as JSON lines from stdin (e.g. fed by a PR bot):
+
+    python warm_runner.py --stack dev --sweep sweep.json --compare-cold 3
+    echo '{"instance_size": "large"}' | python warm_runner.py --stack dev --sweep -
+"""
+
+import argparse
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from importlib import metadata
+
+from inline_program import PROJECT, namespaced, program, workspace_options
+
+
+def _plugin_dir():
+    return os.path.join(
+        os.environ.get("PULUMI_HOME", os.path.expanduser("~/.pulumi")), "plugins"
+    )
+
+
+def find_provider_binary():
+    """Return the installed OCI provider binary matching ``pulumi_oci``."""
+    try:
+        wanted = metadata.version("pulumi_oci")
+    except metadata.PackageNotFoundError:
+        wanted = None
+    binaries = sorted(
+        glob.glob(os.path.join(_plugin_dir(), "resource-oci-v*", "pulumi-resource-oci"))
+    )
+    for binary in binaries:
+        if wanted and f"resource-oci-v{wanted}" in binary:
+            return binary
+    if not binaries:
+        raise SystemExit(
+            "No OCI provider plugin installed; run `pulumi plugin install resource oci`"
+        )
+    return binaries[-1]
+
+
+def start_provider():
+    """Start the OCI provider; returns ``(process, port)``.
+
+    A provider started without an engine address prints the port it serves
+    on and stays up until terminated.
+    """
+    process = subprocess.Popen(
+        [find_provider_binary()], stdout=subprocess.PIPE, text=True
+    )
+    port = process.stdout.readline().strip()
+    if not port.isdigit():
+        process.terminate()
+        raise SystemExit(f"OCI provider did not report a port (got {port!r})")
+    return process, int(port)
+
+
+class WarmRunner:
+    """One stack, one workspace and optionally one provider for many previews."""
+
+    def __init__(self, stack_name, backend=None, reuse_provider=False):
+        from pulumi import automation as auto
+
+        self._auto = auto
+        self.provider = None
+        env_vars = {}
+        if reuse_provider:
+            self.provider, port = start_provider()
+            env_vars["PULUMI_DEBUG_PROVIDERS"] = f"oci:{port}"
+        self.stack = auto.create_or_select_stack(
+            stack_name=stack_name,
+            project_name=PROJECT,
+            program=program,
+            opts=workspace_options(backend, env_vars=env_vars),
+        )
+        self.base_config = self.stack.get_all_config()
+        self._overridden = set()
+
+    def _apply(self, overrides):
+        overrides = namespaced(overrides)
+        # Undo the previous run's overrides that this run does not repeat
+        for key in self._overridden - set(overrides):
+            if key in self.base_config:
+                self.stack.set_config(key, self.base_config[key])
+            else:
+                self.stack.remove_config(key)
+        if overrides:
+            self.stack.set_all_config(
+                {
+                    key: self._auto.ConfigValue(value=value)
+                    for key, value in overrides.items()
+                }
+            )
+        self._overridden = set(overrides)
+
+    def preview(self, overrides=None, on_output=None):
+        """Preview with ``overrides``; returns ``(seconds, change_summary)``."""
+        start = time.perf_counter()
+        self._apply(overrides or {})
+        result = self.stack.preview(on_output=on_output)
+        return time.perf_counter() - start, result.change_summary
+
+    def reset(self):
+        """Restore the stack's own config."""
+        self._apply({})
+
+    def close(self):
+        self.reset()
+        if self.provider:
+            self.provider.terminate()
+            self.provider.wait()
+
+
+def cold_preview(stack_name, work_dir, env=None):
+    """Time one ``pulumi preview`` through the CLI; returns seconds."""
+    start = time.perf_counter()
+    subprocess.run(
+        ["pulumi", "preview", "--stack", stack_name, "--non-interactive"],
+        cwd=work_dir,
+        env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+def _read_sweep(path):
+    if path == "-":
+        # One JSON object per line, previewed as each line arrives
+        for line in sys.stdin:
+            if line.strip():
+                yield json.loads(line)
+        return
+    with open(path) as f:
+        yield from json.load(f)
+
+
+def _summary(latencies):
+    if not latencies:
+        return None
+    return {
+        "runs": len(latencies),
+        "first_s": round(latencies[0], 3),
+        "median_s": round(statistics.median(latencies), 3),
+        "min_s": round(min(latencies), 3),
+        "max_s": round(max(latencies), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stack", required=True)
+    parser.add_argument(
+        "--sweep", help="JSON list of config overrides, or - for JSON lines on stdin"
+    )
+    parser.add_argument(
+        "--runs", type=int, default=1, help="Repeat the sweep (default: 1)"
+    )
+    parser.add_argument("--backend", help="State backend URL, e.g. file://~/.pulumi")
+    parser.add_argument(
+        "--reuse-provider",
+        action="store_true",
+        help="Start one OCI provider and attach every preview to it",
+    )
+    parser.add_argument(
+        "--compare-cold",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Also time N cold `pulumi preview` CLI runs",
+    )
+    parser.add_argument("--verbose", action="store_true", help="Stream preview output")
+    parser.add_argument("--out", help="Write the latency report as JSON")
+    args = parser.parse_args()
+
+    runner = WarmRunner(args.stack, args.backend, args.reuse_provider)
+    warm = []
+    cold = []
+    try:
+        for _ in range(args.runs):
+            sweep = _read_sweep(args.sweep) if args.sweep else [{}]
+            for overrides in sweep:
+                seconds, changes = runner.preview(
+                    overrides, on_output=print if args.verbose else None
+                )
+                warm.append(seconds)
+                print(
+                    f"warm #{len(warm)} {json.dumps(overrides)}: {seconds:.2f}s "
+                    f"{json.dumps(changes)}",
+                    flush=True,
+                )
+        # Cold runs use the stack's own config and start their own provider
+        runner.reset()
+        cold_env = {
+            key: value
+            for key, value in runner.stack.workspace.env_vars.items()
+            if key != "PULUMI_DEBUG_PROVIDERS"
+        }
+        for _ in range(args.compare_cold):
+            cold.append(
+                cold_preview(args.stack, runner.stack.workspace.work_dir, cold_env)
+            )
+            print(f"cold #{len(cold)}: {cold[-1]:.2f}s", flush=True)
+    finally:
+        runner.close()
+
+    report = {
+        "stack": args.stack,
+        "reuse_provider": args.reuse_provider,
+        "warm": _summary(warm),
+        "warm_after_first": _summary(warm[1:]),
+        "cold": _summary(cold),
+    }
+    if cold and len(warm) > 1:
+        report["speedup"] = round(
+            statistics.median(cold) / statistics.median(warm[1:]), 2
+        )
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()